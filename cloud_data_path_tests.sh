@@ -11,6 +11,9 @@ IOENGINE='libaio'
 TESTDIR='/mnt/hs_test'
 CREATE_FILES_MAX_THREADS=32
 WHAT_IF=false
+SERVER_STATS=${SERVER_STATS:-0}  # 1 deploys the agent to LSS_IPS as root to collect disk, CPU and NIC stats
+DROP_CACHES=${DROP_CACHES:-0}  # 1 drops client caches before every point, 2 also LSS_IPS (needs SERVER_STATS=1)
+LOG_AVG_MSEC=${LOG_AVG_MSEC:-0}  # 1000 merges per second fio bw, IOPS and latency logs into a cluster timeline
 RUN_FIO_PATH=''  # Override with full path if needed
 FIO_RESULTS_DIR='fio_results'  # Override if results dir is elsewhere
 mkdir -p ${FIO_RESULTS_DIR}
@@ -104,46 +107,52 @@ run_tests() {
     $ITERATIONS \
   ))
 
-  local count=0
-  for nj in $THREAD_COUNTS; do
-    for qd in $QUEUE_DEPTHS; do
-      for bs in $BLOCK_SIZES; do
-        for fc in $FILE_COUNTS; do
-          for iotype in $IOTYPES; do
-            for ((itr=1; itr<=ITERATIONS; itr++)); do
-              ((count++))
-              echo "Starting $MODE Test: $count out of $total"
-
-              CMD="$RUN_FIO_PATH -N \"${BASENAME}_${MODE}_${iotype}_i${itr}_b${bs}_nj${nj}_qd${qd}_n${fc}\" -r \"$RUNTIME\" -T \"$iotype\" --ips $IPS -b $bs -s $FILE_SIZE -j $nj -q $qd -n $fc -i $IOENGINE -t $TESTDIR -o $FIO_RESULTS_DIR "
-
-              if [[ "$itr" -eq 1 ]]; then
-                if [[ $fc -gt $CREATE_FILES_MAX_THREADS ]]; then
-                  CMD+=" -F $CREATE_FILES_MAX_THREADS"
-                else
-                  CMD+=" -F $fc"
-                fi
-              else
-                CMD+=" -S"
-              fi
-
-              echo "$CMD"
-              if $WHAT_IF; then
-                for ip in $LSS_IPS $IPS; do
-                  echo ssh $ip 'sudo su -; echo 3 > /proc/sys/vm/drop_caches'
-                done
-              else
-                sleep $SLEEPTIME
-                eval $CMD
-#                for ip in $LSS_IPS $IPS; do
-#                  ssh $ip 'sudo su -;echo 3 > /proc/sys/vm/drop_caches'
-#                done
-              fi
-            done
-          done
-        done
-      done
-    done
+  # run_fio.py sweeps every combination in one session. Agents and fio servers stay up between points and test
+  # files are only recreated when the file layout changes. Axes are listed outermost first.
+  local axes=""
+  axes+=" --axis fio_numjobs=$(echo $THREAD_COUNTS | tr ' ' ',')"
+  axes+=" --axis queue_depth=$(echo $QUEUE_DEPTHS | tr ' ' ',')"
+  axes+=" --axis block_size=$(echo $BLOCK_SIZES | tr ' ' ',')"
+  axes+=" --axis num_testfiles=$(echo $FILE_COUNTS | tr ' ' ',')"
+  axes+=" --axis template=$(echo $IOTYPES | tr ' ' ',')"
+
+  # Storage servers report disk, CPU and NIC stats for every point when asked for
+  local servers=""
+  if [[ "$SERVER_STATS" == 1 && -n "$LSS_IPS" ]]; then
+    servers=" --server_ips $LSS_IPS"
+  fi
+
+  # Caches are dropped by run_fio.py before every point when asked for, on the storage servers only with DROP_CACHES=2
+  local drop=""
+  if [[ "$DROP_CACHES" -ge 1 ]]; then
+    drop=" --drop_caches --drop_wait_dirty"
+    if [[ "$DROP_CACHES" -ge 2 && -n "$servers" ]]; then
+      drop+=" --drop_server_caches"
+    fi
+  fi
+
+  # One prefill thread per file, at most CREATE_FILES_MAX_THREADS and no more than the smallest client has vCPUs,
+  # which run_fio.py checks on every client
+  local create_threads=$(tr ' ' '\n' <<< "$FILE_COUNTS" | sort -n | tail -1)
+  if [[ $create_threads -gt $CREATE_FILES_MAX_THREADS ]]; then
+    create_threads=$CREATE_FILES_MAX_THREADS
+  fi
+  for ip in $IPS; do
+    local cpus=$(ssh -o BatchMode=yes $ip nproc 2>/dev/null)
+    if [[ -n "$cpus" && $cpus -lt $create_threads ]]; then
+      create_threads=$cpus
+    fi
   done
+
+  echo "Starting $MODE Tests: $total points"
+
+  CMD="$RUN_FIO_PATH -N \"${BASENAME}_${MODE}\" -r \"$RUNTIME\" --ips $IPS -s $FILE_SIZE -i $IOENGINE -t $TESTDIR -o $FIO_RESULTS_DIR -F $create_threads --sweep_iterations $ITERATIONS --sweep_pause $SLEEPTIME --log_avg_msec $LOG_AVG_MSEC$drop$servers $axes"
+
+  echo "$CMD"
+  if ! $WHAT_IF; then
+    sleep $SLEEPTIME
+    eval $CMD
+  fi
   echo "Completed ${MODE} Tests"
 }
 
@@ -2,7 +2,8 @@
 
 #mlr --icsv  --ojson cat fio_output_2025-08-13_21-34-18.csv > fio_output_2025-08-13_21-34-18.json
 
-for d in `ls fio_results/*/*.csv`; do 
+# Sweeps keep each point in its own directory inside the sweep bundle
+for d in `find fio_results -name 'fio_output_*.csv'`; do 
 	jf=`echo $d| cut -d'.' -f 1`.json
 	echo creating  $jf 
 	mlr --icsv  --ojson cat $d > ${jf}
@@ -9,23 +9,37 @@
 # TODO: Double check run_command_and_go return values
 
 import argparse
+import array
+import codecs
+import collections
 import subprocess
 import multiprocessing
+import io
+import itertools
 import logging
+import mmap
 import os
 import csv
+import gzip
+import hashlib
+import random
 import re
 import sys
 import json
+import tempfile
 import shutil
 import ipaddress
+import math
 import socket
+import statistics
+import struct
 import tarfile
+import threading
 import time
 import typing
+import zlib
 from datetime import datetime
-from functools import reduce
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
 
 # =====================================
@@ -38,6 +52,45 @@ logger = logging.getLogger('fio_nfs')
 
 # Create global for nfsio process
 nfsio_proc: typing.Optional[subprocess.Popen] = None
+# Thread that copies the nfsiostat output to its file with a timestamp before every block
+nfsio_writer: typing.Optional[threading.Thread] = None
+# In-process /proc/self/mountstats sampler, used instead of nfsiostat with --nfs_stats mountstats
+mountstats_sampler: typing.Optional['CounterSampler'] = None
+# In-process sampler of the client's CPU, softirq, network, memory and pressure counters
+host_stats_sampler: typing.Optional['CounterSampler'] = None
+
+# Functions the agent runs on behalf of the controller. Requests for anything else are rejected
+AGENT_COMMANDS = ['agent_status', 'remote_checks', 'create_test_files', 'run_command_and_go', 'start_nfsio_stats',
+                  'stop_and_parse_nfsio_stats', 'start_mountstats', 'stop_mountstats', 'start_host_stats',
+                  'stop_host_stats', 'drop_caches', 'create_tarfile']
+
+# Requests the agent runs at the same time across all controller connections
+AGENT_WORKERS = 32
+
+# Largest agent protocol message accepted, guards against reading garbage as a length
+AGENT_MAX_FRAME = 256 * 1024 * 1024
+
+# Most hosts the controller drives at once in each per-client phase
+FAN_OUT_WORKERS = 64
+
+# Persistent controller connections to the agents keyed by (host, port)
+agent_connections: dict = {}
+agent_connections_lock = threading.Lock()
+
+# Shared in-flight write budget for file creation workers, set by init_prefill_worker
+prefill_inflight_tokens = None
+
+# Page aligned prefill buffers of the current worker process keyed by (block size, pattern, compress percentage)
+prefill_buffers: dict = {}
+
+# Data patterns available for test file creation. These follow IOR's dataPacketType choices
+PREFILL_PATTERNS = ['random', 'timestamp', 'zero', 'compressible']
+
+# How test files are created. fallocate and truncate skip writing data and are meant for read templates
+PREFILL_MODES = ['write', 'fallocate', 'truncate']
+
+# Name of the per-client manifest describing the test files already in place
+PREFILL_MANIFEST = '.prefill_manifest.json'
 
 TEMPLATES = {
     'mike1': {
@@ -233,6 +286,176 @@ TEMPLATES = {
     }
 }
 
+# Latency percentiles reported for merged results
+REPORT_PERCENTILES = [50.0, 99.0, 99.9, 99.99]
+
+# Flattened keys left out of the fio CSV. json+ latency histograms add thousands of columns per client
+FIO_CSV_EXCLUDED_KEYS = re.compile(r'(^|_)bins_')
+
+# Arguments that describe the session rather than a test point and can not be swept
+SWEEP_EXCLUDED_ARGS = {'print_templates', 'server', 'ips', 'server_ips', 'output_dir', 'test_name', 'sweep', 'axis',
+                       'sweep_iterations', 'sweep_pause', 'search', 'search_max', 'search_gain', 'search_p99_us',
+                       'search_metric', 'search_bisect_steps', 'mpirun', 'mpi_args', 'ior_path', 'mdtest_path',
+                       'io500_path', 'io500_config'}
+
+# Parameters the saturation search can vary
+SEARCH_PARAMS = ['queue_depth', 'fio_numjobs']
+
+# Columns of search_summary.csv
+SEARCH_SUMMARY_HEADERS = ['template', 'block_size', 'io_direction', 'metric', 'queue_depth', 'fio_numjobs',
+                          'throughput', 'clat_p99_us', 'points_measured', 'stop_reasons']
+
+# Leading columns of sweep_summary.csv, the axis values of each point follow
+SWEEP_SUMMARY_HEADERS = ['point', 'template', 'engine', 'block_size', 'fio_numjobs', 'queue_depth', 'num_testfiles',
+                         'iteration', 'op', 'status', 'bw_gibs', 'iops', 'lat_mean_us', 'clat_p99_us', 'steady_state',
+                         'bottleneck', 'server_disk_imbalance', 'hottest_volume_util', 'timeline_min_gibs',
+                         'timeline_cov_pct']
+
+# Benchmarks run_test_point can drive. All but fio run under mpirun
+ENGINES = ['fio', 'ior', 'mdtest', 'io500']
+
+# Log names written by ior-Bandwidth-scale-v4.sh and ior-IOPs-scale-v4.sh, for example
+# scale-odirect-12-servers-32-threads-40964000m-write, with .json added for the summaryFile
+IOR_LOG_NAME_PATTERN = re.compile(r'^scale-odirect-(?P<clients>\d+)-servers-(?P<threads>\d+)-threads-'
+                                  r'(?P<size>\d+[kmg]?)-(?P<op>write|read)(?P<json>\.json)?$')
+
+# Progress of the slowest and furthest task at the stonewall, printed by IOR with -D
+IOR_STONEWALL_PATTERN = re.compile(r'stonewalling pairs accessed min: (?P<min>\d+) max: (?P<max>\d+)')
+
+# Columns of the table "run_fio.py ior" writes, one row per IOR summary, operation and iteration
+IOR_RESULT_HEADERS = ['source', 'test', 'clients', 'threads', 'tasks_per_client', 'op', 'iteration', 'transfer_size',
+                      'block_size', 'bw_mib_s', 'ops', 'time_s', 'stonewall_s', 'stonewall_bytes', 'moved_bytes',
+                      'wearout_s', 'pairs_min', 'pairs_mean', 'pairs_max', 'task_spread_pct']
+
+# Columns of the scaling curves "run_fio.py ior" writes, one row per IOR test, client count, operation, transfer
+# size and thread count
+IOR_SCALING_HEADERS = ['source', 'test', 'clients', 'op', 'transfer_size', 'threads', 'iterations', 'bw_gibs', 'ops',
+                       'speedup', 'task_spread_pct']
+
+# Columns of "run_fio.py report" that describe a cluster configuration and a test point
+REPORT_CONFIG_COLUMNS = ['source', 'storage', 'client_instance', 'server_instance', 'clients', 'lss']
+REPORT_POINT_COLUMNS = ['engine', 'template', 'op', 'bs', 'iodepth', 'numjobs', 'threads']
+
+# Columns of the CSV file "run_fio.py report" writes, one row per configuration and test point
+REPORT_HEADERS = REPORT_CONFIG_COLUMNS + REPORT_POINT_COLUMNS + [
+    'runs', 'bw_gibs', 'iops', 'bw_gibs_per_client', 'bw_gibs_per_lss', 'iops_per_client', 'iops_per_lss', 'vcpus',
+    'mibs_per_vcpu', 'cost_per_hour', 'gibs_per_cost', 'baseline', 'speedup', 'ideal_speedup', 'efficiency_pct',
+    'sublinear']
+
+# Columns that identify a test point in "run_fio.py compare". IOR points have threads instead of numjobs
+COMPARE_POINT_COLUMNS = ['engine', 'template', 'op', 'bs', 'iodepth', 'numjobs', 'num_testfiles', 'threads']
+
+# Metrics "run_fio.py compare" judges, and whether higher is better
+COMPARE_METRICS = [('bw_gibs', True), ('iops', True), ('clat_p99_us', False), ('nfs_rtt_ms', False)]
+
+# Columns of the CSV file "run_fio.py compare" writes, one row per test point and metric
+COMPARE_HEADERS = COMPARE_POINT_COLUMNS + ['metric', 'baseline_n', 'candidate_n', 'baseline', 'candidate',
+                                           'change_pct', 'limit_pct', 'p_value', 'status']
+
+# Splits of the pooled iterations up to which the Mann-Whitney test is exact, and the fewest iterations per side
+# the bootstrap needs
+COMPARE_EXACT_LIMIT = 20000
+COMPARE_MIN_BOOTSTRAP = 3
+
+# Columns of engine_results_<timestamp>.csv, the results of every IOR, mdtest and IO500 phase
+ENGINE_RESULT_HEADERS = ['engine', 'phase', 'op', 'bw_bytes', 'iops', 'time_s', 'tasks', 'clients', 'bs', 'valid']
+
+# fio log kinds merged into the cluster timeline, with the metric they become and the factor to its unit
+FIO_LOG_METRICS = {'bw': ('bw_bytes', 1024.0), 'iops': ('iops', 1.0), 'clat': ('clat_us', 0.001)}
+
+# Columns of the cluster timeline built from the fio logs, one row per bucket, direction and metric
+FIO_TIMELINE_COLUMNS = ['timestamp', 'elapsed_s', 'op', 'metric', 'clients', 'cluster', 'mean', 'min', 'p10', 'p50',
+                        'p90', 'max']
+
+# Columns of fio_timeline_summary_<timestamp>.csv. Only buckets every client reported in are summarized
+FIO_TIMELINE_SUMMARY_HEADERS = ['op', 'metric', 'clients', 'buckets', 'full_buckets', 'cluster_mean', 'cluster_min',
+                                'cluster_max', 'cluster_cov_pct', 'client_spread_pct']
+
+# Columns of the per mount nfsiostat time series. Per operation columns follow nfsiostat's own headers
+NFSIO_SERIES_HEADERS = ['timestamp', 'elapsed_s', 'in_fio_window', 'sample', 'nfs_mount', 'mount_point', 'ops/s',
+                        'rpc bklog'] + [f'{op} {column}' for op in ('read', 'write') for column in (
+                            'ops/s', 'kB/s', 'kB/op', 'retrans', 'avg RTT (ms)', 'avg exe (ms)', 'avg queue (ms)',
+                            'errors')]
+
+# Columns of the per mount nfsiostat summary
+NFSIO_SUMMARY_HEADERS = ['nfs_mount', 'mount_point', 'samples', 'ops/s mean', 'rpc bklog mean', 'rpc bklog max'] + [
+    f'{op} {column}' for op in ('read', 'write') for column in (
+        'ops/s mean', 'kB/s mean', 'RTT (ms) mean', 'RTT (ms) max', 'exe (ms) mean', 'exe (ms) max',
+        'queue (ms) mean', 'queue (ms) max', 'retrans', 'errors')]
+
+# NFS operations the mountstats sampler keeps, out of the roughly 60 the kernel counts
+MOUNTSTATS_OPS = ['READ', 'WRITE', 'COMMIT', 'GETATTR', 'SETATTR', 'LOOKUP', 'ACCESS', 'OPEN', 'CLOSE', 'CREATE',
+                  'REMOVE', 'READDIR', 'READDIRPLUS']
+
+# Per operation counters of /proc/self/mountstats, in the order the kernel prints them
+MOUNTSTATS_OP_FIELDS = ['ops', 'trans', 'timeouts', 'bytes_sent', 'bytes_recv', 'queue_ms', 'rtt_ms', 'exe_ms',
+                        'errors']
+
+# Transport counters of /proc/self/mountstats from sends on. req_u and bklog_u add up the requests in flight and
+# waiting for a slot at every send
+MOUNTSTATS_XPRT_FIELDS = ['sends', 'recvs', 'bad_xids', 'req_u', 'bklog_u']
+
+# Columns of the mountstats time series
+MOUNTSTATS_SERIES_COLUMNS = ['timestamp', 'elapsed_s', 'interval_s', 'in_fio_window', 'mount_point', 'op', 'ops',
+                             'retrans', 'timeouts', 'errors', 'sent_bytes', 'recv_bytes', 'queue_ms', 'rtt_ms',
+                             'exe_ms', 'backlog', 'outstanding']
+
+# NFS client stats files in the stats directory of a client: the nfsiostat time series and summary and the mountstats
+# summary
+NFS_STATS_FILE_PATTERN = re.compile(r'^(nfsio_stats|nfsio_summary|mountstats_summary)_.*\.csv$')
+
+# Columns of the mountstats summary
+MOUNTSTATS_SUMMARY_HEADERS = ['mount_point', 'op', 'intervals', 'ops', 'ops/s', 'rtt_ms_mean', 'rtt_ms_max',
+                              'exe_ms_mean', 'exe_ms_max', 'queue_ms_mean', 'retrans', 'timeouts', 'errors',
+                              'backlog_mean', 'backlog_max', 'outstanding_mean']
+
+# /proc/stat fields of every CPU the host stats keep, in kernel order. guest time is already part of user
+HOST_CPU_FIELDS = ['user', 'nice', 'system', 'idle', 'iowait', 'irq', 'softirq', 'steal']
+
+# Softirq types the host stats keep per CPU
+HOST_SOFTIRQS = ['NET_RX', 'NET_TX', 'BLOCK']
+
+# /proc/net/dev fields the host stats keep per interface
+HOST_NET_FIELDS = ['rx_bytes', 'rx_packets', 'rx_drop', 'tx_bytes', 'tx_packets', 'tx_drop']
+
+# /proc/meminfo fields the host stats keep
+HOST_MEM_FIELDS = ['MemTotal', 'MemAvailable', 'Dirty', 'Writeback']
+
+# /proc/diskstats fields the storage server stats keep per device, in kernel order
+HOST_DISK_FIELDS = ['reads', 'reads_merged', 'sectors_read', 'read_ms', 'writes', 'writes_merged', 'sectors_written',
+                    'write_ms', 'in_flight', 'io_ms', 'weighted_ms']
+
+# Columns of the per storage server and volume summary of a run
+SERVER_STATS_HEADERS = ['server', 'device', 'util_mean', 'util_max', 'read_mib_s', 'write_mib_s', 'iops', 'await_ms',
+                        'cpu_busy_mean', 'net_rx_gbps_mean', 'net_tx_gbps_mean']
+
+# Columns of the host stats time series
+HOST_SERIES_COLUMNS = ['timestamp', 'elapsed_s', 'in_fio_window', 'group', 'name', 'metric', 'value']
+
+# fio steady state criteria: iops or bw, as the maximum deviation from the mean or as the slope of the samples over the
+# steady state window, in absolute units or as a percentage of the mean
+STEADY_STATE_PATTERN = re.compile(r'^(iops|bw)(_slope)?:\d+(\.\d+)?%?$')
+
+# Magic bytes at the start of the binary columnar files written by write_columnar
+COLUMNAR_MAGIC = b'RFCOL1\n'
+
+# Default location of the multi-run results store
+RESULTS_STORE = './fio_results/results_store.col'
+
+# Columns of the results store. Text columns are dictionary encoded, all other columns are stored as float64 with NaN
+# for missing values. One row is written per run and I/O direction
+STORE_TEXT_COLUMNS = ['source', 'run', 'timestamp', 'test_name', 'engine', 'mode', 'template', 'rw', 'op', 'storage',
+                      'client_instance', 'server_instance']
+STORE_NUMERIC_COLUMNS = ['iteration', 'bs', 'iodepth', 'numjobs', 'num_testfiles', 'clients', 'lss', 'bw_bytes',
+                         'bw_gibs', 'iops', 'lat_mean_us', 'clat_p50_us', 'clat_p99_us', 'clat_p99.9_us', 'runtime_ms',
+                         'percentile_exact', 'ss_attained', 'valid']
+
+# Run directory names written by cloud_data_path_tests.sh, for example
+# 2025-10-23_18-33-21_small-intel-5clients-4lss_BW_JonBWRead_i1_b1m_nj2_qd1_n32
+RUN_DIR_PATTERN = re.compile(r'^(?P<timestamp>\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})(?:_(?P<test_name>.*?))??'
+                             r'(?:_(?P<mode>[A-Z]+)_(?P<template>[^_]+)_i(?P<iteration>\d+)_b(?P<bs>[^_]+)'
+                             r'_nj(?P<numjobs>\d+)_qd(?P<iodepth>\d+)_n(?P<num_testfiles>\d+))?$')
+
 # =====================================
 # Class Definitions
 # =====================================
@@ -249,6 +472,10 @@ class PerformanceResult:
         self.clat_ns = data['clat_ns']
         self.lat_ns = data['lat_ns']
         self.percentile = data['clat_ns']['percentile'] if 'percentile' in data['clat_ns'] else {}
+        # Latency histograms from json+ output, keyed by bucket latency in ns
+        self.clat_bins = {int(k): v for k, v in data['clat_ns'].get('bins', {}).items()}
+        self.lat_bins = {int(k): v for k, v in data['lat_ns'].get('bins', {}).items()}
+        self.percentile_exact = True
         self.bw_min = data['bw_min']
         self.bw_max = data['bw_max']
         self.bw_agg = data['bw_agg']
@@ -268,7 +495,8 @@ class PerformanceResult:
         self.io_bytes += other.io_bytes
         self.bw_bytes += other.bw_bytes
         self.iops += other.iops
-        self.runtime += (self.runtime + other.runtime) / 2
+        # Clients run side by side, so the combined run lasts as long as the longest one
+        self.runtime = max(self.runtime, other.runtime)
         self.total_ios += other.total_ios
         # TODO: straight addition here doesn't make sense... or does it
         self.bw_min += other.bw_min
@@ -283,19 +511,54 @@ class PerformanceResult:
         self.iops_stddev += other.iops_stddev
         self.iops_samples += other.iops_samples
 
-        # Assuming mean values should be averaged
-        for key in ['min', 'max', 'mean', 'stddev']:
-            self.slat_ns[key] = (self.slat_ns[key] + other.slat_ns[key]) / 2
-            self.clat_ns[key] = (self.clat_ns[key] + other.clat_ns[key]) / 2
-            self.lat_ns[key] = (self.lat_ns[key] + other.lat_ns[key]) / 2
-
-        # Summing up the percentiles (if there are percentiles in both instances)
-        if self.percentile and other.percentile:
-            for key in self.percentile.keys():
-                self.percentile[key] += other.percentile.get(key, 0)
+        self_samples, other_samples = self.clat_ns.get('N', 0), other.clat_ns.get('N', 0)
+
+        # Weight the latency statistics by the number of samples behind each side
+        self.slat_ns = merge_latency_stats(self.slat_ns, other.slat_ns)
+        self.clat_ns = merge_latency_stats(self.clat_ns, other.clat_ns)
+        self.lat_ns = merge_latency_stats(self.lat_ns, other.lat_ns)
+
+        if not other_samples:
+            pass
+        elif not self_samples:
+            self.clat_bins, self.lat_bins = dict(other.clat_bins), dict(other.lat_bins)
+            self.percentile = dict(other.percentile)
+            self.percentile_exact = other.percentile_exact
+        elif self.clat_bins and other.clat_bins:
+            # Histograms merge exactly, so the percentiles are recomputed from the combined counts
+            for bucket, count in other.clat_bins.items():
+                self.clat_bins[bucket] = self.clat_bins.get(bucket, 0) + count
+            for bucket, count in other.lat_bins.items():
+                self.lat_bins[bucket] = self.lat_bins.get(bucket, 0) + count
+            self.percentile = histogram_percentiles(self.clat_bins,
+                                                    sorted(set(map(float, self.percentile)) | set(REPORT_PERCENTILES)))
+        else:
+            # Without histograms percentiles cannot be combined, the worst client is an upper bound
+            self.clat_bins, self.lat_bins = {}, {}
+            self.percentile_exact = False
+            if self.percentile and other.percentile:
+                for key in self.percentile.keys():
+                    self.percentile[key] = max(self.percentile[key], other.percentile.get(key, 0))
+            else:
+                self.percentile = self.percentile or other.percentile
+        self.clat_ns['percentile'] = self.percentile
 
         return self
 
+    def get_percentile(self, percentile: float) -> typing.Optional[float]:
+        """
+        Returns a completion latency percentile in ns, computed from the histogram when one is available.
+
+        Args:
+            percentile (float): The percentile to look up, for example 99.9.
+
+        Returns:
+            Optional[float]: The latency in ns, or None if it is not available.
+        """
+        if self.clat_bins:
+            return histogram_percentiles(self.clat_bins, [percentile])[f'{percentile:.6f}']
+        return self.percentile.get(f'{percentile:.6f}')
+
 
 class FIOResult:
     def __init__(self, data: dict, index: int):
@@ -316,11 +579,27 @@ class FIOResult:
             if key not in excluded_keys:
                 setattr(self, key, value)
 
+        # Steady state results by client, present when the jobs ran with steadystate=
+        self.steady_states = {self.hostname: client_stat['steadystate']} if 'steadystate' in client_stat else {}
+        # host_stats_columns summaries by client and by storage server, added once the run is over
+        self.host_stats = {}
+        self.server_stats = {}
+        # When each client ran, from fio's job_start and job_runtime, and the client_timeline built from them
+        self.client_windows = {self.hostname: {key: client_stat[key] for key in ('job_start', 'job_runtime')
+                                               if key in client_stat}}
+        self.timeline = {}
+        # fio_log_timeline summary of the run, set once the logs of all clients have been merged
+        self.timeline_summary = []
+
     def __add__(self, other):
         if not isinstance(other, FIOResult):
             raise ValueError('Can only add two FIOResult instances')
 
         self.hostname += f', {other.hostname}'
+        self.steady_states.update(other.steady_states)
+        self.host_stats.update(other.host_stats)
+        self.server_stats.update(other.server_stats)
+        self.client_windows.update(other.client_windows)
         self.read_result += other.read_result
         self.write_result += other.write_result
         if self.trim_result and other.trim_result:
@@ -328,6 +607,32 @@ class FIOResult:
 
         return self
 
+    def bottleneck(self) -> str:
+        """
+        Sums up the host_bottleneck guesses of the clients for the run.
+
+        Returns:
+            str: For example "cpu on 3 of 4 clients", or a note that no client looked resource bound.
+        """
+        limits = [stats.get('bottleneck', 'none') for stats in self.host_stats.values()]
+        bound = {limit: limits.count(limit) for limit in limits if limit != 'none'}
+        if not bound:
+            return 'no client was CPU, NIC or memory bound, look at the storage side'
+        return ', '.join(f'{limit} on {count} of {len(limits)} clients'
+                         for limit, count in sorted(bound.items(), key=lambda item: -item[1]))
+
+    def steady_state_summary(self) -> str:
+        """
+        Describes how many clients reached steady state.
+
+        Returns:
+            str: For example "3/4", or an empty string if the run did not use steady state detection.
+        """
+        if not self.steady_states:
+            return ''
+        attained = sum(1 for state in self.steady_states.values() if state.get('attained'))
+        return f'{attained}/{len(self.steady_states)}'
+
     def __str__(self):
         lines = []
         lines.append(f"\n\n\n=== Test Details ===")
@@ -340,6 +645,9 @@ class FIOResult:
         lines.append(f"Block Size: {self.global_options['bs']}")
         lines.append(f"Number of Jobs: {self.global_options['numjobs']}")
         lines.append(f"I/O Depth: {self.global_options['iodepth']}")
+        if self.steady_states:
+            lines.append(f"Steady State: {self.steady_state_summary()} clients attained "
+                         f"{self.global_options.get('steadystate', '')}")
 
         lines.append(f"\n=== Performance Results ===")
         lines.append(f"{'':^13} | {'BW GiB/s':^10} | {'BW GB/s':^10} | {'IOPS':^12} | {'Lat (us)':^12}")
@@ -363,6 +671,66 @@ class FIOResult:
                          f"| {format(round(self.trim_result.iops_mean, 2), '.2f'):>12} "
                          f"| {format(round(self.trim_result.lat_ns['mean'] / 1000, 2), '.2f'):>12}")
 
+        lines.append(f"\n=== Completion Latency Percentiles ===")
+        lines.append(f"{'':^13} | " + ' | '.join(f"{f'p{p:g} (us)':^12}" for p in REPORT_PERCENTILES))
+        for label, result in (('Read:', self.read_result), ('Write:', self.write_result), ('Trim:', self.trim_result)):
+            if result and result.bw_mean != 0:
+                values = [result.get_percentile(p) for p in REPORT_PERCENTILES]
+                lines.append(f"{label:<13} | " + ' | '.join(
+                    f"{format(round(v / 1000, 2), '.2f') if v is not None else 'N/A':>12}" for v in values))
+        if any(result and not result.percentile_exact
+               for result in (self.read_result, self.write_result, self.trim_result)):
+            lines.append('Note: latency histograms were not available, percentiles show the worst client')
+
+        if self.timeline:
+            lines.append(f"\n=== Client Start Alignment ===")
+            lines.append(f"Start skew: {self.timeline['start_skew_s'] * 1000:.0f} ms, largest clock offset: "
+                         f"{max(abs(c['offset_s']) for c in self.timeline['clients'].values()) * 1000:.1f} ms")
+            lines.append(f"All clients running for: {self.timeline['window_s']:.1f}s")
+            if 'window_bw_bytes' in self.timeline:
+                lines.append(f"Aggregate while all clients ran: "
+                             f"{self.timeline['window_bw_bytes'] / (1024 ** 3):.2f} GiB/s, "
+                             f"{self.timeline['window_iops']:.0f} IOPS")
+
+        bandwidth = [row for row in self.timeline_summary if row['metric'] == 'bw_bytes' and row['full_buckets']]
+        if bandwidth:
+            lines.append(f"\n=== Cluster Bandwidth Timeline ===")
+            for row in bandwidth:
+                lines.append(f"{row['op'].capitalize()}: {row['cluster_mean'] / (1024 ** 3):.2f} GiB/s mean, "
+                             f"{row['cluster_min'] / (1024 ** 3):.2f} to {row['cluster_max'] / (1024 ** 3):.2f} GiB/s "
+                             f"over {row['full_buckets']} of {row['buckets']} buckets with all {row['clients']} "
+                             f"clients running, {row['cluster_cov_pct']:.1f}% variation, clients "
+                             f"{row['client_spread_pct']:.1f}% apart")
+
+        if self.host_stats:
+            lines.append(f"\n=== Client Resources ===")
+            lines.append(f"{'Client':<16} | {'CPU %':^11} | {'Hot core %':^10} | {'softirq %':^9} | {'iowait %':^8} | "
+                         f"{'NIC Gbit/s':^13} | {'PSI cpu/io':^11} | Limit")
+            for host, stats in sorted(self.host_stats.items()):
+                lines.append(f"{host:<16} | {stats['cpu_busy_mean']:>5.1f}/{stats['cpu_busy_max']:<5.1f} "
+                             f"| {stats['hottest_core_busy']:>10.1f} | {stats['hottest_core_softirq']:>9.1f} "
+                             f"| {stats['cpu_iowait_mean']:>8.1f} "
+                             f"| {stats['net_rx_gbps_max']:>6.2f}/{stats['net_tx_gbps_max']:<6.2f} "
+                             f"| {stats['psi_cpu_some']:>5.1f}/{stats['psi_io_some']:<5.1f} | {stats['bottleneck']}")
+            lines.append(f"Bottleneck: {self.bottleneck()}")
+
+        if self.server_stats:
+            lines.append(f"\n=== Storage Servers ===")
+            lines.append(f"{'Server':<16} | {'CPU %':^11} | {'NIC Gbit/s':^13} | {'Disk MiB/s':^10} | "
+                         f"{'Volumes':^7} | Busiest volume")
+            for host, stats in sorted(self.server_stats.items()):
+                disks = {device: disk for device, disk in stats.get('disks', {}).items() if not disk['virtual']}
+                busiest = max(disks.items(), key=lambda item: item[1]['util_mean'], default=('N/A', {'util_mean': 0}))
+                lines.append(f"{host:<16} | {stats['cpu_busy_mean']:>5.1f}/{stats['cpu_busy_max']:<5.1f} "
+                             f"| {stats['net_rx_gbps_max']:>6.2f}/{stats['net_tx_gbps_max']:<6.2f} "
+                             f"| {stats.get('disk_mib_s', 0.0):>10.1f} | {len(disks):>7} "
+                             f"| {busiest[0]} {busiest[1]['util_mean']:.1f}%")
+            imbalance = server_imbalance(self.server_stats)
+            if imbalance:
+                lines.append(f"Imbalance: busiest server {imbalance['busiest_server']} moved "
+                             f"{imbalance['disk_imbalance']:.2f}x the mean disk throughput, hottest volume "
+                             f"{imbalance['hottest_volume']} at {imbalance['hottest_volume_util']:.1f}% utilisation")
+
         lines.append(f"\n")
         return "\n".join(lines)
 
@@ -370,11 +738,619 @@ class FIOResult:
         return self.__str__()
 
 
+class FioJsonStream:
+    """
+    Incremental parser for fio's JSON output. Text is fed in chunks as it arrives from the fio process. The elements of
+    every top level array, such as client_stats, are parsed one at a time and handed to on_element, so the full output
+    never has to be held as a single string. Everything outside those arrays forms a small document skeleton that is
+    handed to on_document once the document closes. Any text before the first line starting with '{', such as fio's
+    client connection messages, is ignored.
+
+    If raw_out is given, the JSON documents are written to it as they are parsed, without the surrounding text.
+    """
+    TOKENS = re.compile(r'["\\{}\[\]]')
+    KEY_BEFORE_ARRAY = re.compile(r'"((?:[^"\\]|\\.)*)"\s*:\s*\[$')
+
+    def __init__(self, on_element: typing.Optional[typing.Callable] = None,
+                 on_document: typing.Optional[typing.Callable] = None, raw_out: typing.Optional[typing.TextIO] = None):
+        self.on_element = on_element
+        self.on_document = on_document
+        self.raw_out = raw_out
+        self.documents = 0
+        self._reset()
+        self.line_start = True
+
+    def _reset(self) -> None:
+        self.in_document = False
+        self.stack = []
+        self.in_string = False
+        self.skip_index = -1
+        self.mode = 'skeleton'
+        self.skeleton = []
+        self.element = []
+        self.header = None
+        self.array_key = None
+        self.array_index = 0
+
+    def feed(self, chunk: str) -> None:
+        """
+        Parses the next chunk of fio output.
+
+        Args:
+            chunk (str): The next piece of text read from fio.
+
+        Returns:
+            None
+        """
+        pos = 0
+        while pos < len(chunk):
+            if not self.in_document:
+                if self.line_start and chunk[pos] == '{':
+                    start = pos
+                else:
+                    start = chunk.find('\n{', pos)
+                    if start == -1:
+                        self.line_start = chunk.endswith('\n')
+                        return
+                    start += 1
+                self.in_document = True
+                pos = start
+            pos = self._scan(chunk, pos)
+
+    def _scan(self, chunk: str, pos: int) -> int:
+        segment = pos
+        raw_start = pos
+        for match in self.TOKENS.finditer(chunk, pos):
+            index = match.start()
+            token = match.group()
+            if index == self.skip_index:
+                continue
+            if self.in_string:
+                if token == '\\':
+                    self.skip_index = index + 1
+                elif token == '"':
+                    self.in_string = False
+                continue
+            if token == '"':
+                self.in_string = True
+            elif token in '{[':
+                if token == '[' and self.stack == ['{'] and self.mode == 'skeleton':
+                    # A top level array opens. The skeleton up to here closes into the document header
+                    self.skeleton.append(chunk[segment:index + 1])
+                    skeleton = ''.join(self.skeleton)
+                    self.header = json.loads(skeleton + ']}')
+                    key = self.KEY_BEFORE_ARRAY.search(skeleton)
+                    self.array_key = key.group(1) if key else ''
+                    self.array_index = 0
+                    self.mode = 'array'
+                    segment = index + 1
+                elif token == '{' and self.stack == ['{', '['] and self.mode == 'array':
+                    self.mode = 'element'
+                    segment = index
+                self.stack.append(token)
+            else:
+                self.stack.pop()
+                if token == '}' and self.stack == ['{', '['] and self.mode == 'element':
+                    self.element.append(chunk[segment:index + 1])
+                    element = json.loads(''.join(self.element))
+                    self.element = []
+                    if self.on_element:
+                        self.on_element(self.header, self.array_key, self.array_index, element)
+                    self.array_index += 1
+                    self.mode = 'array'
+                    segment = index + 1
+                elif token == ']' and self.stack == ['{'] and self.mode == 'array':
+                    self.mode = 'skeleton'
+                    segment = index
+                elif not self.stack:
+                    self.skeleton.append(chunk[segment:index + 1])
+                    if self.raw_out:
+                        self.raw_out.write(chunk[raw_start:index + 1] + '\n')
+                    document = json.loads(''.join(self.skeleton))
+                    self.documents += 1
+                    self._reset()
+                    self.line_start = False
+                    if self.on_document:
+                        self.on_document(document)
+                    return index + 1
+
+        if self.skip_index >= len(chunk):
+            self.skip_index -= len(chunk)
+        else:
+            self.skip_index = -1
+        if self.mode == 'skeleton':
+            self.skeleton.append(chunk[segment:])
+        elif self.mode == 'element':
+            self.element.append(chunk[segment:])
+        if self.raw_out:
+            self.raw_out.write(chunk[raw_start:])
+        self.line_start = chunk.endswith('\n')
+        return len(chunk)
+
+
+class FioCsvWriter:
+    """
+    Writes fio output as the same single row CSV that json_to_csv produces, one piece at a time. Header and value
+    fragments are spooled to temporary files as each part of the document is parsed and joined when the writer is
+    closed, so the flattened output for every client never has to be kept in memory together.
+    """
+    def __init__(self):
+        self.header_file = tempfile.TemporaryFile(mode='w+', newline='')
+        self.value_file = tempfile.TemporaryFile(mode='w+', newline='')
+        self.empty = True
+
+    @staticmethod
+    def _fragment(values: typing.Iterable) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(values)
+        return buffer.getvalue().rstrip('\r\n')
+
+    def add(self, data: typing.Union[dict, list], prefix: str = '') -> None:
+        """
+        Flattens data and appends its keys and values to the row.
+
+        Args:
+            data (Union[dict, list]): The part of the fio document to add.
+            prefix (str): Prefix added to every flattened key, for example 'client_stats_0_'.
+
+        Returns:
+            None
+        """
+        flat = {key: value for key, value in flatten_json(data).items() if not FIO_CSV_EXCLUDED_KEYS.search(key)}
+        if not flat:
+            return
+        separator = '' if self.empty else ','
+        self.header_file.write(separator + self._fragment(f'{prefix}{key}' for key in flat.keys()))
+        self.value_file.write(separator + self._fragment(flat.values()))
+        self.empty = False
+
+    def close(self, out_csv: typing.Optional[str]) -> None:
+        """
+        Joins the spooled fragments into out_csv and removes the temporary files.
+
+        Args:
+            out_csv (Optional[str]): The filename of the CSV file to write, or None to discard the row.
+
+        Returns:
+            None
+        """
+        if out_csv:
+            with open(out_csv, 'w', newline='') as file:
+                for spool in (self.header_file, self.value_file):
+                    spool.seek(0)
+                    shutil.copyfileobj(spool, file)
+                    file.write('\r\n')
+        self.header_file.close()
+        self.value_file.close()
+
+
+class FioResultCollector:
+    """
+    Consumes the events of a FioJsonStream for one fio run. The CSV row is spooled through a FioCsvWriter and every
+    client_stats entry is turned into a FIOResult and added to the running total straight away, so no per client data
+    is kept once it has been accounted for.
+
+    When fio runs with --status-interval it prints a cumulative document every interval before the final one. The
+    collector starts over with each new document, so once the stream ends it holds the final results only.
+    """
+    def __init__(self):
+        self._reset()
+
+    def _reset(self) -> None:
+        self.csv_writer = FioCsvWriter()
+        self.total: typing.Optional[FIOResult] = None
+        self.header_keys: typing.Optional[set] = None
+        self.document_done = False
+
+    def on_element(self, header: dict, array_key: str, index: int, element: dict) -> None:
+        if self.document_done:
+            self.csv_writer.close(None)
+            self._reset()
+        if self.header_keys is None:
+            self.header_keys = set(header)
+            self.csv_writer.add(header)
+        self.csv_writer.add(element, f'{array_key}_{index}_')
+        # fio's own aggregate of all clients would count every client twice
+        if array_key == 'client_stats' and element.get('jobname') != 'All clients':
+            fio_result = FIOResult(dict(header, client_stats=[element]), 0)
+            self.total = fio_result if self.total is None else self.total + fio_result
+
+    def on_document(self, document: dict) -> None:
+        # Keys after the last top level array have not been written yet
+        header_keys = self.header_keys if self.header_keys is not None else set()
+        self.csv_writer.add({key: value for key, value in document.items()
+                             if key not in header_keys and value != []})
+        self.document_done = True
+
+    def close(self, out_csv: typing.Optional[str]) -> None:
+        self.csv_writer.close(out_csv)
+
+
+class FioLiveMonitor:
+    """
+    Turns the cumulative status documents fio prints with --status-interval into live per client bandwidth, IOPS and
+    latency. Each client's counters are differenced against its previous sample. After every document the aggregate is
+    logged, and any client whose bandwidth is below straggler_fraction of the cluster median is flagged. Samples are
+    appended to out_csv as they are computed.
+    """
+    CSV_HEADERS = ['timestamp', 'elapsed_s', 'hostname', 'bw_bytes', 'iops', 'lat_us', 'straggler']
+
+    def __init__(self, straggler_fraction: float, out_csv: str):
+        self.straggler_fraction = straggler_fraction
+        self.start_time = time.time()
+        self.previous = {}
+        self.current = {}
+        # Host mapped to its cumulative (time, io_bytes, total_ios) samples, for client_timeline
+        self.history = {}
+        self.csv_file = open(out_csv, 'w', newline='')
+        self.writer = csv.writer(self.csv_file)
+        self.writer.writerow(self.CSV_HEADERS)
+
+    def on_element(self, header: dict, array_key: str, index: int, element: dict) -> None:
+        if array_key != 'client_stats' or element.get('jobname') == 'All clients':
+            return
+        host = element.get('hostname') or f'client{index}'
+        io_bytes, total_ios, lat_sum = 0, 0, 0.0
+        for direction in ('read', 'write', 'trim'):
+            stats = element.get(direction)
+            if not stats:
+                continue
+            io_bytes += stats.get('io_bytes', 0)
+            total_ios += stats.get('total_ios', 0)
+            lat_sum += stats.get('lat_ns', {}).get('mean', 0) * stats.get('total_ios', 0)
+        sample = (time.time(), io_bytes, total_ios, lat_sum)
+        self.history.setdefault(host, []).append(sample[:3])
+        previous = self.previous.get(host)
+        self.previous[host] = sample
+        if previous is None or sample[0] <= previous[0]:
+            return
+        elapsed = sample[0] - previous[0]
+        ios = sample[2] - previous[2]
+        self.current[host] = ((sample[1] - previous[1]) / elapsed, ios / elapsed,
+                              (sample[3] - previous[3]) / ios / 1000 if ios > 0 else 0.0)
+
+    def on_document(self, document: dict) -> None:
+        if not self.current:
+            return
+        now = time.time()
+        bandwidths = sorted(bw for bw, _, _ in self.current.values())
+        median_bw = bandwidths[len(bandwidths) // 2] if len(bandwidths) % 2 else \
+            (bandwidths[len(bandwidths) // 2 - 1] + bandwidths[len(bandwidths) // 2]) / 2
+        total_bw = sum(bandwidths)
+        total_iops = sum(iops for _, iops, _ in self.current.values())
+        weighted_lat = sum(iops * lat for _, iops, lat in self.current.values())
+        logger.info(f'Live [{now - self.start_time:6.1f}s] {len(self.current)} clients: '
+                    f'{total_bw / (1000 ** 3):.2f} GB/s, {total_iops:.0f} IOPS, '
+                    f'{weighted_lat / total_iops if total_iops else 0:.1f} us')
+        for host, (bw, iops, lat) in sorted(self.current.items()):
+            straggler = median_bw > 0 and bw < self.straggler_fraction * median_bw
+            logger.debug(f'Live {host}: {bw / (1000 ** 3):.2f} GB/s, {iops:.0f} IOPS, {lat:.1f} us')
+            if straggler:
+                logger.warning(f'Client {host} is running at {bw / (1000 ** 3):.2f} GB/s, below '
+                               f'{self.straggler_fraction:.0%} of the cluster median '
+                               f'{median_bw / (1000 ** 3):.2f} GB/s')
+            self.writer.writerow([round(now, 3), round(now - self.start_time, 3), host, round(bw), round(iops, 2),
+                                  round(lat, 2), int(straggler)])
+        self.csv_file.flush()
+        self.current = {}
+
+    def close(self) -> None:
+        self.csv_file.close()
+
+
+class CounterSampler:
+    """
+    Samples a set of kernel counters on a background thread, such as those of /proc/self/mountstats. read returns a
+    dict of keys to lists of integers, and every sample is stored as those raw values in arrays that are allocated
+    once per key and used as a ring buffer, so sampling does no parsing beyond what read does and the memory held does
+    not grow with the run. Each sample still builds the dict read returns and a short lived array per key. If a run
+    outlasts the buffer the oldest samples are overwritten. Rates and averages are worked out from the samples once
+    sampling has stopped.
+    """
+    def __init__(self, read: typing.Callable[[], dict], interval: float, capacity: int):
+        self.read = read
+        self.interval = interval
+        self.capacity = capacity
+        self.times = array.array('d', bytes(8 * capacity))
+        # Key mapped to capacity rows of its values, and the first sample it appeared in
+        self.series = {}
+        self.first_sample = {}
+        self.count = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self.sample()
+        self.thread.start()
+
+    def _run(self) -> None:
+        next_time = time.monotonic() + self.interval
+        while not self.stop_event.wait(max(0.0, next_time - time.monotonic())):
+            self.sample()
+            next_time += self.interval
+
+    def sample(self) -> None:
+        counters = self.read()
+        slot = self.count % self.capacity
+        self.times[slot] = time.time()
+        for key, values in counters.items():
+            width = len(values)
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = array.array('Q', bytes(8 * width * self.capacity))
+                self.first_sample[key] = self.count
+            series[slot * width:(slot + 1) * width] = array.array('Q', values)
+        self.count += 1
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        self.thread.join(timeout=10)
+
+    def intervals(self) -> typing.Iterator[tuple]:
+        """
+        Yields every key's values at the start and end of each interval between consecutive samples still held in the
+        buffer.
+
+        Returns:
+            Iterator[tuple]: (start time, end time, key, values at the start, values at the end).
+        """
+        first = max(0, self.count - self.capacity)
+        for index in range(first + 1, self.count):
+            previous, current = (index - 1) % self.capacity, index % self.capacity
+            for key, series in self.series.items():
+                if self.first_sample[key] > index - 1:
+                    continue
+                width = len(series) // self.capacity
+                yield (self.times[previous], self.times[current], key,
+                       series[previous * width:(previous + 1) * width], series[current * width:(current + 1) * width])
+
+
 # =====================================
 # FUNCTION DEFINITIONS
 # =====================================
 
 
+class IO500Result:
+    """
+    The results of one IO500 run, read from any of the files the run left behind: the result.txt and
+    result_summary.txt of its result directory, the IOR JSON summaries and mdtest outputs of its phases and the
+    console log that run-io500.sh tees. Files are handed to feed one at a time, in any order, so a run can be read
+    straight out of a tarball stream. What one file lacks, such as the process count that only the IOR summaries hold,
+    is filled in from the others.
+    """
+    # Console log names written by run-io500.sh, for example 4-clients-64_threads-small-4lss-300s
+    LOG_NAME_PATTERN = re.compile(r'^(?P<clients>\d+)-clients-(?P<tasks>\d+)_threads-.*-(?P<stonewall>\d+)s$')
+    # Files of an IO500 result directory that are read. mdtest has no JSON summary, its phases keep their output
+    RESULT_FILE_PATTERN = re.compile(r'^(result\.txt|result_summary\.txt|ior-.*\.json|mdtest-.*\.txt)$')
+    # The mdtest summary operation that each mdtest phase is scored by
+    MDTEST_PHASE_OPERATIONS = {'write': 'file_creation', 'stat': 'file_stat', 'read': 'file_read',
+                               'delete': 'file_removal'}
+    RESULT_PATTERN = re.compile(r'^\[RESULT\]\s+(?P<phase>\S+)\s+(?P<score>[\d.]+)\s+(?P<unit>\S+)\s*:\s*time\s+'
+                                r'(?P<time>[\d.]+)\s+seconds(?P<rest>.*)$', re.M)
+    SCORE_PATTERN = re.compile(r'^\[SCORE ?\]\s+Bandwidth\s+(?P<bw>[\d.]+)\s+GiB/s\s*:\s*IOPS\s+(?P<md>[\d.]+)\s+'
+                               r'kiops\s*:\s*TOTAL\s+(?P<total>[\d.]+)(?P<rest>.*)$', re.M)
+
+    def __init__(self, name: str = ''):
+        self.name = name
+        self.version = ''
+        self.clients: typing.Optional[int] = None
+        self.tasks: typing.Optional[int] = None
+        self.stonewall_s: typing.Optional[int] = None
+        # Phase name mapped to 'score' in GiB/s or kIOPS, 'unit', 'time_s', 'valid' and, from IOR summaries,
+        # 'transfer_size'
+        self.phases = {}
+        self.score = {}
+
+        match = self.LOG_NAME_PATTERN.match(name)
+        if match:
+            self.clients, self.tasks, self.stonewall_s = (int(value) for value in match.groups())
+
+    def feed(self, filename: str, text: str) -> None:
+        """
+        Reads one file of the run. Files that are not recognized are ignored.
+
+        Args:
+            filename (str): Name of the file, which tells its format.
+            text (str): Contents of the file.
+
+        Returns:
+            None
+        """
+        base = os.path.basename(filename)
+        if base.endswith('.json'):
+            self._feed_ior_json(os.path.splitext(base)[0], text)
+        elif base.startswith('mdtest-') and base.endswith('.txt'):
+            self._feed_mdtest_output(os.path.splitext(base)[0], text)
+        elif base == 'result.txt':
+            self._feed_result_ini(text)
+        else:
+            self._feed_summary(text)
+
+    def _phase(self, phase: str) -> dict:
+        return self.phases.setdefault(phase, {'score': None, 'unit': 'GiB/s' if phase.startswith('ior') else 'kIOPS',
+                                              'time_s': None, 'valid': True})
+
+    def _feed_summary(self, text: str) -> None:
+        version = re.search(r'^IO500 version (\S+)', text, re.M)
+        if version:
+            self.version = version.group(1)
+        for match in self.RESULT_PATTERN.finditer(text):
+            phase = self._phase(match.group('phase'))
+            phase.update({'score': float(match.group('score')), 'unit': match.group('unit'),
+                          'time_s': float(match.group('time')), 'valid': 'INVALID' not in match.group('rest')})
+        match = self.SCORE_PATTERN.search(text)
+        if match:
+            self.score = {'bw_gibs': float(match.group('bw')), 'md_kiops': float(match.group('md')),
+                          'total': float(match.group('total')), 'valid': 'INVALID' not in match.group('rest')}
+
+    def _feed_result_ini(self, text: str) -> None:
+        section = None
+        for line in text.splitlines():
+            line = line.split(';', 1)[0].strip()
+            if line.startswith('[') and line.endswith(']'):
+                section = line[1:-1].strip()
+                continue
+            key, sep, value = (part.strip() for part in line.partition('='))
+            if not sep:
+                continue
+            if section is None and key == 'version':
+                self.version = self.version or value.split()[0]
+            elif section == 'SCORE':
+                names = {'BW': 'bw_gibs', 'MD': 'md_kiops', 'SCORE': 'total'}
+                if key in names:
+                    self.score.setdefault(names[key], float(value))
+            elif section:
+                phase = self._phase(section)
+                if key == 'score' and phase['score'] is None:
+                    phase['score'] = float(value)
+                elif key == 't_delta' and phase['time_s'] is None:
+                    phase['time_s'] = float(value)
+                elif key == 'exe' and self.stonewall_s is None:
+                    stonewall = re.search(r'\s-[DW]\s+(\d+)', value)
+                    if stonewall:
+                        self.stonewall_s = int(stonewall.group(1))
+
+    def _feed_ior_json(self, phase_name: str, text: str) -> None:
+        try:
+            document = json.loads(text)
+        except ValueError:
+            return
+        for test in document.get('tests', []):
+            parameters = test.get('Parameters', {})
+            self.clients = self.clients or parameters.get('nodes')
+            if self.stonewall_s is None and parameters.get('deadlineForStonewall'):
+                self.stonewall_s = parameters['deadlineForStonewall']
+        for summary in document.get('summary', []):
+            self.tasks = self.tasks or summary.get('numTasks')
+            self._phase(phase_name)['transfer_size'] = summary.get('transferSize')
+
+    def _feed_mdtest_output(self, phase_name: str, text: str) -> None:
+        launched = re.search(r'launched with (\d+) total task\(s\) on (\d+) node', text)
+        if launched:
+            self.tasks = self.tasks or int(launched.group(1))
+            self.clients = self.clients or int(launched.group(2))
+        operation = self.MDTEST_PHASE_OPERATIONS.get(phase_name.rsplit('-', 1)[-1])
+        for row in parse_mdtest_output(text, 0, 0):
+            if row['phase'] != operation:
+                continue
+            phase = self._phase(phase_name)
+            if phase['score'] is None:
+                phase['score'] = row['iops'] / 1000
+            if phase['time_s'] is None and row['time_s'] != '':
+                phase['time_s'] = row['time_s']
+
+    def rows(self) -> list:
+        """
+        Turns the run into the rows every benchmark engine shares.
+
+        Returns:
+            list: One row keyed by ENGINE_RESULT_HEADERS for every phase with a score, then one for the IO500 score
+            with the bandwidth score in bw_bytes and the metadata score in iops.
+        """
+        rows = []
+        for name, phase in self.phases.items():
+            if phase['score'] is None:
+                continue
+            bandwidth = phase['unit'].lower() == 'gib/s'
+            rows.append({'engine': 'io500', 'phase': name,
+                         'op': ('write' if 'write' in name else 'read') if bandwidth else 'meta',
+                         'bw_bytes': round(phase['score'] * 1024 ** 3) if bandwidth else '',
+                         'iops': '' if bandwidth else round(phase['score'] * 1000, 2),
+                         'time_s': phase['time_s'] if phase['time_s'] is not None else '',
+                         'tasks': self.tasks or '', 'clients': self.clients or '',
+                         'bs': phase.get('transfer_size') or '', 'valid': int(phase['valid'])})
+        if self.score:
+            rows.append({'engine': 'io500', 'phase': 'score', 'op': 'score',
+                         'bw_bytes': round(self.score.get('bw_gibs', 0) * 1024 ** 3),
+                         'iops': round(self.score.get('md_kiops', 0) * 1000, 2), 'time_s': '',
+                         'tasks': self.tasks or '', 'clients': self.clients or '', 'bs': '',
+                         'valid': int(self.score.get('valid', True) and all(row['valid'] for row in rows))})
+        return rows
+
+    def to_json(self) -> dict:
+        """
+        Summarizes the run as JSON.
+
+        Returns:
+            dict: The run in the layout io500-json.sh used to write, so existing consumers keep working.
+        """
+        return {
+            'IO500_Version': self.version,
+            'Client_Count': str(self.clients or ''),
+            'Total_Threads': str(self.tasks or ''),
+            'Stonewall_Seconds': str(self.stonewall_s or ''),
+            'Benchmarks': {f'Benchmark-{name}': {'Name': name, 'Score': str(phase['score']), 'Units': phase['unit'],
+                                                 'Seconds': str(phase['time_s']), 'Valid': phase['valid']}
+                           for name, phase in self.phases.items() if phase['score'] is not None},
+            'IO500_Score': str(self.score.get('total', '')),
+            'Score_Bandwith': str(self.score.get('bw_gibs', '')),
+            'Score_IOPs': str(self.score.get('md_kiops', '')),
+        }
+
+
+def merge_latency_stats(first: dict, second: dict) -> dict:
+    """
+    Combines two fio latency stat blocks (min, max, mean, stddev, N) as if their samples had been collected together.
+    The mean is weighted by the sample count of each side and the standard deviation is pooled from both sides'
+    second moments.
+
+    Args:
+        first (dict): A latency stat block such as clat_ns.
+        second (dict): The latency stat block to merge into first.
+
+    Returns:
+        dict: The merged stat block. Keys other than the summary statistics are kept from first.
+    """
+    first_n, second_n = first.get('N', 0), second.get('N', 0)
+    if not second_n:
+        return first
+    if not first_n:
+        return dict(second)
+
+    total = first_n + second_n
+    mean = (first['mean'] * first_n + second['mean'] * second_n) / total
+    second_moment = (first_n * (first['stddev'] ** 2 + first['mean'] ** 2) +
+                     second_n * (second['stddev'] ** 2 + second['mean'] ** 2)) / total
+
+    merged = dict(first)
+    merged.update({
+        'min': min(first['min'], second['min']),
+        'max': max(first['max'], second['max']),
+        'mean': mean,
+        'stddev': math.sqrt(max(second_moment - mean ** 2, 0.0)),
+        'N': total,
+    })
+    return merged
+
+
+def histogram_percentiles(bins: dict, percentiles: typing.Iterable[float]) -> dict:
+    """
+    Computes percentiles from a fio latency histogram. The value for each percentile is the smallest bucket at which
+    the cumulative count reaches that percentage of all samples.
+
+    Args:
+        bins (dict): Sample counts keyed by bucket latency in ns.
+        percentiles (Iterable[float]): The percentiles to compute, for example [50.0, 99.0, 99.9].
+
+    Returns:
+        dict: The latency for each percentile keyed in fio's format, for example '99.900000'.
+    """
+    buckets = sorted(bins.items())
+    total = sum(count for _, count in buckets)
+    result = {}
+    for percentile in sorted(percentiles):
+        threshold = max(1, math.ceil(total * percentile / 100))
+        cumulative = 0
+        value = buckets[-1][0] if buckets else 0
+        for bucket, count in buckets:
+            cumulative += count
+            if cumulative >= threshold:
+                value = bucket
+                break
+        result[f'{percentile:.6f}'] = value
+    return result
+
+
 def print_templates_information():
     for template_name, settings in TEMPLATES.items():
         print(f"Template name: {template_name}")
@@ -421,10 +1397,106 @@ def cleanup(args: argparse.Namespace) -> None:
     Returns:
         None
     """
-    for ip in args.ips:
+    def stop_client(ip: str) -> None:
         command = 'pkill fio'
-        sender(ip, 5000, f'run_command_and_go, {command}', True, True)
-        sender(ip, 5000, f'quit', True, True)
+        sender(ip, 5000, 'run_command_and_go', [command], True, True, 30)
+        sender(ip, 5000, 'quit', [], True, True, 30)
+
+    fan_out(args.ips or [], stop_client, 'Cleanup', timeout=60)
+    # Storage servers only run the agent
+    fan_out(getattr(args, 'server_ips', None) or [], lambda ip: sender(ip, 5000, 'quit', [], True, True, 30),
+            'Server cleanup', timeout=60)
+
+
+def drop_caches(wait_dirty: bool = False, timeout: float = 120.0, proc: str = '/proc') -> dict:
+    """
+    Flushes dirty data and drops the page cache, dentries and inodes so the next test point reads from storage.
+
+    drop_caches only frees clean pages, so the data is synced first. With wait_dirty the function then waits, up to
+    timeout seconds, until /proc/meminfo shows no Dirty or Writeback pages, which on NFS clients means the writes of
+    the previous point have reached the servers.
+
+    Args:
+        wait_dirty (bool): Wait for Dirty and Writeback to reach zero before dropping.
+        timeout (float): Most seconds to wait for them.
+        proc (str): Where procfs is mounted.
+
+    Returns:
+        dict: 'dropped' whether the caches were dropped, 'error' why not, 'drained' whether dirty pages reached zero
+        (None when not waited for), 'dirty_kb' the Dirty plus Writeback left, 'wait_s' the time spent waiting and
+        'elapsed_s' the time the whole barrier took.
+    """
+    start = time.monotonic()
+    os.sync()
+
+    def dirty_kb() -> int:
+        with open(os.path.join(proc, 'meminfo')) as file:
+            meminfo = dict(line.split(':', 1) for line in file)
+        return sum(int(meminfo.get(name, '0 kB').split()[0]) for name in ('Dirty', 'Writeback'))
+
+    result = {'dropped': False, 'error': '', 'drained': None, 'dirty_kb': dirty_kb(), 'wait_s': 0.0}
+    if wait_dirty:
+        wait_start = time.monotonic()
+        while result['dirty_kb'] and time.monotonic() - wait_start < timeout:
+            time.sleep(0.2)
+            # Pages dirtied since the first sync, for example by a late close, need another push
+            os.sync()
+            result['dirty_kb'] = dirty_kb()
+        result['drained'] = result['dirty_kb'] == 0
+        result['wait_s'] = round(time.monotonic() - wait_start, 3)
+
+    try:
+        with open(os.path.join(proc, 'sys/vm/drop_caches'), 'w') as file:
+            file.write('3\n')
+        result['dropped'] = True
+    except OSError as e:
+        result['error'] = str(e)
+        print(f'Error: Could not drop caches: {e}')
+    result['elapsed_s'] = round(time.monotonic() - start, 3)
+    return result
+
+
+def cache_drop_barrier(ips: typing.Sequence[str], wait_dirty: bool, timeout: float, output_file: str) -> bool:
+    """
+    Drops the caches of the given clients and storage servers at once through their agents and waits for every one of
+    them, so the next test point starts cold everywhere. The outcome of every host is logged and written to output_file.
+
+    Args:
+        ips (Sequence[str]): The hosts to drop caches on.
+        wait_dirty (bool): Have every host wait for its dirty pages to drain first.
+        timeout (float): Most seconds a host waits for its dirty pages.
+        output_file (str): JSON file the results are written to.
+
+    Returns:
+        bool: True if every host dropped its caches and, when waited for, drained its dirty pages.
+    """
+    start = time.monotonic()
+    results = fan_out(ips, lambda ip_inner: call_agent(ip_inner, 'drop_caches', [wait_dirty, timeout],
+                                                       timeout=timeout + 60),
+                      'Cache drop', timeout=timeout + 90)
+    elapsed = time.monotonic() - start
+
+    complete = True
+    for ip, result in sorted(results.items()):
+        if not result.ok:
+            logger.warning(f'Cache drop failed on "{ip}": {result.error}')
+            complete = False
+        elif not result.value['dropped']:
+            logger.warning(f'Could not drop caches on "{ip}": {result.value["error"]}')
+            complete = False
+        elif result.value['drained'] is False:
+            logger.warning(f'"{ip}" still had {result.value["dirty_kb"]} kB dirty or under writeback after '
+                           f'{result.value["wait_s"]:.1f}s')
+            complete = False
+    slowest = max(results.values(), key=lambda result: result.value['elapsed_s'] if result.ok else 0, default=None)
+    logger.info(f'Cache drop barrier on {len(ips)} hosts took {elapsed:.1f}s'
+                + (f', slowest "{slowest.host}" {slowest.value["elapsed_s"]:.1f}s' if slowest and slowest.ok else ''))
+
+    with open(output_file, 'w') as file:
+        json.dump({'elapsed_s': round(elapsed, 3), 'wait_dirty': wait_dirty, 'timeout_s': timeout,
+                   'hosts': {ip: result.value if result.ok else {'error': result.error}
+                             for ip, result in results.items()}}, file, indent=2)
+    return complete
 
 
 def create_tarfile(source_dir: str) -> None:
@@ -447,10 +1519,136 @@ def create_tarfile(source_dir: str) -> None:
         tar.add(source_dir, arcname=os.path.basename(source_dir))
 
 
+def send_frame(sock: socket.socket, message: dict) -> None:
+    """
+    Sends one message of the agent protocol. A message is a JSON object preceded by its length as a 4 byte big endian
+    integer, so responses of any size arrive whole.
+
+    Args:
+        sock (socket.socket): The connected socket.
+        message (dict): The message to send. It must be JSON serializable.
+
+    Returns:
+        None
+    """
+    payload = json.dumps(message, default=str).encode('utf-8')
+    sock.sendall(struct.pack('>I', len(payload)) + payload)
+
+
+def recv_frame(sock: socket.socket) -> typing.Optional[dict]:
+    """
+    Receives one message of the agent protocol sent by send_frame.
+
+    Args:
+        sock (socket.socket): The connected socket.
+
+    Returns:
+        Optional[dict]: The message, or None if the connection was closed.
+    """
+    def recv_exact(size: int) -> typing.Optional[bytes]:
+        chunks = []
+        while size:
+            chunk = sock.recv(min(size, 1024 * 1024))
+            if not chunk:
+                return None
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+    header = recv_exact(4)
+    if header is None:
+        return None
+    length, = struct.unpack('>I', header)
+    if length > AGENT_MAX_FRAME:
+        raise ValueError(f'Agent message of {length} bytes exceeds the {AGENT_MAX_FRAME} byte limit')
+    payload = recv_exact(length)
+    if payload is None:
+        return None
+    return json.loads(payload.decode('utf-8'))
+
+
+def agent_status() -> dict:
+    """
+    Health check for the agent. Also used to confirm that a freshly launched agent speaks the current protocol.
+
+    Returns:
+        dict: The agent's hostname, process id, clock and number of running threads.
+    """
+    return {'hostname': socket.gethostname(), 'pid': os.getpid(), 'time': time.time(),
+            'threads': threading.active_count()}
+
+
+def handle_agent_request(request: dict) -> dict:
+    """
+    Runs one request received by the agent and builds its response. Only the functions listed in AGENT_COMMANDS can be
+    called.
+
+    Args:
+        request (dict): The request with 'id', 'command' and 'args'.
+
+    Returns:
+        dict: The response with the request's 'id', 'ok' and either 'result' or 'error'.
+    """
+    command = request.get('command')
+    response = {'id': request.get('id'), 'ok': True}
+    try:
+        if command not in AGENT_COMMANDS:
+            raise ValueError(f'Unknown command "{command}"')
+        response['result'] = globals()[command](*request.get('args', []))
+    except Exception as e:
+        print(f"An error occurred while running {command}: {e}")
+        response = {'id': request.get('id'), 'ok': False, 'error': f'{type(e).__name__}: {e}'}
+    return response
+
+
+def serve_agent_connection(conn: socket.socket, address: tuple, executor: ThreadPoolExecutor,
+                           stop_event: threading.Event) -> None:
+    """
+    Serves one controller connection. Requests are read as they arrive and run on the shared executor, so a slow call
+    such as file creation does not hold up status or health calls made over the same connection. Responses are sent in
+    the order they complete and carry the id of their request.
+
+    Args:
+        conn (socket.socket): The accepted connection.
+        address (tuple): The controller's address.
+        executor (ThreadPoolExecutor): Runs the requests.
+        stop_event (threading.Event): Set when a quit request is received.
+
+    Returns:
+        None
+    """
+    send_lock = threading.Lock()
+
+    def respond(response: dict) -> None:
+        try:
+            with send_lock:
+                send_frame(conn, response)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Socket error occurred while sending response: {e}")
+
+    try:
+        while not stop_event.is_set():
+            request = recv_frame(conn)
+            if request is None:
+                break
+            print(f"Request {request.get('id')} from {address[0]}: {request.get('command')} {request.get('args', [])}")
+
+            if request.get('command') == 'quit':
+                respond({'id': request.get('id'), 'ok': True, 'result': 'Quitting server'})
+                stop_event.set()
+                break
+            future = executor.submit(handle_agent_request, request)
+            future.add_done_callback(lambda done: respond(done.result()))
+    except (OSError, ValueError) as e:
+        print(f"Socket error occurred on connection from {address[0]}: {e}")
+    finally:
+        conn.close()
+
+
 def listener() -> None:
     """
-    Listens for connections on a specified port and uses indirect function calls to execute commands received from
-    clients.
+    Runs the agent. Listens for controller connections and serves each on its own thread. Requests are length prefixed
+    JSON messages naming one of the AGENT_COMMANDS, and several can be in flight on a connection at once.
 
     Returns:
         None
@@ -459,7 +1657,6 @@ def listener() -> None:
     host = '0.0.0.0'
     # TODO: host should probably be 0.0.0.0 so we listen on all ports.  I've found socket.gethostname to be unreliable.
     port = 5000
-    close_server = False  # Initially set close_server to False
 
     server_socket = socket.socket()
     server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -479,100 +1676,174 @@ def listener() -> None:
                 server_socket.close()
                 return
 
-    server_socket.listen(2)
-    while True:
+    server_socket.listen(64)
+    # The timeout lets the accept loop notice a quit request received on another connection
+    server_socket.settimeout(1)
+    stop_event = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=AGENT_WORKERS)
+    while not stop_event.is_set():
         try:
             conn, address = server_socket.accept()
             print("Connection from: " + str(address))
+        except socket.timeout:
+            continue
         except socket.error as e:
             print(f"Socket error occurred while accepting connection: {e}")
             continue
+        conn.settimeout(None)
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        threading.Thread(target=serve_agent_connection, args=(conn, address, executor, stop_event),
+                         daemon=True).start()
 
-        while True:
-            try:
-                data = conn.recv(1024)
-                if not data:
-                    break
+    server_socket.close()
+    executor.shutdown(wait=False)
+
+
+class AgentError(Exception):
+    """Raised on the controller when a request fails on the agent."""
 
-                data = data.decode()
-                print("from connected user: " + str(data))
-
-                # Split the command and the parameters
-                command, _, parameters = data.partition(', ')
-                parameters = parameters.strip("'")  # Remove quotes if present
-                param_list = parameters.split(', ')  # Split parameters into a list
-
-                # Use the getattr function to dynamically call the function
-                if command == 'quit':
-                    response = "Quitting server"
-                    close_server = True
-                elif command in globals():
-                    func = globals()[command]
-                    response = str(func(*param_list))  # Unpack the parameter list into the function
-                else:
-                    response = "Unknown command"
 
-                # Send response.
-                try:
-                    conn.send(response.encode())
-                except socket.error as e:
-                    print(f"Socket error occurred while sending response: {e}")
+class AgentConnection:
+    """
+    Persistent connection from the controller to the agent on one host. Every request carries an id, so many requests
+    can be in flight on the connection at once. A reader thread hands each response to the caller waiting on its id.
+    """
 
-                if close_server:
+    def __init__(self, host: str, port: int, connect_timeout: float = 10):
+        self.host = host
+        self.sock = socket.create_connection((host, port), timeout=connect_timeout)
+        self.sock.settimeout(None)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.next_id = 1
+        self.closed = False
+        self.reader = threading.Thread(target=self._read_responses, daemon=True)
+        self.reader.start()
+
+    def _read_responses(self) -> None:
+        error = None
+        try:
+            while True:
+                response = recv_frame(self.sock)
+                if response is None:
                     break
+                with self.lock:
+                    waiter = self.pending.pop(response.get('id'), None)
+                if waiter is None:
+                    continue
+                if response.get('ok'):
+                    waiter.set_result(response.get('result'))
+                else:
+                    waiter.set_exception(AgentError(response.get('error', 'Unknown error')))
+        except (OSError, ValueError) as e:
+            error = e
+        with self.lock:
+            self.closed = True
+            pending, self.pending = self.pending, {}
+        for waiter in pending.values():
+            waiter.set_exception(ConnectionError(f'Connection to {self.host} closed: {error or "EOF"}'))
+
+    def call(self, command: str, args: typing.Sequence = (), timeout: typing.Optional[float] = None):
+        """
+        Runs a command on the agent and waits for its result.
 
-            except Exception as e:
-                print(f"An error occurred: {e}")
+        Args:
+            command (str): One of AGENT_COMMANDS, or 'quit'.
+            args (Sequence): Positional arguments for the command. They travel as JSON, so keep their types.
+            timeout (Optional[float]): Seconds to wait for the result. None waits indefinitely.
 
-        # Allow response to sender time to get there before closing connection
-        conn.close()
-        if close_server:  # Break while loop after connection is closed
-            break
+        Returns:
+            The command's return value, with tuples turned into lists by JSON.
+
+        Raises:
+            AgentError: If the command raised on the agent.
+            ConnectionError: If the connection closed before the result arrived.
+            TimeoutError: If the result did not arrive in time.
+        """
+        waiter = Future()
+        with self.lock:
+            if self.closed:
+                raise ConnectionError(f'Connection to {self.host} is closed')
+            request_id = self.next_id
+            self.next_id += 1
+            self.pending[request_id] = waiter
+            try:
+                send_frame(self.sock, {'id': request_id, 'command': command, 'args': list(args)})
+            except OSError:
+                self.pending.pop(request_id, None)
+                raise
+        try:
+            return waiter.result(timeout)
+        except FutureTimeoutError:
+            with self.lock:
+                self.pending.pop(request_id, None)
+            raise TimeoutError(f'{command} on {self.host} did not answer within {timeout} seconds')
+
+    def close(self) -> None:
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+def get_agent_connection(host: str, port: int) -> AgentConnection:
+    """
+    Returns the open connection to the agent on host, connecting first if there is none.
+
+    Args:
+        host (str): The host address of the agent.
+        port (int): The port the agent listens on.
+
+    Returns:
+        AgentConnection: The shared connection.
+    """
+    with agent_connections_lock:
+        connection = agent_connections.get((host, port))
+        if connection is None or connection.closed:
+            connection = AgentConnection(host, port)
+            agent_connections[(host, port)] = connection
+        return connection
 
 
-def sender(host: str, port: int, cmd: str, logger_ready: bool, suppress_out: bool) -> tuple:
+def sender(host: str, port: int, command: str, args: typing.Sequence, logger_ready: bool, suppress_out: bool,
+           timeout: typing.Optional[float] = None) -> tuple:
     """
-    Sends a command to a server.
+    Runs a command on the agent of a server over its persistent connection.
 
     Args:
         host (str): The host address of the server.
         port (int): The port number to connect to on the server.
-        cmd (str): The command to send to the server. Command must be in the format of
-            'FUNCTIONNAME, PARAMETERS, PARAMETERS'
+        command (str): The name of the function to run, one of AGENT_COMMANDS, or 'quit' to stop the agent.
+        args (Sequence): Arguments for the function. They are sent as JSON, so numbers and booleans keep their types.
         logger_ready (bool): Lets function know if it can use the logger instead of basic prints
         suppress_out (bool): Lets function know to suppress basic prints
+        timeout (Optional[float]): Seconds to wait for the result. None waits indefinitely.
 
     Returns:
-        tuple: A tuple containing a boolean value indicating if the operation was successful, and the response received
-        from the server.
+        tuple: A tuple containing a boolean value indicating if the operation was successful, and the value returned
+        by the function on the server.
     """
-    response = ''
-    client_socket = socket.socket()
-    try:
-        client_socket.connect((host, port))
-    except socket.error as e:
-        if logger_ready:
-            logger.error(f"Could not connect to server: {e}")
-        elif not suppress_out:
-            print(f"Could not connect to server: {e}")
-        return False, ''
-
     try:
-        client_socket.send(cmd.encode())
-        response = client_socket.recv(1024).decode()
+        response = get_agent_connection(host, port).call(command, args, timeout)
+    except (OSError, AgentError) as e:
         if logger_ready:
-            logger.debug(f"Received from server: {response}")
+            logger.error(f'{command} failed on "{host}": {e}')
         elif not suppress_out:
-            print(f"Received from server: {response}")
+            print(f'{command} failed on "{host}": {e}')
+        return False, None
 
-    except socket.error as e:
-        if logger_ready:
-            logger.error(f"Socket error occurred: {e}")
-        elif not suppress_out:
-            print(f"Socket error occurred: {e}")
+    if logger_ready:
+        logger.debug(f"Received from server: {response}")
+    elif not suppress_out:
+        print(f"Received from server: {response}")
 
-    finally:
-        client_socket.close()
+    if command == 'quit':
+        with agent_connections_lock:
+            connection = agent_connections.pop((host, port), None)
+        if connection:
+            connection.close()
 
     return True, response
 
@@ -638,36 +1909,296 @@ def run_command_and_go(command: str) -> bool:
     return True
 
 
-def is_port_open(ip: str, port: int) -> bool:
+def is_port_open(ip: str, port: int, timeout: float = 2) -> bool:
     """
     Checks if a port is open on a given IP address.
 
     Args:
         ip (str): The IP address.
         port (int): The port number.
+        timeout (float): Seconds to wait for the connection, so unreachable hosts do not hang the caller.
 
     Returns:
         bool: True if the port is open, False if it is closed.
     """
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        return s.connect_ex((ip, port)) == 0
+        s.settimeout(timeout)
+        try:
+            return s.connect_ex((ip, port)) == 0
+        except socket.timeout:
+            return False
 
 
-def test_ssh_access(remote_server_ip: str, user: str) -> bool:
+def call_agent(host: str, command: str, args: typing.Sequence = (), timeout: typing.Optional[float] = None,
+               port: int = 5000):
     """
-    Tests passwordless SSH access to a remote server.
+    Runs a command on the agent of a server and returns its result. Unlike sender, failures raise, which lets fan_out
+    record them per host.
 
     Args:
-        remote_server_ip (str): The IP address or hostname of the remote server.
-        user (str): The user for SSH.
+        host (str): The host address of the server.
+        command (str): One of AGENT_COMMANDS, or 'quit'.
+        args (Sequence): Arguments for the command.
+        timeout (Optional[float]): Seconds to wait for the result. None waits indefinitely.
+        port (int): The port the agent listens on.
 
     Returns:
-        bool: True if the SSH access test passed, False otherwise.
-    """
-    try:
-        command = f'ssh -o BatchMode=yes -o ConnectTimeout=5 -q {user}@{remote_server_ip} echo ok'
-        process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE,
-                                   stderr=subprocess.PIPE, universal_newlines=True)
+        The command's return value.
+
+    Raises:
+        AgentError: If the command raised on the agent.
+        OSError: If the agent could not be reached or did not answer in time.
+    """
+    return get_agent_connection(host, port).call(command, args, timeout)
+
+
+class HostResult:
+    """
+    Outcome of one per-host step run by fan_out. ok is False if the step raised, timed out or returned False.
+    """
+
+    def __init__(self, host: str, ok: bool, value=None, error: str = '', elapsed: float = 0.0):
+        self.host = host
+        self.ok = ok
+        self.value = value
+        self.error = error
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        status = 'ok' if self.ok else f'failed: {self.error}'
+        return f'HostResult({self.host}, {status}, {self.elapsed:.2f}s)'
+
+
+def fan_out(hosts: typing.Sequence[str], func: typing.Callable, phase: str, timeout: typing.Optional[float] = None,
+            max_workers: int = FAN_OUT_WORKERS) -> dict:
+    """
+    Runs func(host) for every host at the same time on a bounded thread pool, so a phase takes about as long as its
+    slowest host rather than the sum of all hosts.
+
+    Args:
+        hosts (Sequence[str]): The hosts to run on.
+        func (Callable): Called with each host. Its return value is kept in the HostResult.
+        phase (str): Name of the phase for the debug log.
+        timeout (Optional[float]): Seconds, counted from the start of the phase, after which a host that has not
+            finished is reported as timed out. Its call keeps running in the background. None waits indefinitely.
+        max_workers (int): Most hosts handled at once.
+
+    Returns:
+        dict: Host mapped to its HostResult, in the order of hosts.
+    """
+    def timed(host: str) -> tuple:
+        host_start = time.monotonic()
+        return func(host), time.monotonic() - host_start
+
+    results = {}
+    if not hosts:
+        return results
+
+    start = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=max(1, min(len(hosts), max_workers)))
+    futures = {host: executor.submit(timed, host) for host in hosts}
+    for host, future in futures.items():
+        remaining = None if timeout is None else max(0.0, timeout - (time.monotonic() - start))
+        try:
+            value, elapsed = future.result(remaining)
+            results[host] = HostResult(host, value is not False, value, '' if value is not False else 'returned False',
+                                       elapsed)
+        except FutureTimeoutError:
+            results[host] = HostResult(host, False, error=f'timed out after {timeout} seconds', elapsed=timeout)
+        except Exception as e:
+            results[host] = HostResult(host, False, error=f'{type(e).__name__}: {e}',
+                                       elapsed=time.monotonic() - start)
+    # Hosts that timed out keep their thread, everything else has finished
+    executor.shutdown(wait=False)
+
+    failed = [result.host for result in results.values() if not result.ok]
+    logger.debug(f'{phase} finished on {len(hosts) - len(failed)} of {len(hosts)} hosts in '
+                 f'{time.monotonic() - start:.2f}s{", failed: " + ", ".join(failed) if failed else ""}')
+    return results
+
+
+def measure_clock_offsets(ips: typing.Sequence[str], probes: int = 8) -> dict:
+    """
+    Measures how far the clock of every agent is from the controller's, the way NTP does: agent_status is called
+    probes times and the exchange with the shortest round trip is used, taking the agent's clock to have been read
+    halfway through it. The error is at most half that round trip.
+
+    Args:
+        ips (Sequence[str]): The agents to probe.
+        probes (int): Exchanges per agent.
+
+    Returns:
+        dict: IP mapped to 'offset_s', the agent clock minus the controller clock, 'rtt_s', the round trip it was
+        measured with, and 'hostname', the agent's host name as fio reports it. Agents that could not be probed are
+        left out.
+    """
+    def probe(ip: str) -> dict:
+        best = None
+        for _ in range(probes):
+            sent = time.time()
+            status = call_agent(ip, 'agent_status', timeout=10)
+            received = time.time()
+            if best is None or received - sent < best['rtt_s']:
+                best = {'offset_s': status['time'] - (sent + received) / 2, 'rtt_s': received - sent,
+                        'hostname': status['hostname']}
+        return best
+
+    offsets = {}
+    for ip, result in fan_out(ips, probe, 'Clock probe', timeout=60).items():
+        if result.ok:
+            offsets[ip] = result.value
+        else:
+            logger.warning(f'Could not measure the clock offset of "{ip}": {result.error}')
+    return offsets
+
+
+def client_timeline(windows: dict, offsets: dict, start_time: typing.Optional[float] = None,
+                    history: typing.Optional[dict] = None) -> dict:
+    """
+    Places every client's run on the controller's clock and finds the window in which all of them were running.
+
+    A client's start comes from fio's job_start corrected by its clock offset, or failing that from the armed start
+    time, and its end from job_runtime. With the cumulative samples of a FioLiveMonitor, the aggregate bandwidth and
+    IOPS of that common window are interpolated from each client's counters at its edges, so ramp up and tail periods
+    where only some clients ran are left out.
+
+    Args:
+        windows (dict): fio host name mapped to its 'job_start' (ms since the epoch) and 'job_runtime' (ms), as kept
+            by FIOResult.client_windows.
+        offsets (dict): Results of measure_clock_offsets.
+        start_time (Optional[float]): Controller time all clients were armed to start at, if they were.
+        history (Optional[dict]): FioLiveMonitor.history, host name mapped to (time, io_bytes, total_ios) samples.
+
+    Returns:
+        dict: 'clients' with each client's 'ip', 'offset_s', 'start' and 'end' on the controller clock,
+        'start_skew_s', the spread of the starts, 'window_start', 'window_end' and 'window_s' of the common window,
+        and 'window_bw_bytes' and 'window_iops' when they could be worked out. Empty if no client could be placed.
+    """
+    by_hostname = {offset['hostname']: (ip, offset) for ip, offset in offsets.items()}
+    clients = {}
+    for hostname, window in windows.items():
+        ip, offset = by_hostname.get(hostname) or (hostname, offsets.get(hostname))
+        offset_s = offset['offset_s'] if offset else 0.0
+        if window.get('job_start'):
+            start = window['job_start'] / 1000 - offset_s
+        elif start_time is not None:
+            start = start_time
+        else:
+            continue
+        clients[hostname] = {'ip': ip, 'offset_s': round(offset_s, 6), 'start': round(start, 3),
+                             'end': round(start + window.get('job_runtime', 0) / 1000, 3)}
+    if not clients:
+        return {}
+
+    starts = [client['start'] for client in clients.values()]
+    timeline = {'clients': clients, 'start_skew_s': round(max(starts) - min(starts), 3),
+                'window_start': max(starts), 'window_end': min(client['end'] for client in clients.values())}
+    timeline['window_s'] = round(max(0.0, timeline['window_end'] - timeline['window_start']), 3)
+
+    def at(samples: list, when: float, index: int) -> typing.Optional[float]:
+        # Linear interpolation of a cumulative counter, None outside the sampled range
+        for (t0, *v0), (t1, *v1) in zip(samples, samples[1:]):
+            if t0 <= when <= t1:
+                return v0[index] + (v1[index] - v0[index]) * ((when - t0) / (t1 - t0) if t1 > t0 else 0)
+        return None
+
+    if history and timeline['window_s'] > 0 and all(hostname in history for hostname in clients):
+        totals = [0.0, 0.0]
+        for hostname in clients:
+            for index in (0, 1):
+                first = at(history[hostname], timeline['window_start'], index)
+                last = at(history[hostname], timeline['window_end'], index)
+                if first is None or last is None:
+                    return timeline
+                totals[index] += last - first
+        timeline['window_bw_bytes'] = round(totals[0] / timeline['window_s'])
+        timeline['window_iops'] = round(totals[1] / timeline['window_s'], 2)
+    return timeline
+
+
+def wait_for_port(ip: str, port: int, timeout: float, interval: float = 0.2) -> bool:
+    """
+    Polls a port until it accepts connections.
+
+    Args:
+        ip (str): The IP address.
+        port (int): The port number.
+        timeout (float): Seconds to keep trying.
+        interval (float): Seconds between attempts.
+
+    Returns:
+        bool: True if the port opened in time, False otherwise.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        if is_port_open(ip, port):
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
+
+
+def deploy_agent(ip: str, user: str, run_timestamp: str, start_timeout: float = 30, max_attempts: int = 3) -> bool:
+    """
+    Copies this script to a server, starts it there in server mode and waits until the agent answers a health call.
+
+    Args:
+        ip (str): The IP address of the server.
+        user (str): The user for scp and ssh.
+        run_timestamp (str): Timestamp used in the agent's log file name.
+        start_timeout (float): Seconds to wait for the agent to answer after each launch.
+        max_attempts (int): Number of times the copy and the launch are tried.
+
+    Returns:
+        bool: True if the agent is running, False otherwise.
+    """
+    source_file = os.path.realpath(__file__)
+    destination_path = f'/tmp/{os.path.basename(__file__)}'
+    command = f'scp {source_file} {user}@{ip}:{destination_path}'
+    for attempt in range(max_attempts):
+        if run_command_and_wait(command):
+            break
+        time.sleep(2 ** attempt)
+    else:
+        print(f'ERROR: `{command}` did not succeed after {max_attempts} attempts')
+        return False
+
+    server_log = f"/tmp/{os.path.splitext(os.path.basename(__file__))[0]}_output_{run_timestamp}.log"
+    command = f'ssh {user}@{ip} "nohup python3 {destination_path} --server &> {server_log} &"'
+    for attempt in range(max_attempts):
+        if not run_command_and_go(command):
+            print(f'ERROR: Command "{command}" failed')
+            time.sleep(2 ** attempt)
+            continue
+        deadline = time.monotonic() + start_timeout
+        while time.monotonic() < deadline:
+            if wait_for_port(ip, 5000, deadline - time.monotonic()) and \
+                    sender(ip, 5000, 'agent_status', [], False, True, 5)[0]:
+                print(f'INFO: "run_fio.py --server" successfully launched on "{ip}"')
+                return True
+            time.sleep(0.2)
+        print(f'WARNING: Port {5000} did not become available after {start_timeout} seconds on "{ip}". Retrying to '
+              f'launch the server.')
+
+    print(f"ERROR: `{command}` did not succeed after {max_attempts} attempts")
+    return False
+
+
+def test_ssh_access(remote_server_ip: str, user: str) -> bool:
+    """
+    Tests passwordless SSH access to a remote server.
+
+    Args:
+        remote_server_ip (str): The IP address or hostname of the remote server.
+        user (str): The user for SSH.
+
+    Returns:
+        bool: True if the SSH access test passed, False otherwise.
+    """
+    try:
+        command = f'ssh -o BatchMode=yes -o ConnectTimeout=5 -q {user}@{remote_server_ip} echo ok'
+        process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE, universal_newlines=True)
 
         # Wait for the process to finish and get the output
         stdout, stderr = process.communicate()
@@ -810,10 +2341,157 @@ def create_file_orig(test_dir: str, block_size: str, file_size: int, file_num: i
             logger.warning('Remainder is %s, truncating', remainder)
 
 
+def init_prefill_worker(inflight_tokens: typing.Optional[typing.Any]) -> None:
+    """
+    Pool initializer for file creation workers. Stores the shared in-flight token semaphore so that every write in
+    every worker draws from the same per-client budget.
+
+    Args:
+        inflight_tokens (Optional[BoundedSemaphore]): One token per block allowed in flight, or None for no cap.
+
+    Returns:
+        None
+    """
+    global prefill_inflight_tokens
+    prefill_inflight_tokens = inflight_tokens
+
+
+def get_prefill_buffer(block_size_bytes: int, pattern: str = 'random', compress_percentage: int = 0) -> memoryview:
+    """
+    Returns a page aligned block filled with the requested data pattern. Buffers are allocated once per worker process
+    through an anonymous mmap, which the kernel always aligns to a page boundary as O_DIRECT requires, and are reused
+    for every file that worker writes.
+
+    Patterns:
+        random: Incompressible data from os.urandom.
+        timestamp: Each 8 byte word holds the creation timestamp in the upper half and the word index in the lower
+            half, similar to IOR's timestamp data packets.
+        zero: All zeros.
+        compressible: Every 4 KiB segment starts with compress_percentage percent zeros followed by random data, the
+            same layout fio uses for buffer_compress_percentage.
+
+    Args:
+        block_size_bytes (int): The size of the block in bytes.
+        pattern (str): One of PREFILL_PATTERNS.
+        compress_percentage (int): Percentage of each segment that is compressible for the compressible pattern.
+
+    Returns:
+        memoryview: A read-only view of the buffer that can be handed to os.pwrite without copying.
+    """
+    key = (block_size_bytes, pattern, compress_percentage)
+    if key in prefill_buffers:
+        return prefill_buffers[key]
+
+    buf = mmap.mmap(-1, block_size_bytes)
+    if pattern == 'random':
+        buf[:] = os.urandom(block_size_bytes)
+    elif pattern == 'timestamp':
+        stamp = int(time.time()) & 0xFFFFFFFF
+        words = block_size_bytes // 8
+        buf[:words * 8] = struct.pack(f'<{words}Q', *((stamp << 32) | i for i in range(words)))
+    elif pattern == 'compressible':
+        segment = 4096
+        zero_bytes = segment * compress_percentage // 100
+        for offset in range(0, block_size_bytes, segment):
+            end = min(offset + segment, block_size_bytes)
+            random_start = min(offset + zero_bytes, end)
+            buf[random_start:end] = os.urandom(end - random_start)
+    elif pattern != 'zero':
+        raise ValueError(f'Unknown prefill pattern "{pattern}"')
+
+    prefill_buffers[key] = memoryview(buf).toreadonly()
+    return prefill_buffers[key]
+
+
+def test_file_name(test_dir: str, ip: str, dir_mode: bool, job_num: int, file_num: int, file_subnum: int) -> str:
+    """
+    Builds the path of a test file using the same naming that the fio jobfiles expect.
+
+    Args:
+        test_dir (str): The directory where the test files are stored.
+        ip (str): The IP address associated with the file.
+        dir_mode (bool): Whether the use_directory_mode was selected
+        job_num (int): An identifier for the job.
+        file_num (int): An identifier for the file.
+        file_subnum (int): File sub number.  (Technically file number for the fio jobnum)
+
+    Returns:
+        str: The full path of the test file.
+    """
+    if dir_mode:
+        return f"{test_dir}/{ip}/job{job_num}/testfile{file_num}.{file_subnum}"
+    return f"{test_dir}/{ip}/testfile{file_num}"
+
+
+def sample_checksum(filename: str, size: int, samples: int = 4, sample_size: int = 4096) -> str:
+    """
+    Computes a checksum over a few evenly spaced samples of a file. Reading the whole of a 128G test file would cost
+    as much as rewriting it, so the samples are only meant to catch files that were truncated, overwritten or
+    replaced since they were recorded in the prefill manifest.
+
+    Args:
+        filename (str): The file to sample.
+        size (int): The size of the file in bytes.
+        samples (int): The number of samples to take.
+        sample_size (int): The number of bytes in each sample.
+
+    Returns:
+        str: The hex digest of the sampled data.
+    """
+    digest = hashlib.sha1()
+    step = max(size - sample_size, 0) // max(samples - 1, 1)
+    with open(filename, 'rb') as f:
+        for i in range(samples):
+            f.seek(min(i * step, max(size - sample_size, 0)))
+            digest.update(f.read(sample_size))
+    return digest.hexdigest()
+
+
+def load_prefill_manifest(manifest_path: str) -> dict:
+    """
+    Loads the prefill manifest for a client and test directory.
+
+    Args:
+        manifest_path (str): The path of the manifest file.
+
+    Returns:
+        dict: The manifest entries keyed by filename, empty if the manifest is missing or unreadable.
+    """
+    try:
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def save_prefill_manifest(manifest_path: str, manifest: dict) -> None:
+    """
+    Writes the prefill manifest through a temporary file so an interrupted run never leaves a half written manifest.
+
+    Args:
+        manifest_path (str): The path of the manifest file.
+        manifest (dict): The manifest entries keyed by filename.
+
+    Returns:
+        None
+    """
+    tmp_path = f'{manifest_path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, manifest_path)
+
+
 def create_file(test_dir: str, block_size: str, file_size: int, file_num: int, job_num: int, ip: str, dir_mode: bool,
-                file_subnum: int) -> None:
+                file_subnum: int, depth: int = 1, pattern: str = 'random', compress_percentage: int = 0,
+                mode: str = 'write') -> tuple:
     """
-    Creates a file with specified parameters.
+    Creates a file with specified parameters. With a depth greater than 1 the file is split into interleaved stripes
+    of blocks and each stripe is written by its own thread with os.pwrite at fixed offsets, which keeps depth aligned
+    writes in flight against the file instead of one.
+
+    The fallocate and truncate modes skip writing data. fallocate reserves the blocks so the layout on the storage is
+    in place, truncate only sets the file size and leaves a sparse file.
 
     Args:
         test_dir (str): The directory where the file will be created.
@@ -824,14 +2502,15 @@ def create_file(test_dir: str, block_size: str, file_size: int, file_num: int, j
         ip (str): The IP address associated with the file.
         dir_mode (bool): Whether the use_directory_mode was selected
         file_subnum (int): File sub number.  (Technically file number for the fio jobnum)
+        depth (int): Number of writes to keep in flight against the file.
+        pattern (str): Data pattern to write, one of PREFILL_PATTERNS.
+        compress_percentage (int): Compressible percentage used by the compressible pattern.
+        mode (str): One of PREFILL_MODES.
 
     Returns:
-        None
+        tuple: The filename, the number of bytes written, the elapsed time in seconds and the sampled checksum.
     """
-    if dir_mode:
-        filename = f"{test_dir}/{ip}/job{job_num}/testfile{file_num}.{file_subnum}"
-    else:
-        filename = f"{test_dir}/{ip}/testfile{file_num}"
+    filename = test_file_name(test_dir, ip, dir_mode, job_num, file_num, file_subnum)
 
     # Delete file if it already exists
     if os.path.isfile(filename):
@@ -840,9 +2519,23 @@ def create_file(test_dir: str, block_size: str, file_size: int, file_num: int, j
     # Convert filesize and block size into bytes and calculate number of blocks required
     block_size_bytes = convert_size(block_size)
     num_blocks = file_size // block_size_bytes
+    written_size = num_blocks * block_size_bytes
 
-    # Generate a single random block
-    random_block = os.urandom(block_size_bytes)
+    start_time = time.time()
+
+    if mode != 'write':
+        fd = os.open(filename, os.O_CREAT | os.O_WRONLY)
+        try:
+            if mode == 'fallocate':
+                os.posix_fallocate(fd, 0, written_size)
+            else:
+                os.ftruncate(fd, written_size)
+        finally:
+            os.close(fd)
+        return filename, written_size, time.time() - start_time, sample_checksum(filename, written_size)
+
+    # Page aligned block shared by every file this worker writes
+    prefill_block = get_prefill_buffer(block_size_bytes, pattern, compress_percentage)
 
     # Open the file with Direct I/O
     try:
@@ -851,13 +2544,28 @@ def create_file(test_dir: str, block_size: str, file_size: int, file_num: int, j
         logger.error('Failed to open file %s: %s', filename, e.strerror)
         raise
 
-    try:
-        for _ in range(num_blocks):
+    def write_stripe(first_block: int) -> None:
+        for block in range(first_block, num_blocks, depth):
+            # Hold a token from the per-client budget for the duration of each write
+            if prefill_inflight_tokens is not None:
+                prefill_inflight_tokens.acquire()
             try:
-                os.write(fd, random_block)
+                os.pwrite(fd, prefill_block, block * block_size_bytes)
             except OSError as e:
                 logger.error('Failed to write to file %s: %s', filename, e.strerror)
                 raise
+            finally:
+                if prefill_inflight_tokens is not None:
+                    prefill_inflight_tokens.release()
+
+    try:
+        if depth > 1 and num_blocks > 1:
+            with ThreadPoolExecutor(max_workers=min(depth, num_blocks)) as executor:
+                stripes = [executor.submit(write_stripe, i) for i in range(min(depth, num_blocks))]
+                for stripe in stripes:
+                    stripe.result()
+        else:
+            write_stripe(0)
         remainder = file_size % block_size_bytes
         if remainder != 0:
             logger.warning('Remainder is %s, truncating', remainder)
@@ -865,19 +2573,40 @@ def create_file(test_dir: str, block_size: str, file_size: int, file_num: int, j
         os.fsync(fd)  # ensure all internal buffers associated with fd are written to disk
         os.close(fd)
 
+    return filename, written_size, time.time() - start_time, sample_checksum(filename, written_size)
+
+
+def create_file_task(task: tuple) -> tuple:
+    """
+    Unpacks a task tuple for create_file so it can be used with Pool.imap_unordered.
+
+    Args:
+        task (tuple): The positional arguments for create_file.
+
+    Returns:
+        tuple: The return value of create_file.
+    """
+    return create_file(*task)
+
 
 # TODO: Create_test_files doesn't seem to be working properly for directory mode.
 # ./run_fio.py -N deleteme -T JonBWRead --ips 10.0.1.201 10.0.1.202 10.0.1.203 -r 300 -s 10G  -b 1m -j 24 -q 4 -n 1 -i
 # libaio -t /mnt/hsshare -D
 def create_test_files(num_testfiles: int, files_per_job: int, file_create_threads: int, test_dir: str, block_size: str,
-                      file_size: str, ip: str, dir_mode: typing.Union[bool, str], nrfiles: int) -> str:
+                      file_size: str, ip: str, dir_mode: typing.Union[bool, str], nrfiles: int,
+                      max_inflight: str = '0', prefill_depth: int = 1, pattern: str = 'random',
+                      compress_percentage: int = 0, mode: str = 'write',
+                      rewrite: typing.Union[bool, str] = False) -> str:
     """
-    Creates a specified number of test files. The file creation tasks are processed in chunks, and the number of
-    simultaneous tasks is defined by the number of file creation threads.
+    Creates a specified number of test files. All tasks are handed to a single long-lived worker pool, so every worker
+    picks up the next file as soon as it finishes its current one instead of waiting for the slowest file in a chunk.
 
     The function arranges the tasks in a list of tuples, each containing the directory for the test files, the block
     size for each file, the size of each file, a unique identifier, and an IP address.
 
+    A prefill manifest is kept in the client's test directory. Files whose size, block size, pattern, creation mode
+    and sampled checksum still match their manifest entry are reused, so only missing or changed files are rewritten.
+
     Args:
         num_testfiles (int): The number of test files to create.
         files_per_job (int): The number of files to create per job.
@@ -888,15 +2617,16 @@ def create_test_files(num_testfiles: int, files_per_job: int, file_create_thread
         ip (str): The IP address of the server where the test files will be created.
         dir_mode (bool): Whether the use_directory_mode was selected
         nrfiles (int): Number of files per fio job for directory mode.
+        max_inflight (str): Cap on the total bytes being written at once across all workers. '0' means no cap.
+        prefill_depth (int): Number of aligned writes each worker keeps in flight per file.
+        pattern (str): Data pattern written to the files, one of PREFILL_PATTERNS.
+        compress_percentage (int): Compressible percentage used by the compressible pattern.
+        mode (str): How files are created, one of PREFILL_MODES.
+        rewrite (bool): Rewrite every file even if the manifest says it can be reused.
 
     Returns:
-        str: A message indicating the success of the file creation process.
+        str: A message summarising the file creation process.
     """
-    num_testfiles = int(num_testfiles)
-    file_create_threads = int(file_create_threads)
-    files_per_job = int(files_per_job)
-    dir_mode = eval(dir_mode)
-    nrfiles = int(nrfiles)
     number_jobs = num_testfiles // files_per_job
     tasks = []  # Define tasks outside the loop
 
@@ -906,21 +2636,84 @@ def create_test_files(num_testfiles: int, files_per_job: int, file_create_thread
         start = 0 if dir_mode else 1
         if dir_mode:
             for n in range(0, nrfiles):
-                tasks.extend([(test_dir, block_size, round(convert_size(file_size)/nrfiles), i, j, ip, dir_mode, n)
+                tasks.extend([(test_dir, block_size, round(convert_size(file_size)/nrfiles), i, j, ip, dir_mode, n,
+                               prefill_depth, pattern, compress_percentage, mode)
                               for i in range(start, files_per_job)])
         else:
             tasks.extend([(test_dir, block_size, convert_size(file_size), i + files_per_job * (j - 1), j, ip, dir_mode,
-                           1) for i in range(start, files_per_job + 1)])
-
-    # Process the tasks in chunks
-    for i in range(0, len(tasks), file_create_threads):
-        with multiprocessing.Pool(processes=file_create_threads) as pool:
-            end = min(i + file_create_threads, len(tasks))
-            logger.info(f'Creating test files {i + 1}-{end}')
-            pool.starmap(create_file, tasks[i:i + file_create_threads])
+                           1, prefill_depth, pattern, compress_percentage, mode)
+                          for i in range(start, files_per_job + 1)])
+
+    # Check which files can be reused from a previous run
+    manifest_path = f'{test_dir}/{ip}/{PREFILL_MANIFEST}'
+    manifest = load_prefill_manifest(manifest_path)
+    pending = []
+    current = set()
+    for task in tasks:
+        filename = test_file_name(test_dir, ip, dir_mode, task[4], task[3], task[7])
+        current.add(filename)
+        expected = {
+            'size': task[2] // convert_size(block_size) * convert_size(block_size),
+            'block_size': block_size,
+            'pattern': pattern if mode == 'write' else 'zero',
+            'compress_percentage': compress_percentage if mode == 'write' else 0,
+            'mode': mode,
+        }
+        entry = manifest.get(filename)
+        reusable = (not rewrite and entry is not None
+                    and all(entry.get(key) == value for key, value in expected.items())
+                    and os.path.isfile(filename) and os.path.getsize(filename) == expected['size'])
+        if reusable:
+            try:
+                reusable = sample_checksum(filename, expected['size']) == entry.get('checksum')
+            except OSError:
+                reusable = False
+        if reusable:
+            continue
+        manifest[filename] = dict(expected, checksum=None)
+        pending.append(task)
+
+    reused = len(tasks) - len(pending)
+    if reused:
+        print(f'Reusing {reused} of {len(tasks)} test files on {ip} that match the prefill manifest')
+
+    # Only the files of this run are kept, entries of deleted files or of an older file size or count are dropped
+    stale = set(manifest) - current
+    for filename in stale:
+        del manifest[filename]
+
+    # The agent runs this on one of its request threads. A forked worker could inherit a logging, socket or ring buffer
+    # lock another thread holds at that moment, so the workers come from a fork server that has no such threads
+    context = multiprocessing.get_context('forkserver')
+
+    # Convert the in-flight byte cap into a number of block sized tokens shared by all workers
+    max_inflight_bytes = convert_size(max_inflight)
+    inflight_tokens = None
+    if max_inflight_bytes > 0:
+        inflight_tokens = context.BoundedSemaphore(max(1, max_inflight_bytes // convert_size(block_size)))
+
+    total_bytes = 0
+    start_time = time.time()
+    if pending:
+        with context.Pool(processes=min(file_create_threads, len(pending)), initializer=init_prefill_worker,
+                          initargs=(inflight_tokens,)) as pool:
+            results = pool.imap_unordered(create_file_task, pending)
+            for count, (filename, bytes_written, elapsed, checksum) in enumerate(results, 1):
+                total_bytes += bytes_written
+                manifest[filename]['checksum'] = checksum
+                print(f'Created {filename} ({count}/{len(pending)}): {bytes_written / (1000 ** 3):.2f} GB in '
+                      f'{elapsed:.2f}s, {bytes_written / max(elapsed, 1e-9) / (1000 ** 3):.2f} GB/s')
+    if pending or stale:
+        save_prefill_manifest(manifest_path, manifest)
+
+    total_time = time.time() - start_time
+    result = (f'Successfully created {len(pending)} files on {ip} ({reused} reused): '
+              f'{total_bytes / (1000 ** 3):.2f} GB in {total_time:.2f}s, '
+              f'fill rate {total_bytes / max(total_time, 1e-9) / (1000 ** 3):.2f} GB/s')
+    print(result)
 
     # TODO: Add resilience
-    return 'Successfully created files'
+    return result
 
 
 def start_nfsio_stats(run_timestamp: str, output_dir: str) -> str:
@@ -939,7 +2732,7 @@ def start_nfsio_stats(run_timestamp: str, output_dir: str) -> str:
     Raises:
         Exception: If the nfsiostat process is already running.
     """
-    global nfsio_proc
+    global nfsio_proc, nfsio_writer
 
     # TODO: make sure callee is properly handling this condition
     # Do not start if there's a running process already
@@ -956,13 +2749,26 @@ def start_nfsio_stats(run_timestamp: str, output_dir: str) -> str:
 
     filename = f'{output_dir}nfsio_stats_{run_timestamp}.txt'
     command = ['nfsiostat', '1']
-    with open(filename, 'w') as f:
-        nfsio_proc = subprocess.Popen(command, stdout=f)
+    # nfsiostat is a Python script, it would buffer its output when writing to a pipe
+    nfsio_proc = subprocess.Popen(command, stdout=subprocess.PIPE, text=True,
+                                  env=dict(os.environ, PYTHONUNBUFFERED='1'))
+
+    def write_output(proc: subprocess.Popen) -> None:
+        with open(filename, 'w') as f:
+            for line in proc.stdout:
+                # nfsiostat prints no timestamps, mark when each mount block arrived
+                if ' mounted on ' in line:
+                    f.write(f'#time {time.time():.3f}\n')
+                f.write(line)
+
+    nfsio_writer = threading.Thread(target=write_output, args=(nfsio_proc,), daemon=True)
+    nfsio_writer.start()
 
     return filename
 
 
-def stop_and_parse_nfsio_stats(filename: str) -> None:
+def stop_and_parse_nfsio_stats(filename: str, window_start: typing.Optional[float] = None,
+                               window_end: typing.Optional[float] = None) -> list:
     """
     Stops the nfsiostat process if it is currently running. If the process is not running, returns an error
     message "No NFS IO Stats process to stop" and exits the function.
@@ -972,147 +2778,755 @@ def stop_and_parse_nfsio_stats(filename: str) -> None:
 
     Args:
         filename (str): The name of the file that should be processed.
+        window_start (Optional[float]): Epoch time fio started, as seen by the controller.
+        window_end (Optional[float]): Epoch time fio finished, as seen by the controller.
+
+    Returns:
+        list: The per mount summary from parse_nfsio_output, empty if nothing was running.
     """
-    global nfsio_proc
+    global nfsio_proc, nfsio_writer
 
     # Do not attempt to stop if no process is running
     if nfsio_proc is None:
         print('Error: No NFS IO Stats process to stop')
-        return
+        return []
 
     nfsio_proc.terminate()
+    nfsio_proc.wait()
+    if nfsio_writer is not None:
+        nfsio_writer.join(timeout=10)
+    # Allow the next test point of a sweep to start a new collection
+    nfsio_proc = None
+    nfsio_writer = None
 
     # Parse the output to CSV
     with open(filename, 'r') as f:
         output = f.read()
 
     csv_filename = filename.replace('.txt', '.csv')
-    parse_nfsio_output(output, csv_filename)
+    return parse_nfsio_output(output, csv_filename, window_start, window_end)
 
 
-# TODO: This function current assumes a single NFS mount and parses the output.  Investigation required for multiple.
-def parse_nfsio_output(output: str, filename: str):
+def parse_nfsio_output(output: str, filename: str, window_start: typing.Optional[float] = None,
+                       window_end: typing.Optional[float] = None) -> list:
     """
-    Parses the output from NFS IO stats by splitting it into lines. Each line is checked for the presence of
-    'mounted on', which signifies the presence of NFS mount and mount point details.
+    Parses nfsiostat output into a per mount, per interval time series and summarizes every mount.
+
+    nfsiostat prints a block per mount every interval: a "mounted on" line, the ops/s and rpc bklog pair, then a
+    header and a value line for read and for write. The value lines are matched to their own header, so mounts of any
+    number and nfsiostat versions with fewer columns line up. The '#time' lines start_nfsio_stats writes give each
+    block its timestamp. Without them, as in output saved by older versions, the interval number is used instead.
 
-    If 'mounted on' is found, the line is split into NFS mount and mount point. Otherwise, the numerical statistics
-    from the line are extracted and appended to the data list.
+    The first block of every mount holds the averages since the mount was made, so it is kept in the time series as
+    sample 0 but left out of the summary, as are samples outside the fio run window when one is given.
 
-    The parsed data is then written to a CSV file with the headers and data.
+    The time series is written to filename and the summary next to it, with nfsio_stats replaced by nfsio_summary.
 
     Args:
-        output (str): An output string containing the NFS IO statistics.
-        filename (str): The name of the file where the parsed data will be written.
+        output (str): The nfsiostat output.
+        filename (str): The CSV file the time series is written to.
+        window_start (Optional[float]): Epoch time fio started.
+        window_end (Optional[float]): Epoch time fio finished.
 
     Returns:
-        None
+        list: The summary row of every mount, keyed by NFSIO_SUMMARY_HEADERS.
     """
-    lines = output.splitlines()
-    headers = ['nfs_mount', 'mount_point', 'ops/s', 'rpc bklog',
-               'read ops/s', 'read kB/s', 'read kB/op', 'read retrans',
-               'read avg RTT (ms)', 'read avg exe (ms)', 'read avg queue (ms)', 'read errors',
-               'write ops/s', 'write kB/s', 'write kB/op', 'write retrans',
-               'write avg RTT (ms)', 'write avg exe (ms)', 'write avg queue (ms)', 'write errors']
-    data = []
-
-    # look for 'mounted on' in each line, identifies which line contains mount and mount point details
-    pattern = r'mounted on'
-    for line in lines:
-        if pattern in line:
-            # split the line based on 'mounted on' to separate the nfs_mount and mount_point
-            nfs_mount, mount_point = line.split(' mounted on ')
-            # strip ':' from the end of mount_point
-            mount_point = mount_point.strip(':')
-            data.extend([nfs_mount, mount_point])
-        else:
-            # append numerical statistics
-            data.extend(re.findall(r'(\d+\.\d+|\d+ \(\d+\.\d+%\))', line))
+    samples = []
+    sample_counts = {}
+    timestamp = None
+    sample = None
+    section = None
+    labels = None
+    for line in output.splitlines():
+        stripped = line.strip()
+        if stripped.startswith('#time '):
+            timestamp = float(stripped.split()[1])
+        elif ' mounted on ' in line:
+            nfs_mount, mount_point = stripped.split(' mounted on ', 1)
+            mount_point = mount_point.rstrip(':')
+            index = sample_counts.get(mount_point, 0)
+            sample_counts[mount_point] = index + 1
+            sample = {'timestamp': timestamp, 'sample': index, 'nfs_mount': nfs_mount, 'mount_point': mount_point}
+            samples.append(sample)
+            section, labels = None, None
+        elif sample is None or not stripped:
+            continue
+        elif stripped.startswith('ops/s'):
+            section, labels = '', ['ops/s', 'rpc bklog']
+        elif stripped.startswith(('read:', 'write:')):
+            section, _, header = stripped.partition(':')
+            section += ' '
+            labels = re.split(r'\s{2,}', header.strip())
+        elif labels:
+            values = re.findall(r'(\d+) \([\d.]+%\)|(\d+(?:\.\d+)?)', stripped)
+            for label, (count, number) in zip(labels, values):
+                sample[section + label] = int(count) if count else float(number)
+            labels = None
+
+    first_timestamp = next((sample['timestamp'] for sample in samples if sample['timestamp'] is not None), None)
+    origin = window_start if window_start is not None else first_timestamp
+    for sample in samples:
+        if sample['timestamp'] is None:
+            # One interval per sample of the mount
+            sample['elapsed_s'] = sample['sample']
+            sample['in_fio_window'] = ''
+            continue
+        sample['elapsed_s'] = round(sample['timestamp'] - origin, 3)
+        # A sample covers the interval that ends at its timestamp
+        sample['in_fio_window'] = int(window_start is None or
+                                      (window_start < sample['timestamp'] <= (window_end or math.inf) + 1))
+        sample['timestamp'] = round(sample['timestamp'], 3)
 
-    # After you've processed all the lines, write the data to the CSV file
     with open(filename, 'w', newline='') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(headers)
-        # write data in chunks of len(headers)
-        for i in range(0, len(data), len(headers)):
-            writer.writerow(data[i: i + len(headers)])
+        writer = csv.DictWriter(csvfile, fieldnames=NFSIO_SERIES_HEADERS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(samples)
+
+    summary = []
+    for mount_point in sample_counts:
+        used = [sample for sample in samples if sample['mount_point'] == mount_point and sample['sample'] > 0 and
+                sample['in_fio_window'] != 0]
+        row = {'nfs_mount': next(sample['nfs_mount'] for sample in samples if sample['mount_point'] == mount_point),
+               'mount_point': mount_point, 'samples': len(used)}
+        if used:
+            row['ops/s mean'] = round(statistics.fmean(sample.get('ops/s', 0) for sample in used), 3)
+            row['rpc bklog mean'] = round(statistics.fmean(sample.get('rpc bklog', 0) for sample in used), 3)
+            row['rpc bklog max'] = max(sample.get('rpc bklog', 0) for sample in used)
+        for op in ('read', 'write'):
+            active = [sample for sample in used if sample.get(f'{op} ops/s')]
+            row[f'{op} retrans'] = sum(sample.get(f'{op} retrans', 0) for sample in used)
+            row[f'{op} errors'] = sum(sample.get(f'{op} errors', 0) for sample in used)
+            if not active:
+                continue
+            ops = sum(sample[f'{op} ops/s'] for sample in active)
+            row[f'{op} ops/s mean'] = round(ops / len(used), 3)
+            row[f'{op} kB/s mean'] = round(statistics.fmean(sample.get(f'{op} kB/s', 0) for sample in used), 3)
+            for metric in ('avg RTT (ms)', 'avg exe (ms)', 'avg queue (ms)'):
+                values = [(sample[f'{op} ops/s'], sample[f'{op} {metric}']) for sample in active
+                          if f'{op} {metric}' in sample]
+                if values:
+                    # Weighted by ops so idle seconds do not pull the mean down
+                    name = metric[len('avg '):]
+                    row[f'{op} {name} mean'] = round(sum(weight * value for weight, value in values) / ops, 3)
+                    row[f'{op} {name} max'] = max(value for _, value in values)
+        summary.append(row)
+
+    with open(filename.replace('nfsio_stats_', 'nfsio_summary_'), 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=NFSIO_SUMMARY_HEADERS)
+        writer.writeheader()
+        writer.writerows(summary)
+    return summary
+
+
+def read_mountstats(text: str) -> dict:
+    """
+    Reads the cumulative counters of every NFS mount from the contents of /proc/self/mountstats.
 
+    Args:
+        text (str): The contents of /proc/self/mountstats.
 
-def remote_checks(test_dir: str, num_testfiles: int, file_create_threads: int, skip_creation: typing.Union[bool, str],
-                  ip_address: str, files_per_job: int, dir_mode: typing.Union[bool, str], nrfiles: int) -> tuple:
+    Returns:
+        dict: (mount point, operation) mapped to its counters in MOUNTSTATS_OP_FIELDS order for the operations in
+        MOUNTSTATS_OPS, and (mount point, 'XPRT') mapped to the MOUNTSTATS_XPRT_FIELDS counters summed over all
+        connections of the mount, which there are several of with nconnect.
     """
-    This function is intended to be invoked on a remote server to ensure that the test environment is set up correctly.
+    counters = {}
+    mount_point = None
+    for line in text.splitlines():
+        if line.startswith('device '):
+            # device <export> mounted on <mount point> with fstype <type> [statvers=<version>]
+            words = line.split()
+            fstype = words[words.index('fstype') + 1] if 'fstype' in words else ''
+            mount_point = words[words.index('on') + 1] if fstype.startswith('nfs') else None
+            continue
+        if mount_point is None:
+            continue
+        name, sep, rest = line.strip().partition(':')
+        if not sep:
+            continue
+        if name == 'xprt':
+            words = rest.split()
+            # udp lacks the connect_count, connect_time and idle_time fields tcp and rdma have
+            offset = 3 if words[0] == 'udp' else 6
+            values = [int(value) for value in words[offset:offset + len(MOUNTSTATS_XPRT_FIELDS)]]
+            if len(values) < len(MOUNTSTATS_XPRT_FIELDS):
+                continue
+            total = counters.get((mount_point, 'XPRT'))
+            counters[(mount_point, 'XPRT')] = values if total is None else [a + b for a, b in zip(total, values)]
+        elif name in MOUNTSTATS_OPS:
+            values = [int(value) for value in rest.split()[:len(MOUNTSTATS_OP_FIELDS)]]
+            # Kernels before 4.19 do not count errors
+            values += [0] * (len(MOUNTSTATS_OP_FIELDS) - len(values))
+            counters[(mount_point, name)] = values
+    return counters
+
+
+def mountstats_columns(sampler: CounterSampler, window_start: typing.Optional[float] = None,
+                       window_end: typing.Optional[float] = None) -> tuple:
+    """
+    Turns the samples of a CounterSampler reading read_mountstats into a per interval time series and a summary per
+    mount and operation.
 
-    It performs checks such as verifying the existence of the test directory, checking that the number of file creation
-    threads is not greater than the CPU count, and confirming if NFS is mounted.
+    For operations, queue, RTT and execution times are averages per operation within the interval. For the 'XPRT'
+    rows ops counts RPCs sent, backlog is the average number of requests waiting for a transport slot when an RPC was
+    sent and outstanding the average number of requests in flight.
 
-    It also checks if private access rights are available in the absence of root privileges, and if the script is
-    instructed to skip file creation, it confirms the presence of all necessary files.
+    Args:
+        sampler (CounterSampler): A sampler that has been stopped.
+        window_start (Optional[float]): Epoch time fio started. Only intervals within the fio run are summarized.
+        window_end (Optional[float]): Epoch time fio finished.
 
-    The function returns a tuple: the first element is a boolean indicating if any argument errors were encountered,
-    and the second is a string describing the outcome of the checks.
+    Returns:
+        tuple: Columns for write_columnar keyed by MOUNTSTATS_SERIES_COLUMNS, and the summary rows keyed by
+        MOUNTSTATS_SUMMARY_HEADERS.
+    """
+    columns = {name: [] if name in ('mount_point', 'op') else array.array('d') for name in MOUNTSTATS_SERIES_COLUMNS}
+    origin = window_start if window_start is not None else (sampler.times[0] if sampler.count else 0.0)
+    totals = {}
+    for start, end, (mount_point, op), old, new in sampler.intervals():
+        seconds = end - start
+        deltas = [b - a for a, b in zip(old, new)]
+        # Counters go backwards when a mount is remade
+        if seconds <= 0 or min(deltas) < 0:
+            continue
+        in_window = window_start is None or (start < (window_end or math.inf) and end > window_start)
+        if op == 'XPRT':
+            counts = dict(zip(MOUNTSTATS_XPRT_FIELDS, deltas))
+            sends = counts['sends']
+            row = {'ops': sends, 'backlog': counts['bklog_u'] / sends if sends else 0.0,
+                   'outstanding': counts['req_u'] / sends if sends else 0.0}
+        else:
+            counts = dict(zip(MOUNTSTATS_OP_FIELDS, deltas))
+            ops = counts['ops']
+            row = {'ops': ops, 'retrans': counts['trans'] - ops, 'timeouts': counts['timeouts'],
+                   'errors': counts['errors'], 'sent_bytes': counts['bytes_sent'], 'recv_bytes': counts['bytes_recv']}
+            for name in ('queue_ms', 'rtt_ms', 'exe_ms'):
+                row[name] = counts[name] / ops if ops else 0.0
+        row.update({'timestamp': end, 'elapsed_s': end - origin, 'interval_s': seconds, 'in_fio_window': int(in_window),
+                    'mount_point': mount_point, 'op': op})
+        for name, values in columns.items():
+            values.append(row.get(name, math.nan if isinstance(values, array.array) else ''))
+
+        if not in_window:
+            continue
+        total = totals.setdefault((mount_point, op), {'intervals': 0, 'seconds': 0.0, 'counts': [0] * len(deltas),
+                                                      'rtt_ms_max': 0.0, 'exe_ms_max': 0.0, 'backlog_max': 0.0})
+        total['intervals'] += 1
+        total['seconds'] += seconds
+        total['counts'] = [a + b for a, b in zip(total['counts'], deltas)]
+        for name in ('rtt_ms', 'exe_ms', 'backlog'):
+            if name in row:
+                total[f'{name}_max'] = max(total[f'{name}_max'], row[name])
+
+    summary = []
+    for (mount_point, op), total in sorted(totals.items()):
+        row = {'mount_point': mount_point, 'op': op, 'intervals': total['intervals']}
+        if op == 'XPRT':
+            counts = dict(zip(MOUNTSTATS_XPRT_FIELDS, total['counts']))
+            sends = counts['sends']
+            row.update({'ops': sends, 'backlog_mean': round(counts['bklog_u'] / sends, 3) if sends else 0.0,
+                        'backlog_max': round(total['backlog_max'], 3),
+                        'outstanding_mean': round(counts['req_u'] / sends, 3) if sends else 0.0})
+        else:
+            counts = dict(zip(MOUNTSTATS_OP_FIELDS, total['counts']))
+            ops = counts['ops']
+            if not ops and not counts['timeouts']:
+                continue
+            row.update({'ops': ops, 'retrans': counts['trans'] - ops, 'timeouts': counts['timeouts'],
+                        'errors': counts['errors'], 'rtt_ms_max': round(total['rtt_ms_max'], 3),
+                        'exe_ms_max': round(total['exe_ms_max'], 3)})
+            for name in ('rtt_ms', 'exe_ms', 'queue_ms'):
+                row[f'{name}_mean'] = round(counts[name] / ops, 3) if ops else 0.0
+        row['ops/s'] = round(row['ops'] / total['seconds'], 3) if total['seconds'] else 0.0
+        summary.append(row)
+    return columns, summary
+
+
+def start_mountstats(run_timestamp: str, output_dir: str, interval: float, capacity: int) -> str:
+    """
+    Starts sampling /proc/self/mountstats in the agent, the in-process alternative to start_nfsio_stats.
 
     Args:
-        test_dir (str): The directory path where the tests will be performed.
-        num_testfiles (int): The number of test files to be created.
-        file_create_threads (int): The number of threads to be used for creating files.
-        skip_creation (bool): Boolean value indicating whether to skip file creation.
-        ip_address (str): The IP address of the remote machine.
-        files_per_job (int): The number of files to assign per job.
-        dir_mode (bool): Boolean value indicating use of directory mode over filename mode.
-        nrfiles (int): The number of file to share in a directory for directory mode.
+        run_timestamp (str): A timestamp string which gets included in the output filename.
+        output_dir (str): Directory where the output files will be saved.
+        interval (float): Seconds between samples.
+        capacity (int): Samples the ring buffer holds.
 
     Returns:
-        tuple: A tuple containing a boolean indicating whether any argument error occurred, and a string representing
-        the result of the remote checks.
+        str: The full path of the time series file, or an empty string if sampling is already running.
     """
-    num_testfiles = int(num_testfiles)
-    file_create_threads = int(file_create_threads)
-    skip_creation = eval(skip_creation)
-    files_per_job = int(files_per_job)
-    dir_mode = eval(dir_mode)
-    nrfiles = int(nrfiles)
+    global mountstats_sampler
 
-    arg_error = False
+    if mountstats_sampler is not None:
+        print('Error: mountstats sampling is already running')
+        return ''
 
-    check_result_str = ''
+    os.makedirs(output_dir, exist_ok=True)
+    def read() -> dict:
+        with open('/proc/self/mountstats') as file:
+            return read_mountstats(file.read())
 
-    # Checks for root to later check permissions
-    is_root_privilege = True
-    if not os.getuid() == 0:
-        check_result_str += f"WARN: {ip_address}: Script doesn't have root privileges cannot perform all checks\n"
-        is_root_privilege = False
+    mountstats_sampler = CounterSampler(read, interval, capacity)
+    mountstats_sampler.start()
+    return os.path.join(output_dir, f'mountstats_{run_timestamp}.col')
 
-    # Check test_dir
-    test_dir_present = True
-    if not os.path.isdir(test_dir):
-        check_result_str += f"ERROR: {ip_address}: test_dir: The directory {test_dir} does not exist.\n"
-        arg_error = True
-        test_dir_present = False
 
-    server_dir = f'{test_dir}/{ip_address}'
-    if test_dir_present and not os.path.isdir(server_dir):
-        try:
-            os.mkdir(server_dir)
-        except Exception as e:
-            print(f'Error: {ip_address}: An error occurred while creating directory: {str(e)}\n')
-            arg_error = True
+def stop_mountstats(filename: str, window_start: typing.Optional[float] = None,
+                    window_end: typing.Optional[float] = None) -> list:
+    """
+    Stops mountstats sampling and writes the time series to filename as a columnar file and the summary next to it
+    as mountstats_summary_<timestamp>.csv.
 
-    # Check test_dir has an NFS filesystem mounted
-    if not is_nfs_mount(test_dir):
-        check_result_str += f"ERROR: {ip_address}: test_dir: {test_dir} does not have an NFS filesystem mounted\n"
-        arg_error = True
+    Args:
+        filename (str): The path start_mountstats returned.
+        window_start (Optional[float]): Epoch time fio started, as seen by the controller.
+        window_end (Optional[float]): Epoch time fio finished, as seen by the controller.
 
-    # If not root see that access to mount point and existing files exists
-    if not is_root_privilege and test_dir_present:
-        check_result_str += (f"WARN: {ip_address}: Script doesn't have root privileges, checking non-root access "
-                             f"permissions\n")
-        if not test_nonroot_access(test_dir):
-            arg_error = True
+    Returns:
+        list: The summary rows, keyed by MOUNTSTATS_SUMMARY_HEADERS.
+    """
+    global mountstats_sampler
+
+    if mountstats_sampler is None:
+        print('Error: No mountstats sampling to stop')
+        return []
+
+    sampler, mountstats_sampler = mountstats_sampler, None
+    sampler.stop()
+    if sampler.count > sampler.capacity:
+        print(f'Warning: the mountstats ring buffer held {sampler.capacity} of {sampler.count} samples, the oldest '
+              f'were dropped')
+    columns, summary = mountstats_columns(sampler, window_start, window_end)
+    write_columnar(filename, columns)
+    with open(filename.replace('mountstats_', 'mountstats_summary_').replace('.col', '.csv'), 'w',
+              newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=MOUNTSTATS_SUMMARY_HEADERS)
+        writer.writeheader()
+        writer.writerows(summary)
+    return summary
+
+
+def read_host_counters(proc: str = '/proc') -> dict:
+    """
+    Reads the CPU, softirq, network, memory and pressure counters the host stats sampler keeps.
 
-    # Check that all files already exist if you are asking to bypass file creation
-    if skip_creation:
-        files_per_job = int(files_per_job)
+    Args:
+        proc (str): Where procfs is mounted.
+
+    Returns:
+        dict: ('cpu', name) mapped to the HOST_CPU_FIELDS ticks of the whole system ('cpu') and of every core,
+        ('softirq', type) to the count of every core for the types in HOST_SOFTIRQS, ('net', interface) to
+        HOST_NET_FIELDS, ('mem', 'meminfo') to HOST_MEM_FIELDS in kB and ('pressure', resource) to the total
+        microseconds some and all tasks stalled. Files the kernel does not have, such as pressure before 4.20, are
+        left out.
+    """
+    counters = {}
+    with open(os.path.join(proc, 'stat')) as file:
+        for line in file:
+            if not line.startswith('cpu'):
+                break
+            words = line.split()
+            counters[('cpu', words[0])] = [int(value) for value in words[1:len(HOST_CPU_FIELDS) + 1]]
+
+    with open(os.path.join(proc, 'softirqs')) as file:
+        cpus = len(file.readline().split())
+        for line in file:
+            name, _, values = line.partition(':')
+            if name.strip() in HOST_SOFTIRQS:
+                counters[('softirq', name.strip())] = [int(value) for value in values.split()[:cpus]]
+
+    with open(os.path.join(proc, 'net/dev')) as file:
+        for line in file.readlines()[2:]:
+            name, _, values = line.partition(':')
+            if name.strip() == 'lo':
+                continue
+            values = values.split()
+            # rx bytes, packets, errs, drop, fifo, frame, compressed, multicast, then tx bytes, packets, errs, drop
+            counters[('net', name.strip())] = [int(values[index]) for index in (0, 1, 3, 8, 9, 11)]
+
+    meminfo = {}
+    with open(os.path.join(proc, 'meminfo')) as file:
+        for line in file:
+            name, _, value = line.partition(':')
+            meminfo[name] = int(value.split()[0])
+    counters[('mem', 'meminfo')] = [meminfo.get(name, 0) for name in HOST_MEM_FIELDS]
+
+    for resource in ('cpu', 'memory', 'io'):
+        try:
+            with open(os.path.join(proc, 'pressure', resource)) as file:
+                totals = dict((line.split()[0], int(line.rsplit('total=', 1)[1])) for line in file if 'total=' in line)
+        except OSError:
+            continue
+        counters[('pressure', resource)] = [totals.get('some', 0), totals.get('full', 0)]
+    return counters
+
+
+def read_diskstats(proc: str = '/proc', sys_block: str = '/sys/block') -> dict:
+    """
+    Reads the I/O counters of every whole block device from /proc/diskstats. Partitions, loop and ram devices are
+    left out.
+
+    Args:
+        proc (str): Where procfs is mounted.
+        sys_block (str): Where the block devices are listed in sysfs.
+
+    Returns:
+        dict: ('disk', device) mapped to its HOST_DISK_FIELDS counters for physical devices, and ('vdisk', device) for
+        md and device mapper volumes built on other devices, so totals can leave them out and not count I/O twice.
+    """
+    whole = set(os.listdir(sys_block)) if os.path.isdir(sys_block) else None
+    counters = {}
+    with open(os.path.join(proc, 'diskstats')) as file:
+        for line in file:
+            words = line.split()
+            name = words[2]
+            if name.startswith(('loop', 'ram')) or (whole is not None and name not in whole):
+                continue
+            stacked = os.path.isdir(os.path.join(sys_block, name, 'slaves')) and \
+                bool(os.listdir(os.path.join(sys_block, name, 'slaves')))
+            counters[('vdisk' if stacked else 'disk', name)] = [int(value) for value in
+                                                                 words[3:3 + len(HOST_DISK_FIELDS)]]
+    return counters
+
+
+def host_stats_columns(sampler: CounterSampler, window_start: typing.Optional[float] = None,
+                       window_end: typing.Optional[float] = None, nic_gbps: float = 0.0) -> tuple:
+    """
+    Turns the samples of a CounterSampler reading read_host_counters into a per interval time series and a summary
+    of the fio window with a guess at what limited the client.
+
+    The time series has one row per interval and metric, for example group 'cpu', name 'cpu3', metric 'softirq_pct'.
+    When the sampler also read read_diskstats, the summary has the utilisation, throughput and latency of every
+    volume under 'disks' and the total physical disk throughput under 'disk_mib_s'.
+
+    Args:
+        sampler (CounterSampler): A sampler that has been stopped.
+        window_start (Optional[float]): Epoch time fio started. Only intervals within the fio run are summarized.
+        window_end (Optional[float]): Epoch time fio finished.
+        nic_gbps (float): Line rate of the client NIC in Gbit/s. 0 if unknown.
+
+    Returns:
+        tuple: Columns for write_columnar keyed by HOST_SERIES_COLUMNS, and a dict summarizing CPU, NIC, memory and
+        pressure over the fio window, with the host_bottleneck guess under 'bottleneck'.
+    """
+    columns = {name: [] if name in ('group', 'name', 'metric') else array.array('d') for name in HOST_SERIES_COLUMNS}
+    origin = window_start if window_start is not None else (sampler.times[0] if sampler.count else 0.0)
+    window = {}
+    cpu_totals = {}
+    drops = 0
+
+    def add(end: float, in_window: bool, group: str, name: str, metric: str, value: float) -> None:
+        for column, item in zip(HOST_SERIES_COLUMNS, (end, end - origin, int(in_window), group, name, metric, value)):
+            columns[column].append(item)
+        if in_window:
+            window.setdefault((group, name, metric), []).append(value)
+
+    for start, end, (group, name), old, new in sampler.intervals():
+        seconds = end - start
+        if seconds <= 0:
+            continue
+        in_window = window_start is None or (start < (window_end or math.inf) and end > window_start)
+        deltas = [max(0, b - a) for a, b in zip(old, new)]
+        if group == 'cpu':
+            ticks = dict(zip(HOST_CPU_FIELDS, deltas))
+            total = sum(deltas)
+            if not total:
+                continue
+            busy = total - ticks['idle'] - ticks['iowait']
+            add(end, in_window, group, name, 'busy_pct', 100 * busy / total)
+            for field in ('user', 'system', 'iowait', 'softirq', 'steal'):
+                add(end, in_window, group, name, f'{field}_pct', 100 * ticks[field] / total)
+            if in_window:
+                totals = cpu_totals.setdefault(name, [0, 0, 0])
+                totals[0] += total
+                totals[1] += busy
+                totals[2] += ticks['softirq']
+        elif group == 'softirq':
+            add(end, in_window, group, name, 'per_s', sum(deltas) / seconds)
+            add(end, in_window, group, name, 'max_cpu_per_s', max(deltas) / seconds)
+        elif group == 'net':
+            for field, delta in zip(HOST_NET_FIELDS, deltas):
+                add(end, in_window, group, name, f'{field}_per_s', delta / seconds)
+            if in_window:
+                drops += deltas[HOST_NET_FIELDS.index('rx_drop')] + deltas[HOST_NET_FIELDS.index('tx_drop')]
+        elif group == 'mem':
+            for field, value in zip(HOST_MEM_FIELDS, new):
+                add(end, in_window, group, name, f'{field}_mb', value / 1024)
+        elif group == 'pressure':
+            add(end, in_window, group, name, 'some_pct', deltas[0] / seconds / 1e4)
+            add(end, in_window, group, name, 'full_pct', deltas[1] / seconds / 1e4)
+        elif group in ('disk', 'vdisk'):
+            counts = dict(zip(HOST_DISK_FIELDS, deltas))
+            ios = counts['reads'] + counts['writes']
+            add(end, in_window, group, name, 'util_pct', min(100.0, counts['io_ms'] / seconds / 10))
+            add(end, in_window, group, name, 'read_mib_s', counts['sectors_read'] * 512 / seconds / (1024 ** 2))
+            add(end, in_window, group, name, 'write_mib_s', counts['sectors_written'] * 512 / seconds / (1024 ** 2))
+            add(end, in_window, group, name, 'iops', ios / seconds)
+            add(end, in_window, group, name, 'await_ms', (counts['read_ms'] + counts['write_ms']) / ios if ios else 0.0)
+            add(end, in_window, group, name, 'queue_depth', counts['weighted_ms'] / seconds / 1000)
+
+    def mean(group: str, name: str, metric: str) -> float:
+        values = window.get((group, name, metric))
+        return round(statistics.fmean(values), 2) if values else 0.0
+
+    def peak(group: str, name: str, metric: str) -> float:
+        values = window.get((group, name, metric))
+        return round(max(values), 2) if values else 0.0
+
+    # Interfaces are added up, each interval on its own so the peak is that of the total
+    net = {}
+    for (group, name, metric), values in window.items():
+        if group == 'net':
+            sums = net.setdefault(metric, [0.0] * len(values))
+            for index, value in enumerate(values[:len(sums)]):
+                sums[index] += value
+    cores = {name: totals for name, totals in cpu_totals.items() if name != 'cpu' and totals[0]}
+    hottest = max(cores.items(), key=lambda item: item[1][1] / item[1][0], default=(None, [1, 0, 0]))
+    summary = {
+        'cpus': len(cores),
+        'cpu_busy_mean': mean('cpu', 'cpu', 'busy_pct'),
+        'cpu_busy_max': peak('cpu', 'cpu', 'busy_pct'),
+        'cpu_iowait_mean': mean('cpu', 'cpu', 'iowait_pct'),
+        'cpu_softirq_mean': mean('cpu', 'cpu', 'softirq_pct'),
+        'cpu_steal_mean': mean('cpu', 'cpu', 'steal_pct'),
+        'hottest_core': hottest[0] or '',
+        'hottest_core_busy': round(100 * hottest[1][1] / hottest[1][0], 2),
+        'hottest_core_softirq': round(100 * hottest[1][2] / hottest[1][0], 2),
+        'net_rx_gbps_mean': round(statistics.fmean(net['rx_bytes_per_s']) * 8 / 1e9, 3) if net else 0.0,
+        'net_rx_gbps_max': round(max(net['rx_bytes_per_s']) * 8 / 1e9, 3) if net else 0.0,
+        'net_tx_gbps_mean': round(statistics.fmean(net['tx_bytes_per_s']) * 8 / 1e9, 3) if net else 0.0,
+        'net_tx_gbps_max': round(max(net['tx_bytes_per_s']) * 8 / 1e9, 3) if net else 0.0,
+        'net_drops': drops,
+        'mem_available_min_mb': round(min(window.get(('mem', 'meminfo', 'MemAvailable_mb'), [0.0])), 1),
+        'mem_dirty_max_mb': peak('mem', 'meminfo', 'Dirty_mb'),
+        'psi_cpu_some': mean('pressure', 'cpu', 'some_pct'),
+        'psi_memory_full': mean('pressure', 'memory', 'full_pct'),
+        'psi_io_some': mean('pressure', 'io', 'some_pct'),
+        'psi_io_full': mean('pressure', 'io', 'full_pct'),
+    }
+    disks = sorted({(group, name) for group, name, _ in window if group in ('disk', 'vdisk')})
+    if disks:
+        summary['disks'] = {name: {
+            'virtual': group == 'vdisk',
+            'util_mean': mean(group, name, 'util_pct'),
+            'util_max': peak(group, name, 'util_pct'),
+            'read_mib_s': mean(group, name, 'read_mib_s'),
+            'write_mib_s': mean(group, name, 'write_mib_s'),
+            'iops': mean(group, name, 'iops'),
+            'await_ms': mean(group, name, 'await_ms'),
+        } for group, name in disks}
+        # Volumes built on other devices are left out so no I/O is counted twice
+        summary['disk_mib_s'] = round(sum(disk['read_mib_s'] + disk['write_mib_s']
+                                          for disk in summary['disks'].values() if not disk['virtual']), 2)
+    summary['bottleneck'] = host_bottleneck(summary, nic_gbps)
+    return columns, summary
+
+
+def host_bottleneck(summary: dict, nic_gbps: float = 0.0) -> str:
+    """
+    Guesses what limited a client from its host stats summary. The thresholds are rules of thumb: a client that is
+    none of these is most likely waiting on storage.
+
+    Args:
+        summary (dict): A summary from host_stats_columns.
+        nic_gbps (float): Line rate of the client NIC in Gbit/s. 0 if unknown, which leaves out the NIC check.
+
+    Returns:
+        str: 'cpu', 'softirq core', 'nic', 'memory' or 'none'.
+    """
+    if summary['cpu_busy_mean'] >= 90 or summary['psi_cpu_some'] >= 50:
+        return 'cpu'
+    # Network interrupts pinned to one core saturate it long before the rest of the client is busy
+    if summary['hottest_core_busy'] >= 95 and summary['hottest_core_softirq'] >= 30:
+        return 'softirq core'
+    if nic_gbps and max(summary['net_rx_gbps_max'], summary['net_tx_gbps_max']) >= 0.9 * nic_gbps:
+        return 'nic'
+    if summary['psi_memory_full'] >= 10:
+        return 'memory'
+    return 'none'
+
+
+def server_imbalance(summaries: dict) -> dict:
+    """
+    Compares the storage servers of a run with each other.
+
+    Args:
+        summaries (dict): Server IP mapped to its host_stats_columns summary with disks.
+
+    Returns:
+        dict: 'disk_imbalance', the busiest server's physical disk throughput over the mean of all servers (1.0 when
+        they are even), 'busiest_server', 'hottest_volume' as server:device with the highest mean utilisation and
+        'hottest_volume_util', its utilisation in percent. Empty if no server reported disks.
+    """
+    throughput = {server: summary.get('disk_mib_s', 0.0) for server, summary in summaries.items()
+                  if summary.get('disks')}
+    if not throughput:
+        return {}
+    volumes = [(disk['util_mean'], f'{server}:{device}') for server, summary in summaries.items()
+               for device, disk in summary.get('disks', {}).items() if not disk['virtual']]
+    mean = statistics.fmean(throughput.values())
+    busiest = max(throughput, key=throughput.get)
+    util, volume = max(volumes, default=(0.0, ''))
+    return {'disk_imbalance': round(throughput[busiest] / mean, 3) if mean else 1.0, 'busiest_server': busiest,
+            'hottest_volume': volume, 'hottest_volume_util': util}
+
+
+def write_server_stats(path: str, summaries: dict) -> None:
+    """
+    Writes the storage server summaries of a run to a CSV file, one row per server with device '*' for its totals
+    followed by a row per volume.
+
+    Args:
+        path (str): The CSV file.
+        summaries (dict): Server IP mapped to its host_stats_columns summary with disks.
+
+    Returns:
+        None
+    """
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=SERVER_STATS_HEADERS, extrasaction='ignore')
+        writer.writeheader()
+        for server, summary in sorted(summaries.items()):
+            physical = [disk for disk in summary.get('disks', {}).values() if not disk['virtual']]
+            writer.writerow(dict(summary, server=server, device='*',
+                                 read_mib_s=round(sum(disk['read_mib_s'] for disk in physical), 2),
+                                 write_mib_s=round(sum(disk['write_mib_s'] for disk in physical), 2),
+                                 iops=round(sum(disk['iops'] for disk in physical), 2)))
+            for device, disk in sorted(summary.get('disks', {}).items()):
+                writer.writerow(dict(disk, server=server, device=device))
+
+
+def start_host_stats(run_timestamp: str, output_dir: str, interval: float, capacity: int,
+                     disks: bool = False) -> str:
+    """
+    Starts sampling the host counters of read_host_counters in the agent.
+
+    Args:
+        run_timestamp (str): A timestamp string which gets included in the output filename.
+        output_dir (str): Directory where the output file will be saved.
+        interval (float): Seconds between samples.
+        capacity (int): Samples the ring buffer holds.
+        disks (bool): Also sample read_diskstats, as done on the storage servers.
+
+    Returns:
+        str: The full path of the time series file, or an empty string if sampling is already running.
+    """
+    global host_stats_sampler
+
+    if host_stats_sampler is not None:
+        print('Error: host stats sampling is already running')
+        return ''
+
+    os.makedirs(output_dir, exist_ok=True)
+    def read() -> dict:
+        counters = read_host_counters()
+        if disks:
+            counters.update(read_diskstats())
+        return counters
+
+    host_stats_sampler = CounterSampler(read, interval, capacity)
+    host_stats_sampler.start()
+    return os.path.join(output_dir, f'host_stats_{run_timestamp}.col')
+
+
+def stop_host_stats(filename: str, window_start: typing.Optional[float] = None,
+                    window_end: typing.Optional[float] = None, nic_gbps: float = 0.0) -> dict:
+    """
+    Stops host stats sampling and writes the time series to filename as a columnar file and the summary next to it
+    as host_summary_<timestamp>.json.
+
+    Args:
+        filename (str): The path start_host_stats returned.
+        window_start (Optional[float]): Epoch time fio started, as seen by the controller.
+        window_end (Optional[float]): Epoch time fio finished, as seen by the controller.
+        nic_gbps (float): Line rate of the client NIC in Gbit/s. 0 if unknown.
+
+    Returns:
+        dict: The summary from host_stats_columns, empty if nothing was running.
+    """
+    global host_stats_sampler
+
+    if host_stats_sampler is None:
+        print('Error: No host stats sampling to stop')
+        return {}
+
+    sampler, host_stats_sampler = host_stats_sampler, None
+    sampler.stop()
+    columns, summary = host_stats_columns(sampler, window_start, window_end, nic_gbps)
+    write_columnar(filename, columns)
+    with open(filename.replace('host_stats_', 'host_summary_').replace('.col', '.json'), 'w') as file:
+        json.dump(summary, file, indent=2)
+    return summary
+
+
+def remote_checks(test_dir: str, num_testfiles: int, file_create_threads: int, skip_creation: bool, ip_address: str,
+                  files_per_job: int, dir_mode: bool, nrfiles: int) -> tuple:
+    """
+    This function is intended to be invoked on a remote server to ensure that the test environment is set up correctly.
+
+    It performs checks such as verifying the existence of the test directory, checking that the number of file creation
+    threads is not greater than the CPU count, and confirming if NFS is mounted.
+
+    It also checks if private access rights are available in the absence of root privileges, and if the script is
+    instructed to skip file creation, it confirms the presence of all necessary files.
+
+    The function returns a tuple: the first element is a boolean indicating if any argument errors were encountered,
+    and the second is a string describing the outcome of the checks.
+
+    Args:
+        test_dir (str): The directory path where the tests will be performed.
+        num_testfiles (int): The number of test files to be created.
+        file_create_threads (int): The number of threads to be used for creating files.
+        skip_creation (bool): Boolean value indicating whether to skip file creation.
+        ip_address (str): The IP address of the remote machine.
+        files_per_job (int): The number of files to assign per job.
+        dir_mode (bool): Boolean value indicating use of directory mode over filename mode.
+        nrfiles (int): The number of file to share in a directory for directory mode.
+
+    Returns:
+        tuple: A tuple containing a boolean indicating whether any argument error occurred, and a string representing
+        the result of the remote checks.
+    """
+    arg_error = False
+
+    check_result_str = ''
+
+    # Checks for root to later check permissions
+    is_root_privilege = True
+    if not os.getuid() == 0:
+        check_result_str += f"WARN: {ip_address}: Script doesn't have root privileges cannot perform all checks\n"
+        is_root_privilege = False
+
+    # Check test_dir
+    test_dir_present = True
+    if not os.path.isdir(test_dir):
+        check_result_str += f"ERROR: {ip_address}: test_dir: The directory {test_dir} does not exist.\n"
+        arg_error = True
+        test_dir_present = False
+
+    server_dir = f'{test_dir}/{ip_address}'
+    if test_dir_present and not os.path.isdir(server_dir):
+        try:
+            os.mkdir(server_dir)
+        except Exception as e:
+            print(f'Error: {ip_address}: An error occurred while creating directory: {str(e)}\n')
+            arg_error = True
+
+    # Check test_dir has an NFS filesystem mounted
+    if not is_nfs_mount(test_dir):
+        check_result_str += f"ERROR: {ip_address}: test_dir: {test_dir} does not have an NFS filesystem mounted\n"
+        arg_error = True
+
+    # If not root see that access to mount point and existing files exists
+    if not is_root_privilege and test_dir_present:
+        check_result_str += (f"WARN: {ip_address}: Script doesn't have root privileges, checking non-root access "
+                             f"permissions\n")
+        if not test_nonroot_access(test_dir):
+            arg_error = True
+
+    # Check that all files already exist if you are asking to bypass file creation
+    if skip_creation:
+        files_per_job = int(files_per_job)
         number_jobs = num_testfiles // files_per_job
         all_files_present = True
         if dir_mode:
@@ -1146,7 +3560,9 @@ def remote_checks(test_dir: str, num_testfiles: int, file_create_threads: int, s
     return arg_error, check_result_str
 
 
-def generate_fio_jobfiles(args: argparse.Namespace, directory: str) -> typing.Optional[dict]:
+def generate_fio_jobfiles(args: argparse.Namespace, directory: str, start_at: typing.Optional[float] = None,
+                          clock_offsets: typing.Optional[dict] = None,
+                          log_prefix: typing.Optional[str] = None) -> typing.Optional[dict]:
     """
     Generates FIO (Flexible I/O Tester) job files based on the provided parameters.
 
@@ -1160,9 +3576,18 @@ def generate_fio_jobfiles(args: argparse.Namespace, directory: str) -> typing.Op
     attributes used for jobfile creation: file_size, block_size, queue_depth, run_time, io_engine, fio_numjobs,
     io_direction, rw_mixread, test_dir, num_testfiles, files_per_job, ips, and test_name.
 
+    With start_at, every job sleeps in exec_prerun until that moment, translated to the client's own clock with
+    clock_offsets, so all clients start together. fio sets the job's epoch after exec_prerun, so the wait is not
+    counted in the runtime.
+
     Args:
         args (Any): An object containing the arguments for generating the job files. It should contain the
         directory (str): The directory where the job files will be created.
+        start_at (Optional[float]): Controller epoch time the jobs should start at.
+        clock_offsets (Optional[dict]): Results of measure_clock_offsets. Clients missing from it are assumed to be
+            in sync with the controller.
+        log_prefix (Optional[str]): Enables fio's bandwidth, IOPS and latency logs, averaged over args.log_avg_msec,
+            under this file name prefix.
 
     Returns:
         dict: A dictionary with IP addresses as keys and corresponding job file paths as values.
@@ -1211,6 +3636,22 @@ time_based"""
     if args.loops:
         base_jobfile += f"\nloops={args.loops}"
 
+    # With group_reporting the criterion applies to all jobs of a client together. run_time becomes the upper bound
+    if args.steady_state:
+        base_jobfile += f"""
+steadystate={args.steady_state}
+steadystate_duration={args.ss_dur}
+steadystate_ramp_time={args.ss_ramp}"""
+
+    # Logs are stamped with the epoch so the clients can be put on one timeline by fio_log_timeline
+    if log_prefix:
+        base_jobfile += f"""
+write_bw_log={log_prefix}
+write_iops_log={log_prefix}
+write_lat_log={log_prefix}
+log_avg_msec={args.log_avg_msec}
+log_unix_epoch=1"""
+
     # Determine if mixed workload was selected and use rwmixread to set percentages
     if args.io_direction in ['rw', 'readwrite', 'randrw']:
         base_jobfile += f"""
@@ -1226,6 +3667,11 @@ rw={args.io_direction}
     number_jobs = int(args.num_testfiles / args.files_per_job)
     for ip in args.ips:
         jobfile_text = base_jobfile  # Copy the base jobfile
+        if start_at is not None:
+            # Applies to every job of the [global] section. No semicolons, fio reads them as the start of a comment
+            local_start = start_at + (clock_offsets or {}).get(ip, {}).get('offset_s', 0.0)
+            jobfile_text += (f"\nexec_prerun=python3 -c \"__import__('time').sleep(max(0, {local_start:.6f} - "
+                             f"__import__('time').time()))\"\n")
         for i in range(1, number_jobs + 1):
             if args.use_directory_mode:
                 jobfile_text += f"""
@@ -1264,42 +3710,444 @@ filename={filenames}
     return ip_file_dict
 
 
-def run_fio_command(command: str) -> tuple:
+def write_mpi_hostfile(ips: typing.Sequence[str], slots: int, path: str) -> str:
+    """
+    Writes an Open MPI hostfile giving every client the same number of slots.
+
+    Args:
+        ips (Sequence[str]): The clients.
+        slots (int): Processes per client.
+        path (str): The hostfile to write.
+
+    Returns:
+        str: The path of the hostfile.
+    """
+    with open(path, 'w') as file:
+        file.writelines(f'{ip} slots={slots}\n' for ip in ips)
+    return path
+
+
+def generate_engine_commands(args: argparse.Namespace, hostfile: str) -> list:
+    """
+    Builds the mpirun command lines of an IOR, mdtest or IO500 test point from the same arguments fio jobfiles are
+    generated from. fio_numjobs is the number of processes per client, block_size the transfer size and file_size the
+    size of every process's file. run_time becomes the stonewall, so a write phase stops after that many seconds and
+    the read phase reads back what was written.
+
+    IOR reads need files to read, so every IOR point writes first and reads only if io_direction includes reads.
+    Random directions add IOR's -z. The summaries are printed as JSON on stdout, which mpirun brings back from the
+    first rank wherever it runs.
+
+    Args:
+        args (argparse.Namespace): The arguments of the test point.
+        hostfile (str): The hostfile from write_mpi_hostfile.
+
+    Returns:
+        list: (phase, command) for every phase to run, in order.
+    """
+    tasks = args.fio_numjobs * len(args.ips)
+    mpirun = f'{args.mpirun} -n {tasks} --hostfile {hostfile} {args.mpi_args}'.rstrip()
+    if args.engine == 'ior':
+        reads = args.io_direction not in ('write', 'randwrite', 'trim', 'randtrim')
+        base = (f'{mpirun} {args.ior_path} -o {args.test_dir}/ior/file -a POSIX -F -C -e -t {args.block_size} '
+                f'-b {convert_size(args.file_size)}{" -z" if args.io_direction.startswith("rand") else ""} '
+                f'-O stoneWallingStatusFile={args.test_dir}/ior/stonewall -O summaryFormat=JSON')
+        # Files are removed after the last phase
+        write = f'{base} -w -O useO_DIRECT=1,keepFile={int(reads)}'
+        if args.run_time:
+            write += f' -D {args.run_time} -O stoneWallingWearOut=1'
+        phases = [('write', write)]
+        if reads:
+            phases.append(('read', f'{base} -r -O useO_DIRECT=1'))
+        return phases
+    if args.engine == 'mdtest':
+        command = f'{mpirun} {args.mdtest_path} -d {args.test_dir}/mdtest -n {args.mdtest_items} -F -u -P'
+        if args.run_time:
+            command += f' -W {args.run_time}'
+        return [('mdtest', command)]
+    return [('io500', f'{mpirun} {args.io500_path} {args.io500_config}')]
+
+
+def ior_json_document(text: str) -> typing.Optional[dict]:
+    """
+    Finds the JSON summary IOR writes with -O summaryFormat=JSON, alone in a summaryFile or amid other output on
+    stdout.
+
+    Args:
+        text (str): The file or output.
+
+    Returns:
+        Optional[dict]: The last JSON document that starts at the beginning of a line, or None if there is none.
+    """
+    document = None
+    for match in re.finditer(r'^\{', text, re.M):
+        try:
+            document, _ = json.JSONDecoder().raw_decode(text, match.start())
+        except ValueError:
+            continue
+    return document
+
+
+def ior_result_rows(document: dict, log_text: str = '', clients: typing.Optional[int] = None) -> list:
+    """
+    Turns an IOR JSON summary into one row per operation and iteration, with how the stonewall played out.
+
+    With -D, IOR stops every task at the deadline and, with stoneWallingWearOut, lets them all catch up to the task
+    that got furthest. The summary holds the mean progress of the tasks at the deadline and the total moved once all
+    caught up, which is the furthest task's progress times the number of tasks. The console output adds the slowest
+    task's progress on its "stonewalling pairs accessed" line. task_spread_pct is how far the slowest task, or the
+    mean task without the console output, was behind the furthest one at the deadline.
+
+    Args:
+        document (dict): The IOR JSON summary.
+        log_text (str): The console output of the same run, if it was kept.
+        clients (Optional[int]): Clients the point was meant for. Defaults to the node count IOR reports, which is
+            lower when there are fewer threads than clients.
+
+    Returns:
+        list: Rows keyed by IOR_RESULT_HEADERS, without 'source' and 'test'.
+    """
+    stonewall = IOR_STONEWALL_PATTERN.search(log_text or '')
+    nodes = next((test.get('Parameters', {}).get('nodes') for test in document.get('tests', [])), None)
+    iterations = {}
+    for test in document.get('tests', []):
+        for result in itertools.chain.from_iterable(result if isinstance(result, list) else [result]
+                                                    for result in test.get('Results', [])):
+            iterations.setdefault(result.get('access'), []).append(result)
+
+    rows = []
+    for summary in document.get('summary', []):
+        op = summary['operation']
+        tasks = summary['numTasks']
+        transfer = summary['transferSize']
+        moved = summary.get('xsizeMiB', 0) * 1024 ** 2
+        pairs_max = moved / transfer / tasks if transfer and tasks else None
+        pairs_mean = pairs_min = None
+        stonewall_bytes = wearout = ''
+        if summary.get('StoneWallTime'):
+            # StoneWallbwMeanMIB is the mean rate of a single task up to the deadline
+            pairs_mean = summary.get('StoneWallbwMeanMIB', 0) * summary['StoneWallTime'] * 1024 ** 2 / transfer
+            stonewall_bytes = round(pairs_mean * transfer * tasks)
+            wearout = round(max(0.0, summary['MeanTime'] - summary['StoneWallTime']), 3)
+        if stonewall:
+            pairs_min, pairs_max = int(stonewall.group('min')), int(stonewall.group('max'))
+        behind = pairs_min if pairs_min is not None else pairs_mean
+        base = {
+            'clients': clients or nodes or '', 'threads': tasks, 'tasks_per_client': summary.get('tasksPerNode', ''),
+            'op': op,
+            'transfer_size': transfer, 'block_size': summary.get('blockSize', ''),
+            'stonewall_s': round(summary['StoneWallTime'], 3) if summary.get('StoneWallTime') else '',
+            'stonewall_bytes': stonewall_bytes, 'moved_bytes': round(moved), 'wearout_s': wearout,
+            'pairs_min': pairs_min if pairs_min is not None else '',
+            'pairs_mean': round(pairs_mean) if pairs_mean is not None else '',
+            'pairs_max': round(pairs_max) if pairs_max is not None else '',
+            'task_spread_pct': round(100 * (pairs_max - behind) / pairs_max, 2) if behind is not None and pairs_max
+            else ''}
+        for iteration, result in enumerate(iterations.get(op) or [{}], start=1):
+            rows.append(dict(base, iteration=iteration,
+                             bw_mib_s=round(result.get('bwMiB', summary['bwMeanMIB']), 3),
+                             ops=round(result.get('iops', summary['OPsMean']), 3),
+                             time_s=round(result.get('totalTime', summary['MeanTime']), 3)))
+    return rows
+
+
+def ior_point_clients(run_name: str) -> typing.Optional[int]:
+    """
+    Reads the client count from the name of an IOR scaling point, like scale-odirect-12-servers-1-threads-4k-write.
+
+    Args:
+        run_name (str): Name of the point, optionally below its log directory.
+
+    Returns:
+        Optional[int]: The client count, or None if the name is not one of an IOR scaling point.
+    """
+    match = IOR_LOG_NAME_PATTERN.match(os.path.basename(run_name))
+    return int(match.group('clients')) if match else None
+
+
+def parse_ior_output(text: str, clients: typing.Optional[int] = None) -> list:
+    """
+    Reads the JSON summary IOR prints with -O summaryFormat=JSON. Any other output around it is skipped.
+
+    Args:
+        text (str): The output of the IOR run.
+        clients (Optional[int]): Clients the run was spread over. Defaults to the node count IOR reports.
+
+    Returns:
+        list: One row keyed by ENGINE_RESULT_HEADERS for every operation of the summary.
+    """
+    document = ior_json_document(text) or {}
+    nodes = next((test.get('Parameters', {}).get('nodes') for test in document.get('tests', [])), None)
+    rows = []
+    for summary in document.get('summary', []):
+        rows.append({'engine': 'ior', 'phase': summary['operation'], 'op': summary['operation'],
+                     'bw_bytes': round(summary['bwMeanMIB'] * 1024 ** 2), 'iops': round(summary['OPsMean'], 2),
+                     'time_s': round(summary['MeanTime'], 3), 'tasks': summary['numTasks'],
+                     'clients': clients or nodes or '', 'bs': summary['transferSize'], 'valid': 1})
+    return rows
+
+
+def parse_mdtest_output(text: str, tasks: int, clients: int) -> list:
+    """
+    Reads the rate and time summary tables mdtest prints with -P.
+
+    Args:
+        text (str): The output of the mdtest run.
+        tasks (int): Processes the run used.
+        clients (int): Clients the run was spread over.
+
+    Returns:
+        list: One row keyed by ENGINE_RESULT_HEADERS for every operation, with the mean rate as IOPS.
+    """
+    tables = {}
+    table = None
+    for line in text.splitlines():
+        if line.startswith('SUMMARY'):
+            table = tables.setdefault('time' if line.startswith('SUMMARY time') else 'rate', {})
+            continue
+        match = re.match(r'^\s+(?P<name>[A-Za-z][A-Za-z ]*?)\s*:\s+[\d.]+\s+[\d.]+\s+(?P<mean>[\d.]+)', line)
+        if match and table is not None:
+            table[match.group('name').lower().replace(' ', '_')] = float(match.group('mean'))
+    return [{'engine': 'mdtest', 'phase': name, 'op': 'meta', 'bw_bytes': '', 'iops': round(rate, 2),
+             'time_s': tables.get('time', {}).get(name, ''), 'tasks': tasks, 'clients': clients, 'bs': '', 'valid': 1}
+            for name, rate in tables.get('rate', {}).items()]
+
+
+def run_engine_phases(args: argparse.Namespace, output_dir: str, run_timestamp: str, hostfile: str) -> str:
+    """
+    Runs the phases of an IOR, mdtest or IO500 test point under mpirun, keeps the output of every phase in
+    output_dir as <engine>_<phase>_<timestamp>.log and writes the parsed results to engine_results_<timestamp>.csv.
+    With --drop_caches the caches are dropped between phases, so IOR reads come from storage.
+
+    Args:
+        args (argparse.Namespace): The arguments of the test point.
+        output_dir (str): Directory the results of the point are written to.
+        run_timestamp (str): Timestamp of the point, used in file names.
+        hostfile (str): The hostfile from write_mpi_hostfile.
+
+    Returns:
+        str: The stderr of the phases that failed, empty if none did.
+    """
+    tasks = args.fio_numjobs * len(args.ips)
+    rows = []
+    errors = []
+    for index, (phase, command) in enumerate(generate_engine_commands(args, hostfile)):
+        if index and args.drop_caches:
+            cache_drop_barrier(args.ips + (args.server_ips if args.drop_server_caches else []), args.drop_wait_dirty,
+                               args.drop_timeout, os.path.join(output_dir, f'cache_drop_{phase}_{run_timestamp}.json'))
+        logger.info(f'Running command: {command}')
+        log_path = os.path.join(output_dir, f'{args.engine}_{phase}_{run_timestamp}.log')
+        with open(log_path, 'w') as log:
+            result = subprocess.run(command, shell=True, stdout=log, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            logger.error(f"Command '{command}' returned non-zero exit status {result.returncode}.")
+            errors.append(result.stderr)
+            continue
+        with open(log_path, errors='replace') as log:
+            output = log.read()
+        if args.engine == 'ior':
+            rows.extend(parse_ior_output(output, len(args.ips)))
+        elif args.engine == 'mdtest':
+            rows.extend(parse_mdtest_output(output, tasks, len(args.ips)))
+        else:
+            result = IO500Result()
+            result.tasks, result.clients = tasks, len(args.ips)
+            result.feed(os.path.basename(log_path), output)
+            rows.extend(result.rows())
+
+    with open(os.path.join(output_dir, f'engine_results_{run_timestamp}.csv'), 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=ENGINE_RESULT_HEADERS)
+        writer.writeheader()
+        writer.writerows(rows)
+    for row in rows:
+        measures = ([f'{row["bw_bytes"] / (1024 ** 3):.2f} GiB/s'] if row['bw_bytes'] != '' else []) + \
+            ([f'{row["iops"]:.0f} IOPS'] if row['iops'] != '' else [])
+        logger.info(f'{args.engine} {row["phase"]}: {", ".join(measures)}{"" if row["valid"] else " (invalid)"}')
+    return '\n'.join(errors)
+
+
+def parse_engine_results(text: str) -> list:
+    """
+    Reads an engine_results_<timestamp>.csv file written by run_engine_phases.
+
+    Args:
+        text (str): Contents of the file.
+
+    Returns:
+        list: The rows, keyed by ENGINE_RESULT_HEADERS, with bandwidth, IOPS and time converted back to numbers.
+    """
+    rows = []
+    for row in csv.DictReader(io.StringIO(text)):
+        for key in ('bw_bytes', 'iops', 'time_s'):
+            row[key] = float(row[key]) if row[key] else ''
+        rows.append(row)
+    return rows
+
+
+def run_fio_command(command: str, raw_json: str, on_element: typing.Optional[typing.Callable] = None,
+                    on_document: typing.Optional[typing.Callable] = None, cwd: typing.Optional[str] = None) -> tuple:
     """
-    Executes the given command using Python's subprocess module.
+    Executes the given fio command and streams its output through a FioJsonStream.
 
-    The function captures stdout and stderr from the executed command. It then splits the stdout lines and seeks
-    for the start of JSON data. If the JSON data is correctly formed, it is parsed and returned. If there's any
-    error during JSON parsing, it returns the error as a string.
+    The raw JSON is written to raw_json as it arrives and every element of fio's top level arrays, such as each entry
+    of client_stats, is handed to on_element as soon as it has been parsed, so memory use does not grow with the number
+    of clients. stderr is spooled to a temporary file so it cannot block the stdout pipe.
 
     Args:
         command (str): An executable command provided as a string.
+        raw_json (str): The file the raw JSON output is written to.
+        on_element (Optional[Callable]): Called with (header, array_key, index, element) for each array element.
+        on_document (Optional[Callable]): Called with the document skeleton once each JSON document is complete.
+        cwd (Optional[str]): Directory fio runs in, where it writes the logs its servers send back.
 
     Returns:
         tuple: A Python tuple containing two elements
-            - The parsed JSON data as Python data structures if possible, otherwise None.
+            - The number of JSON documents parsed if the command succeeded, otherwise None.
             - The stderr output from executing the command as a string.
     """
     # TODO: Determine whether or not this should use the run_command_and_wait function.
-    try:
-        result = subprocess.run(command, shell=True, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    except Exception as e:
-        logger.error(f"Exception occurred while running the command: {str(e)}")
-        return None, str(e)
+    with tempfile.TemporaryFile(mode='w+') as stderr_file, open(raw_json, 'w') as raw_out:
+        try:
+            process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=stderr_file, cwd=cwd)
+        except Exception as e:
+            logger.error(f"Exception occurred while running the command: {str(e)}")
+            return None, str(e)
 
-    try:
-        # Split the stdout lines and look for the start of json data
-        stdout_lines = result.stdout.decode('utf-8').splitlines()
-        json_start = next(i for i, line in enumerate(stdout_lines) if line.startswith('{'))
+        stream = FioJsonStream(on_element, on_document, raw_out)
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        try:
+            # read1 returns whatever is in the pipe instead of waiting for a full buffer, so status reports are
+            # parsed as soon as fio prints them
+            for chunk in iter(lambda: process.stdout.read1(65536), b''):
+                stream.feed(decoder.decode(chunk))
+            stream.feed(decoder.decode(b'', final=True))
+        except json.JSONDecodeError as e:
+            logger.error(f"Error while parsing the command output to JSON: {str(e)}")
+            process.kill()
+            process.wait()
+            return None, str(e)
+        finally:
+            process.stdout.close()
+
+        returncode = process.wait()
+        stderr_file.seek(0)
+        stderr_output = stderr_file.read()
+
+    if returncode != 0:
+        logger.error(f"Command '{command}' returned non-zero exit status {returncode}.")
+        return None, stderr_output
+    if not stream.documents:
+        logger.error('No JSON output found in the fio output')
+        return None, stderr_output
+
+    return stream.documents, stderr_output
+
+
+def read_fio_log(path: str) -> typing.Iterator[tuple]:
+    """
+    Reads a bandwidth, IOPS or latency log written by fio's write_bw_log, write_iops_log or write_lat_log.
+
+    Args:
+        path (str): The log file, plain or gzip compressed.
+
+    Yields:
+        tuple: (time in ms, value, data direction) for every entry. The direction is 0 for reads, 1 for writes and 2
+        for trims.
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt') as file:
+        for line in file:
+            fields = line.split(',')
+            if len(fields) < 3:
+                continue
+            try:
+                yield int(fields[0]), float(fields[1]), int(fields[2])
+            except ValueError:
+                continue
+
+
+def fio_log_timeline(log_dir: str, prefix: str, clock_offsets: typing.Optional[dict] = None,
+                     bucket_s: float = 1.0) -> tuple:
+    """
+    Merges the fio logs of every job of every client into one cluster wide timeline.
+
+    fio hands the logs of its servers back to the client process, which writes them as <client>.<prefix>_<kind>.<job>
+    .log. Entries are stamped with the client's epoch (log_unix_epoch) and moved to the controller clock with
+    clock_offsets, then put in buckets of bucket_s seconds. Within a client the jobs are added up for bandwidth and
+    IOPS and averaged for completion latency. Across clients every bucket keeps the number of clients reporting, the
+    cluster value (sum, or mean for latency) and the min, p10, p50, p90 and max of the per client values.
 
-        # Join lines starting from json_start and parse as JSON
-        json_string = '\n'.join(stdout_lines[json_start:])
-        stdout_output = json.loads(json_string)
-    except json.JSONDecodeError as e:
-        logger.error(f"Error while parsing the command output to JSON: {str(e)}")
-        return None, str(e)
+    Args:
+        log_dir (str): Directory fio wrote the logs to.
+        prefix (str): The write_*_log prefix of the run.
+        clock_offsets (Optional[dict]): Results of measure_clock_offsets, keyed by the client names fio was given.
+        bucket_s (float): Width of a timeline bucket in seconds.
 
-    return stdout_output, result.stderr.decode('utf-8')
+    Returns:
+        tuple: Columns for write_columnar keyed by FIO_TIMELINE_COLUMNS, and summary rows keyed by
+        FIO_TIMELINE_SUMMARY_HEADERS, one per direction and metric.
+    """
+    pattern = re.compile(rf'^(?P<client>.+)\.{re.escape(prefix)}_(?P<kind>bw|iops|clat)\.(?P<job>\d+)\.log(\.gz)?$')
+    # (metric, op, client, job) mapped to bucket mapped to [sum, count]
+    samples = {}
+    for name in sorted(os.listdir(log_dir)) if os.path.isdir(log_dir) else []:
+        match = pattern.match(name)
+        if not match:
+            continue
+        client, kind = match.group('client'), match.group('kind')
+        metric, scale = FIO_LOG_METRICS[kind]
+        offset = (clock_offsets or {}).get(client, {}).get('offset_s', 0.0)
+        for time_ms, value, ddir in read_fio_log(os.path.join(log_dir, name)):
+            if ddir not in (0, 1, 2):
+                continue
+            bucket = math.floor((time_ms / 1000 - offset) / bucket_s)
+            totals = samples.setdefault((metric, ('read', 'write', 'trim')[ddir], client, match.group('job')), {})
+            total = totals.setdefault(bucket, [0.0, 0])
+            total[0] += value * scale
+            total[1] += 1
+
+    # Per client values: the jobs' bucket means, added up for rates and averaged for latency
+    clients = {}
+    for (metric, op, client, _), buckets in samples.items():
+        for bucket, (total, count) in buckets.items():
+            clients.setdefault((op, metric, bucket), {}).setdefault(client, []).append(total / count)
+    reporting = {}
+    for metric, _, client, _ in samples:
+        reporting.setdefault(metric, set()).add(client)
+
+    def percentile(ordered: list, pct: float) -> float:
+        position = (len(ordered) - 1) * pct / 100
+        low = math.floor(position)
+        high = min(low + 1, len(ordered) - 1)
+        return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+    columns = {name: [] if name in ('op', 'metric') else array.array('d') for name in FIO_TIMELINE_COLUMNS}
+    origin = min((bucket for (_, _, bucket) in clients), default=0) * bucket_s
+    series = {}
+    for (op, metric, bucket), by_client in sorted(clients.items()):
+        values = sorted(sum(jobs) if metric != 'clat_us' else statistics.fmean(jobs) for jobs in by_client.values())
+        cluster = statistics.fmean(values) if metric == 'clat_us' else sum(values)
+        row = (bucket * bucket_s, bucket * bucket_s - origin, op, metric, len(values), cluster,
+               statistics.fmean(values), values[0], percentile(values, 10), percentile(values, 50),
+               percentile(values, 90), values[-1])
+        for column, item in zip(FIO_TIMELINE_COLUMNS, row):
+            columns[column].append(item)
+        series.setdefault((op, metric), []).append((len(values), cluster, values[0], values[-1]))
+
+    summary = []
+    for (op, metric), buckets in sorted(series.items()):
+        full = [bucket for bucket in buckets if bucket[0] == len(reporting[metric])]
+        cluster = [bucket[1] for bucket in full]
+        mean = statistics.fmean(cluster) if cluster else 0.0
+        spreads = [(bucket[3] - bucket[2]) / (bucket[1] / bucket[0]) for bucket in full if bucket[1]]
+        summary.append({
+            'op': op, 'metric': metric, 'clients': len(reporting[metric]), 'buckets': len(buckets),
+            'full_buckets': len(full), 'cluster_mean': round(mean, 3),
+            'cluster_min': round(min(cluster), 3) if cluster else 0.0,
+            'cluster_max': round(max(cluster), 3) if cluster else 0.0,
+            'cluster_cov_pct': round(100 * statistics.pstdev(cluster) / mean, 2) if mean else 0.0,
+            'client_spread_pct': round(100 * statistics.fmean(spreads), 2) if spreads else 0.0})
+    return columns, summary
 
 
 def flatten_json(json_in) -> dict:
@@ -1390,113 +4238,2513 @@ def json_to_csv(json_out: dict, out_csv: str) -> None:
 
 
 # =====================================
-# MAIN
+# Results Store
 # =====================================
 
 
-def main():
-    args = None
-    try:
-        # Generate a formatted timestamp at the beginning of your script
-        run_timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+def write_columnar(path: str, columns: dict) -> None:
+    """
+    Writes a set of equal length columns to a compact binary file.
 
-        parser = argparse.ArgumentParser(description='Generate and run fio command',
-                                         formatter_class=argparse.ArgumentDefaultsHelpFormatter)
-        parser.add_argument('-P', '--print_templates', action='store_true', default=False,
-                            help='Print templates and their settings')
-
-        # Server Mode
-        parser.add_argument('--server', action='store_true', default=False,
-                            help='Start script in server mode')
-
-        # Paths and directories
-        # TODO: Known issue with failure if test_dir is given with trailing slash.  need to add check and parse better.
-        parser.add_argument('-t', '--test_dir', default='/mnt/hs_rdma',
-                            help='Directory in which test files are stored, usually an NFS mount point')
-        parser.add_argument('-o', '--output_dir', default='./fio_results/',
-                            help='The directory to store output files. Defaults to "./fio_results/".')
-
-        # Test configuration
-        parser.add_argument('-T', '--template', help='Preset configurations to use',
-                            choices=list(TEMPLATES.keys()))
-        parser.add_argument('-D', '--use_directory_mode', action='store_true',
-                            help="Use --directory instead of --filename.")
-        parser.add_argument('--nrfiles', type=int,
-                            help='When using directory mode nrfiles is used to specify how many files to generate per'
-                                 'fio job/thread. (Requires -D)')
-        parser.add_argument('-N', '--test_name', default='',
-                            help='Test name used for test directory names.')
-        parser.add_argument('-s', '--file_size', default='4G',
-                            help='Test file size in "m, g, or t", total capacity used will be file_size * '
-                                 'num_testfiles')
-        parser.add_argument('-l', '--loops', type=int, help='Number of times to run jobs')
-        parser.add_argument('-r', '--run_time', type=int, help='Run time in seconds')
-        parser.add_argument('-n', '--num_testfiles', default=2, type=int,
-                            help='Number of test files to generate and test against. '
-                                 'Total number of threads is num_testfiles * fio_numjobs')
-        parser.add_argument('-S', '--skip_creation', action='store_true', default=False,
-                            help="Skip the file creation step")
-        parser.add_argument('-F', '--file_create_threads', type=int, default=multiprocessing.cpu_count(),
-                            help='Maximum number of parallel threads to use for file creation')
-        parser.add_argument('--ips', nargs='+', type=valid_ip, required=False,
-                            help='Space separated list of IP addresses of systems to test. This script assumes '
-                                 'localhost if no IPs given.')
-
-        # Fio configurations
-        parser.add_argument('-b', '--block_size', default='1m',
-                            help='Block size to be used with fio command in "k or m"')
-        parser.add_argument('-i', '--io_engine', default='libaio', choices=['libaio', 'posixaio'],
-                            help='IO engine used for fio commands')
-        parser.add_argument('-d', '--io_direction', default='readwrite',
-                            choices=['rw', 'readwrite', 'read', 'write', 'randrw', 'randread', 'randwrite'],
-                            help='IO direction and type used for fio commands')
-
-        parser.add_argument('-f', '--files_per_job', default='1', type=int,
-                            help='If greater than 1 a colon delimited list of files will be used per job. files_per_job'
-                                 ' should divide evenly into num_testfiles')
-        parser.add_argument('-m', '--rw_mixread', default='50', type=int,
-                            help='Ratio of reads to writes in mixed workloads')
-        parser.add_argument('-j', '--fio_numjobs', default='2', type=int,
-                            help='Number of threads to run per fio job')
-        parser.add_argument('-q', '--queue_depth', default='16', type=int,
-                            help='Queue depth to be used for each job/thread')
-
-        # Store the command line arguments (don't parse yet, so the defaults are not filled in.)
-        args = argparse.Namespace()
-        parser.parse_args(namespace=args)
-
-        # Apply the template values if the template arg is used
-        if args.template:
-            template_values = TEMPLATES[args.template]
-            for arg, value in template_values.items():
-                setattr(args, arg, value)  # We strip the '-' from the arg name to match the attribute name
-
-        parser.parse_args(namespace=args)
-
-        if args.use_directory_mode is None:
-            args.use_directory_mode = False
-
-        if args.nrfiles and not args.use_directory_mode:
-            parser.error("--nrfiles requires --use_directory_mode to be set")
-        if not args.nrfiles:
-            args.nrfiles = 1
+    array.array columns are stored as packed arrays of their own type. Any other column is treated as text and
+    dictionary encoded, so repeated values such as template names cost four bytes per row. Every column is compressed
+    on its own, which lets read_columnar load only the columns a query needs. The file is written to a temporary name
+    and renamed into place, so readers never see a partial file.
 
-        if args.print_templates:
-            print_templates_information()
-            sys.exit(0)
+    Args:
+        columns (dict): Column name mapped to an array.array or a list of strings.
+        path (str): The file to write.
 
-        if args.server:
-            listener()
-            sys.exit(0)
+    Returns:
+        None
+    """
+    rows = len(next(iter(columns.values()))) if columns else 0
+    header = {'rows': rows, 'byteorder': sys.byteorder, 'columns': []}
+    blobs = []
+    offset = 0
+    for name, values in columns.items():
+        if len(values) != rows:
+            raise ValueError(f'Column "{name}" has {len(values)} values, expected {rows}')
+        column = {'name': name}
+        if isinstance(values, array.array):
+            column['typecode'] = values.typecode
+            blob = zlib.compress(values.tobytes())
+        else:
+            dictionary = {}
+            codes = array.array('i', (dictionary.setdefault(str(value), len(dictionary)) for value in values))
+            column['typecode'] = 'i'
+            column['dictionary'] = list(dictionary)
+            blob = zlib.compress(codes.tobytes())
+        column['offset'], column['length'] = offset, len(blob)
+        offset += len(blob)
+        header['columns'].append(column)
+        blobs.append(blob)
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as file:
+        file.write(COLUMNAR_MAGIC)
+        file.write(struct.pack('>I', len(header_bytes)))
+        file.write(header_bytes)
+        for blob in blobs:
+            file.write(blob)
+    os.replace(tmp_path, path)
+
+
+def read_columnar(path: str, names: typing.Optional[typing.Iterable[str]] = None) -> dict:
+    """
+    Reads columns written by write_columnar.
 
-        # Argument checking
-        arg_error = False
+    Args:
+        path (str): The file to read.
+        names (Optional[Iterable[str]]): Only these columns are read if given. Unknown names are ignored.
 
-        # Local Argument checks
-        # Check ssh access to remote servers
-        for ip in args.ips:
-            if not test_ssh_access(ip, 'root'):
-                # Handle the error appropriately, you could either exit the program or remove the IP from the list
+    Returns:
+        dict: Column name mapped to an array.array, or to a list of strings for text columns.
+    """
+    with open(path, 'rb') as file:
+        if file.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(f'"{path}" is not a columnar results file')
+        header_length, = struct.unpack('>I', file.read(4))
+        header = json.loads(file.read(header_length))
+        data_start = file.tell()
+
+        wanted = set(names) if names is not None else None
+        columns = {}
+        for column in header['columns']:
+            if wanted is not None and column['name'] not in wanted:
+                continue
+            file.seek(data_start + column['offset'])
+            values = array.array(column['typecode'])
+            values.frombytes(zlib.decompress(file.read(column['length'])))
+            if header['byteorder'] != sys.byteorder:
+                values.byteswap()
+            if 'dictionary' in column:
+                dictionary = column['dictionary']
+                columns[column['name']] = [dictionary[code] for code in values]
+            else:
+                columns[column['name']] = values
+    return columns
+
+
+def format_size(size_bytes: float) -> str:
+    """
+    Formats a byte count the way sizes are given on the command line, the reverse of convert_size.
+
+    Args:
+        size_bytes (float): The size in bytes.
+
+    Returns:
+        str: The size as a string like "4k" or "1m".
+    """
+    for suffix, factor in (('t', 1024 ** 4), ('g', 1024 ** 3), ('m', 1024 ** 2), ('k', 1024)):
+        if size_bytes >= factor and size_bytes % factor == 0:
+            return f'{int(size_bytes // factor)}{suffix}'
+    return f'{int(size_bytes)}'
+
+
+def mixed_sort_key(values: tuple) -> tuple:
+    """
+    Sort key for tuples of table cells that hold numbers or strings, '' for a missing value included. Numbers sort
+    as numbers, ahead of the strings in the same place.
+
+    Args:
+        values (tuple): The cells.
+
+    Returns:
+        tuple: A key that compares without mixing numbers and strings.
+    """
+    return tuple((isinstance(value, str), value) for value in values)
+
+
+def load_fio_json(path: str) -> typing.Optional[dict]:
+    """
+    Loads the raw fio JSON output of a run. With --status_interval the file holds one document per status report
+    followed by the final results, so the last document is returned.
+
+    Args:
+        path (str): The raw JSON file written by run_fio_command.
+
+    Returns:
+        Optional[dict]: The last JSON document in the file, or None if there is none.
+    """
+    with open(path, 'r') as file:
+        text = file.read()
+    return last_json_document(text)
+
+
+def last_json_document(text: str) -> typing.Optional[dict]:
+    """
+    Returns the last of one or more JSON documents written back to back.
+
+    Args:
+        text (str): The text holding the documents.
+
+    Returns:
+        Optional[dict]: The last document, or None if the text holds none.
+    """
+    decoder = json.JSONDecoder()
+    document = None
+    position = 0
+    while True:
+        start = text.find('{', position)
+        if start == -1:
+            return document
+        document, position = decoder.raw_decode(text, start)
+
+
+def fio_metrics_from_json(data: dict) -> dict:
+    """
+    Summarizes a run from its raw fio JSON output. Client results are merged with FIOResult, so the percentiles are
+    exact when the run was made with json+ output.
+
+    Args:
+        data (dict): A fio JSON document with client_stats.
+
+    Returns:
+        dict: 'options' with fio's global options, 'clients' with the client count, 'ops' mapping each I/O
+        direction that moved data to its metrics and 'ss_attained' with the fraction of clients that reached steady
+        state, NaN if the run did not use steady state detection.
+    """
+    total = None
+    clients = 0
+    ss_attained = math.nan
+    for index, client_stat in enumerate(data['client_stats']):
+        if client_stat.get('jobname') == 'All clients':
+            continue
+        result = FIOResult(data, index)
+        result.hostname = client_stat.get('hostname', '')
+        total = result if total is None else total + result
+        clients += 1
+
+    ops = {}
+    if total:
+        for op, result in (('read', total.read_result), ('write', total.write_result), ('trim', total.trim_result)):
+            if not result or not result.io_bytes:
+                continue
+            ops[op] = {
+                'bw_bytes': result.bw_bytes,
+                'iops': result.iops,
+                'lat_mean_us': result.lat_ns.get('mean', 0) / 1000,
+                'clat_p50_us': (result.get_percentile(50.0) or math.nan) / 1000,
+                'clat_p99_us': (result.get_percentile(99.0) or math.nan) / 1000,
+                'clat_p99.9_us': (result.get_percentile(99.9) or math.nan) / 1000,
+                'runtime_ms': result.runtime,
+                'percentile_exact': 1 if result.percentile_exact else 0,
+            }
+        if total.steady_states:
+            ss_attained = (sum(1 for state in total.steady_states.values() if state.get('attained')) /
+                           len(total.steady_states))
+    return {'options': data.get('global options', {}), 'clients': clients, 'ops': ops, 'ss_attained': ss_attained}
+
+
+def fio_metrics_from_flat(flat: dict) -> dict:
+    """
+    Summarizes a run from the single row fio CSV, for runs where the raw JSON output was not kept. Without histograms
+    the percentiles are the worst client's, the same fallback PerformanceResult uses.
+
+    Args:
+        flat (dict): The flattened fio output as read back from the CSV. Values may be strings.
+
+    Returns:
+        dict: Same layout as fio_metrics_from_json.
+    """
+    def number(key: str) -> float:
+        try:
+            return float(flat.get(key, ''))
+        except ValueError:
+            return math.nan
+
+    indexes = sorted({int(match.group(1)) for match in map(re.compile(r'^client_stats_(\d+)_jobname$').match, flat)
+                      if match and flat[match.group(0)] != 'All clients'})
+    ops = {}
+    for op in ('read', 'write', 'trim'):
+        prefixes = [f'client_stats_{index}_{op}_' for index in indexes]
+        io_bytes = sum(number(f'{prefix}io_bytes') for prefix in prefixes if f'{prefix}io_bytes' in flat)
+        if not io_bytes or math.isnan(io_bytes):
+            continue
+        samples = [number(f'{prefix}lat_ns_N') for prefix in prefixes]
+        means = [number(f'{prefix}lat_ns_mean') for prefix in prefixes]
+        weighted = [(n, mean) for n, mean in zip(samples, means) if n > 0 and not math.isnan(mean)]
+        metrics = {
+            'bw_bytes': sum(number(f'{prefix}bw_bytes') for prefix in prefixes),
+            'iops': sum(number(f'{prefix}iops') for prefix in prefixes),
+            'lat_mean_us': (sum(n * mean for n, mean in weighted) / sum(n for n, _ in weighted) / 1000
+                            if weighted else math.nan),
+            'runtime_ms': max(number(f'{prefix}runtime') for prefix in prefixes),
+            'percentile_exact': 1 if len(prefixes) == 1 else 0,
+        }
+        for percentile, column in ((50.0, 'clat_p50_us'), (99.0, 'clat_p99_us'), (99.9, 'clat_p99.9_us')):
+            values = [number(f'{prefix}clat_ns_percentile_{percentile:.6f}') for prefix in prefixes]
+            values = [value for value in values if not math.isnan(value)]
+            metrics[column] = max(values) / 1000 if values else math.nan
+        ops[op] = metrics
+
+    attained = [number(f'client_stats_{index}_steadystate_attained') for index in indexes
+                if f'client_stats_{index}_steadystate_attained' in flat]
+    options = {key[len('global options_'):]: value for key, value in flat.items() if key.startswith('global options_')}
+    return {'options': options, 'clients': len(indexes), 'ops': ops,
+            'ss_attained': sum(attained) / len(attained) if attained else math.nan}
+
+
+def parse_environment_files(config_text: typing.Optional[str], aws_info_text: typing.Optional[str]) -> dict:
+    """
+    Reads the cluster description saved next to fio_results by make-config.sh and get-aws-info.sh.
+
+    Args:
+        config_text (Optional[str]): Contents of the config file.
+        aws_info_text (Optional[str]): Contents of the aws-info file.
+
+    Returns:
+        dict: Any of 'source', 'lss', 'storage', 'client_instance' and 'server_instance' that could be found, and for
+            sizing the cluster the 'client_vcpus', 'server_vcpus', 'anvil_instance', 'anvil_vcpus' and 'anvils'.
+    """
+    environment = {}
+    config = {}
+    for line in (config_text or '').splitlines():
+        key, sep, value = line.partition('=')
+        if sep:
+            config[key.strip()] = value.strip().strip('"')
+    if config.get('name'):
+        environment['source'] = config['name']
+    storage = 'ecgroup' if 'ecgroup' in config.get('share', '') + config.get('name', '') else 'lss'
+    if config:
+        environment['storage'] = storage
+    lss_num = config.get('lss_num', '0')
+    if lss_num.isdigit() and int(lss_num):
+        environment['lss'] = int(lss_num)
+
+    try:
+        aws_info = json.loads(aws_info_text) if aws_info_text else {}
+    except ValueError:
+        aws_info = {}
+    if aws_info.get('client'):
+        environment['client_instance'] = aws_info['client'].get('InstanceType', '')
+        environment['client_vcpus'] = aws_info['client'].get('vCPUs')
+    server_key = 'ecgroup_server' if storage == 'ecgroup' else 'storage_server'
+    if aws_info.get(server_key):
+        environment['server_instance'] = aws_info[server_key].get('InstanceType', '')
+        environment['server_vcpus'] = aws_info[server_key].get('vCPUs')
+    if aws_info.get('hammerspace'):
+        environment['anvil_instance'] = aws_info['hammerspace'].get('InstanceType', '')
+        environment['anvil_vcpus'] = aws_info['hammerspace'].get('vCPUs')
+        environment['anvils'] = aws_info.get('total_hammerspace') or 1
+    if 'lss' not in environment:
+        count = aws_info.get('total_ecgroup_nodes' if storage == 'ecgroup' else 'total_storage_servers')
+        if isinstance(count, int) and count:
+            environment['lss'] = count
+    return environment
+
+
+def fio_store_rows(run_name: str, files: dict, environment: dict) -> list:
+    """
+    Builds the results store rows of one fio run directory.
+
+    Args:
+        run_name (str): Name of the run directory, which encodes the test point for cloud_data_path_tests.sh runs.
+        files (dict): Contents of the run's 'csv', 'raw_json' and 'run_info' files, as far as they exist.
+        environment (dict): Cluster description from parse_environment_files.
+
+    Returns:
+        list: One dict per I/O direction, keyed by the store columns.
+    """
+    summary = None
+    if files.get('raw_json'):
+        data = last_json_document(files['raw_json'])
+        if data and data.get('client_stats'):
+            summary = fio_metrics_from_json(data)
+    if summary is None and files.get('csv'):
+        reader = csv.reader(io.StringIO(files['csv']))
+        header = next(reader, None)
+        values = next(reader, None)
+        if header and values:
+            summary = fio_metrics_from_flat(dict(zip(header, values)))
+    if summary is None:
+        return []
+
+    match = RUN_DIR_PATTERN.match(run_name)
+    point = {key: value for key, value in match.groupdict().items() if value is not None} if match else {}
+    run_info = json.loads(files['run_info']) if files.get('run_info') else {}
+    options = summary['options']
+
+    base = {column: '' for column in STORE_TEXT_COLUMNS}
+    base.update({column: math.nan for column in STORE_NUMERIC_COLUMNS})
+    base.update(environment)
+    base.update({
+        'run': run_name,
+        'engine': 'fio',
+        'timestamp': point.get('timestamp', run_info.get('timestamp', '')),
+        'test_name': run_info.get('test_name') or point.get('test_name', ''),
+        'mode': point.get('mode', ''),
+        'template': run_info.get('template') or point.get('template', ''),
+        'rw': options.get('rw', ''),
+        'clients': summary['clients'],
+        'ss_attained': summary['ss_attained'],
+    })
+    for column in ('iteration', 'numjobs', 'iodepth', 'num_testfiles'):
+        if column in point:
+            base[column] = int(point[column])
+    # The options fio actually ran with take precedence over the names in the directory
+    for column, option in (('iodepth', 'iodepth'), ('numjobs', 'numjobs')):
+        if str(options.get(option, '')).isdigit():
+            base[column] = int(options[option])
+    for size in (options.get('bs'), point.get('bs')):
+        try:
+            base['bs'] = convert_size(str(size))
+            break
+        except ValueError:
+            continue
+
+    rows = []
+    for op, metrics in summary['ops'].items():
+        row = dict(base)
+        row.update(metrics)
+        row['op'] = op
+        row['bw_gibs'] = metrics['bw_bytes'] / (1024 ** 3)
+        rows.append(row)
+    return rows
+
+
+def engine_store_rows(run_name: str, files: dict, environment: dict) -> list:
+    """
+    Builds the results store rows of one IOR, mdtest or IO500 run directory, of an IO500 result directory or
+    console log, or of an IOR summaryFile from the IOR scaling scripts.
+
+    Args:
+        run_name (str): Name of the run directory.
+        files (dict): Contents of the run's 'engine_csv' and 'run_info' files, the (name, contents) of its IO500
+            files under 'io500', or an IOR summaryFile under 'ior_json' with its console log under 'ior_log', as far
+            as they exist.
+        environment (dict): Cluster description from parse_environment_files.
+
+    Returns:
+        list: One dict per phase, keyed by the store columns. rw holds the phase and op its direction.
+    """
+    if files.get('engine_csv'):
+        results = parse_engine_results(files['engine_csv'])
+    elif files.get('io500'):
+        io500 = IO500Result(run_name)
+        for name, text in files['io500']:
+            io500.feed(name, text)
+        results = io500.rows()
+    elif files.get('ior_json'):
+        results = [{'engine': 'ior', 'phase': row['op'], 'op': row['op'],
+                    'bw_bytes': round(row['bw_mib_s'] * 1024 ** 2), 'iops': row['ops'], 'time_s': row['time_s'],
+                    'tasks': row['threads'], 'clients': row['clients'], 'bs': row['transfer_size'], 'valid': 1,
+                    'iteration': row['iteration']}
+                   for row in ior_result_rows(ior_json_document(files['ior_json']) or {}, files.get('ior_log', ''),
+                                              ior_point_clients(run_name))]
+    else:
+        return []
+    match = RUN_DIR_PATTERN.match(run_name)
+    point = {key: value for key, value in match.groupdict().items() if value is not None} if match else {}
+    run_info = json.loads(files['run_info']) if files.get('run_info') else {}
+
+    rows = []
+    for result in results:
+        row = {column: '' for column in STORE_TEXT_COLUMNS}
+        row.update({column: math.nan for column in STORE_NUMERIC_COLUMNS})
+        row.update(environment)
+        clients = int(result['clients']) if result['clients'] else 0
+        row.update({
+            'run': run_name,
+            'engine': result['engine'],
+            'timestamp': point.get('timestamp', run_info.get('timestamp', '')),
+            'test_name': run_info.get('test_name') or point.get('test_name') or os.path.dirname(run_name),
+            'mode': point.get('mode', ''),
+            'template': run_info.get('template') or '',
+            'rw': result['phase'],
+            'op': result['op'],
+            'clients': clients or math.nan,
+            # Threads per client, rounded up the way mpirun places them when they do not divide evenly
+            'numjobs': -(-int(result['tasks']) // clients) if result['tasks'] and clients else math.nan,
+            'bs': int(result['bs']) if result['bs'] else math.nan,
+            'bw_bytes': result['bw_bytes'] if result['bw_bytes'] != '' else math.nan,
+            'bw_gibs': result['bw_bytes'] / (1024 ** 3) if result['bw_bytes'] != '' else math.nan,
+            'iops': result['iops'] if result['iops'] != '' else math.nan,
+            'runtime_ms': result['time_s'] * 1000 if result['time_s'] != '' else math.nan,
+            'valid': int(result['valid']) if str(result['valid']).isdigit() else math.nan,
+        })
+        if 'iteration' in point:
+            row['iteration'] = int(point['iteration'])
+        elif 'iteration' in result:
+            row['iteration'] = result['iteration']
+        rows.append(row)
+    return rows
+
+
+def scan_fio_results(path: str, client_stats: bool = False) -> typing.Iterator[tuple]:
+    """
+    Finds the fio runs under a results directory or inside a results tarball from capture-logs.sh. Tarballs are read as
+    a stream and only the small summary files of each run are kept in memory.
+
+    Args:
+        path (str): A fio_results directory, a single run directory, a directory holding either, or a tarball.
+        client_stats (bool): Also open the client tarballs of every run and keep their NFS client stats under 'nfs',
+            as (client, name, contents).
+
+    Returns:
+        Iterator[tuple]: (source, run_name, files, environment) for every run found.
+    """
+    run_files = {}
+    environment_files = {}
+
+    def classify(name: str, read: typing.Callable, open_binary: typing.Callable) -> None:
+        base = os.path.basename(name)
+        run_name = os.path.basename(os.path.dirname(name))
+        if client_stats and run_name == 'clients' and base.endswith('.tgz'):
+            # The stats directory the controller fetched from one client, itself a tarball
+            run_name = os.path.basename(os.path.dirname(os.path.dirname(name)))
+            with open_binary() as file, tarfile.open(fileobj=file, mode='r|*') as client_tar:
+                for member in client_tar:
+                    if member.isfile() and NFS_STATS_FILE_PATTERN.match(os.path.basename(member.name)):
+                        text = client_tar.extractfile(member).read().decode('utf-8', errors='replace')
+                        run_files.setdefault(run_name, {}).setdefault('nfs', []).append(
+                            (base[:-len('.tgz')], os.path.basename(member.name), text))
+        elif re.match(r'^fio_output_.*\.csv$', base):
+            run_files.setdefault(run_name, {})['csv'] = read()
+        elif re.match(r'^fio_raw_.*\.json$', base):
+            run_files.setdefault(run_name, {})['raw_json'] = read()
+        elif re.match(r'^engine_results_.*\.csv$', base):
+            run_files.setdefault(run_name, {})['engine_csv'] = read()
+        elif 'io500' in name and IO500Result.RESULT_FILE_PATTERN.match(base):
+            # An IO500 result directory
+            run_files.setdefault(run_name, {}).setdefault('io500', []).append((base, read()))
+        elif 'io500' in run_name and IO500Result.LOG_NAME_PATTERN.match(base):
+            # A console log of run-io500.sh, which is a run of its own
+            run_files.setdefault(base, {}).setdefault('io500', []).append((base, read()))
+        elif run_name.startswith('logs-IOR-') and IOR_LOG_NAME_PATTERN.match(base):
+            # The IOR scripts keep the summaryFile of every point in a -json twin of the console log directory.
+            # Both make up one run, named after the console log
+            if run_name.endswith('-json') and base.endswith('.json'):
+                run_files.setdefault(f'{run_name[:-len("-json")]}/{base[:-len(".json")]}', {})['ior_json'] = read()
+            elif not base.endswith('.json'):
+                run_files.setdefault(f'{run_name}/{base}', {})['ior_log'] = read()
+        elif base == 'run_info.json':
+            run_files.setdefault(run_name, {})['run_info'] = read()
+        elif base in ('config', 'aws-info'):
+            environment_files[base] = read()
+
+    if os.path.isfile(path):
+        with tarfile.open(path, 'r|*') as tar:
+            for member in tar:
+                if member.isfile():
+                    classify(member.name, lambda: tar.extractfile(member).read().decode('utf-8', errors='replace'),
+                             lambda: tar.extractfile(member))
+        source_default = re.sub(r'\.(tar|tgz|tar\.gz)$', '', os.path.basename(path))
+    else:
+        def read_file(file_path: str) -> typing.Callable:
+            return lambda: open(file_path, 'r', errors='replace').read()
+
+        for root, dirs, names in os.walk(path):
+            dirs[:] = [name for name in dirs if name != 'jobfiles' and (client_stats or name != 'clients')]
+            for name in names:
+                file_path = os.path.join(root, name)
+                classify(file_path, read_file(file_path), lambda: open(file_path, 'rb'))
+        # The cluster description normally sits one level above fio_results
+        parent = os.path.dirname(os.path.abspath(path))
+        for directory in (os.path.abspath(path), parent, os.path.dirname(parent)):
+            for name in ('config', 'aws-info'):
+                if name not in environment_files and os.path.isfile(os.path.join(directory, name)):
+                    with open(os.path.join(directory, name), 'r', errors='replace') as file:
+                        environment_files[name] = file.read()
+        source_default = os.path.basename(os.path.abspath(path))
+
+    environment = parse_environment_files(environment_files.get('config'), environment_files.get('aws-info'))
+    # Tarball names are unique per cluster, unlike the name in config which is reused between volume layouts
+    source = re.sub(r'^results-', '', source_default if os.path.isfile(path) else
+                    environment.get('source', source_default))
+    environment['source'] = source
+    for run_name, files in sorted(run_files.items()):
+        if set(files) == {'ior_log'}:
+            # An IOR console log of a run that predates the summaryFile, which holds no results of its own
+            continue
+        yield source, run_name, files, environment
+
+
+def store_ingest(paths: list, store: str) -> int:
+    """
+    Adds fio runs to the results store. Runs already in the store, matched on source and run name, are replaced.
+
+    Args:
+        paths (list): Result directories and tarballs to ingest.
+        store (str): Path of the results store.
+
+    Returns:
+        int: The number of runs ingested.
+    """
+    new_rows = []
+    for path in paths:
+        for source, run_name, files, environment in scan_fio_results(path):
+            rows = fio_store_rows(run_name, files, environment) or engine_store_rows(run_name, files, environment)
+            if not rows:
+                print(f'WARNING: No fio results found in "{source}/{run_name}"')
+            new_rows.extend(rows)
+
+    columns = {name: [] for name in STORE_TEXT_COLUMNS}
+    columns.update({name: array.array('d') for name in STORE_NUMERIC_COLUMNS})
+    replaced = {(row['source'], row['run']) for row in new_rows}
+    if os.path.exists(store):
+        existing = read_columnar(store)
+        for index in range(len(existing['run'])):
+            if (existing['source'][index], existing['run'][index]) in replaced:
+                continue
+            for name, values in columns.items():
+                if name in existing:
+                    values.append(existing[name][index])
+                else:
+                    values.append(math.nan if isinstance(values, array.array) else '')
+
+    for row in new_rows:
+        for name, values in columns.items():
+            values.append(float(row[name]) if isinstance(values, array.array) else str(row[name]))
+
+    store_dir = os.path.dirname(store)
+    if store_dir:
+        os.makedirs(store_dir, exist_ok=True)
+    write_columnar(store, columns)
+    print(f'INFO: Ingested {len(replaced)} runs into "{store}", which now holds {len(columns["run"])} rows')
+    return len(replaced)
+
+
+def parse_store_filter(expression: str) -> tuple:
+    """
+    Parses a query filter such as "bs=1m,4k", "clients>=8" or "template!=JonBWMix".
+
+    Args:
+        expression (str): The filter expression.
+
+    Returns:
+        tuple: (column, operator, values). Values of numeric columns are converted to floats, sizes like "1m" included.
+    """
+    match = re.match(r'^([\w.]+)\s*(!=|>=|<=|=|>|<)\s*(.*)$', expression)
+    if not match or match.group(1) not in STORE_TEXT_COLUMNS + STORE_NUMERIC_COLUMNS:
+        raise ValueError(f'Invalid filter "{expression}". Filters look like column=value[,value] with a column from '
+                         f'{", ".join(STORE_TEXT_COLUMNS + STORE_NUMERIC_COLUMNS)}')
+    column, operator, values = match.group(1), match.group(2), match.group(3).split(',')
+    if column in STORE_NUMERIC_COLUMNS:
+        values = [float(value) if re.match(r'^-?[\d.]+$', value) else float(convert_size(value)) for value in values]
+    return column, operator, values
+
+
+def store_query(columns: dict, filters: list, row_keys: list, pivot: typing.Optional[str], metric: str,
+                aggregate: str) -> tuple:
+    """
+    Filters the store, groups it by row_keys and optionally pivots one more column into the table columns.
+
+    Args:
+        columns (dict): Columns as returned by read_columnar.
+        filters (list): Parsed filters from parse_store_filter.
+        row_keys (list): Columns that identify a table row.
+        pivot (Optional[str]): Column whose values become the table columns.
+        metric (str): Numeric column to aggregate.
+        aggregate (str): One of mean, median, min, max, sum, stdev or count.
+
+    Returns:
+        tuple: (header, rows, matched) where rows are lists of formatted values and matched is the number of store
+        rows that passed the filters.
+    """
+    compare = {
+        '=': lambda value, wanted: value in wanted,
+        '!=': lambda value, wanted: value not in wanted,
+        '>': lambda value, wanted: value > wanted[0],
+        '<': lambda value, wanted: value < wanted[0],
+        '>=': lambda value, wanted: value >= wanted[0],
+        '<=': lambda value, wanted: value <= wanted[0],
+    }
+    selected = range(len(columns[metric]))
+    for column, operator, wanted in filters:
+        values = columns[column]
+        selected = [index for index in selected if compare[operator](values[index], wanted)]
+
+    aggregates = {
+        'mean': statistics.mean, 'median': statistics.median, 'min': min, 'max': max, 'sum': sum, 'count': len,
+        'stdev': lambda values: statistics.stdev(values) if len(values) > 1 else 0.0,
+    }
+    def group_value(value):
+        # NaN never equals itself, missing values have to share a group
+        return None if isinstance(value, float) and math.isnan(value) else value
+
+    def sort_key(value) -> tuple:
+        # Missing values sort last, behind the numbers or strings of their column
+        return (value is None, value if value is not None else 0)
+
+    groups = {}
+    for index in selected:
+        value = columns[metric][index]
+        if math.isnan(value):
+            continue
+        key = tuple(group_value(columns[column][index]) for column in row_keys)
+        pivot_value = group_value(columns[pivot][index]) if pivot else metric
+        groups.setdefault(key, {}).setdefault(pivot_value, []).append(value)
+
+    pivot_values = sorted({value for cells in groups.values() for value in cells}, key=sort_key)
+
+    def show(column: str, value) -> str:
+        if value is None:
+            return 'N/A'
+        if column == 'bs' and isinstance(value, float) and not math.isnan(value):
+            return format_size(value)
+        if isinstance(value, float):
+            return 'N/A' if math.isnan(value) else (f'{value:.0f}' if value.is_integer() else f'{value:.2f}')
+        return str(value)
+
+    header = list(row_keys) + [show(pivot, value) if pivot else f'{aggregate}({metric})' for value in pivot_values]
+    rows = []
+    for key in sorted(groups, key=lambda key: tuple(sort_key(value) for value in key)):
+        cells = groups[key]
+        rows.append([show(column, value) for column, value in zip(row_keys, key)] +
+                    [show(metric, float(aggregates[aggregate](cells[value]))) if value in cells else ''
+                     for value in pivot_values])
+    return header, rows, len(selected)
+
+
+def store_command(argv: list) -> int:
+    """
+    Entry point of "run_fio.py store", which ingests result directories and tarballs into the results store and
+    queries it.
+
+    Args:
+        argv (list): Command line arguments after "store".
+
+    Returns:
+        int: Exit code.
+    """
+    parser = argparse.ArgumentParser(prog=f'{os.path.basename(__file__)} store',
+                                     description='Multi-run results store',
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--store', default=RESULTS_STORE, help='Path of the results store')
+    subparsers = parser.add_subparsers(dest='action', required=True)
+
+    ingest_parser = subparsers.add_parser('ingest', help='Add fio runs to the store',
+                                          formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    ingest_parser.add_argument('paths', nargs='+',
+                               help='fio_results directories, run directories or results tarballs')
+
+    query_parser = subparsers.add_parser('query', help='Filter, group and pivot the stored runs',
+                                         formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    query_parser.add_argument('-w', '--where', action='append', default=[],
+                              help='Filter like "bs=1m,4k", "clients>=8" or "op=read". May be repeated')
+    query_parser.add_argument('-g', '--group_by', default='template,op,bs,iodepth,numjobs',
+                              help='Comma separated columns that make up a table row')
+    query_parser.add_argument('-p', '--pivot', default=None,
+                              help='Column whose values become the table columns, for example clients or source')
+    query_parser.add_argument('-m', '--metric', default='bw_gibs', choices=STORE_NUMERIC_COLUMNS,
+                              help='Value to aggregate')
+    query_parser.add_argument('-a', '--aggregate', default='mean',
+                              choices=['mean', 'median', 'min', 'max', 'sum', 'stdev', 'count'],
+                              help='How runs that share a table cell are combined')
+    query_parser.add_argument('--csv', default=None, help='Also write the table to this CSV file')
+    query_parser.add_argument('--columns', action='store_true', default=False,
+                              help='List the store columns and exit')
+
+    args = parser.parse_args(argv)
+
+    if args.action == 'ingest':
+        return 0 if store_ingest(args.paths, args.store) else 1
+
+    if args.columns:
+        print(f'Text columns: {", ".join(STORE_TEXT_COLUMNS)}')
+        print(f'Numeric columns: {", ".join(STORE_NUMERIC_COLUMNS)}')
+        return 0
+
+    if not os.path.exists(args.store):
+        print(f'ERROR: The results store "{args.store}" does not exist, run "store ingest" first')
+        return 1
+
+    start = time.perf_counter()
+    try:
+        filters = [parse_store_filter(expression) for expression in args.where]
+    except ValueError as e:
+        parser.error(str(e))
+    row_keys = [key for key in args.group_by.split(',') if key]
+    unknown = [key for key in row_keys + ([args.pivot] if args.pivot else [])
+               if key not in STORE_TEXT_COLUMNS + STORE_NUMERIC_COLUMNS]
+    if unknown:
+        parser.error(f'Unknown column(s): {", ".join(unknown)}')
+
+    needed = set(row_keys) | {args.metric} | {column for column, _, _ in filters}
+    if args.pivot:
+        needed.add(args.pivot)
+    columns = read_columnar(args.store, needed)
+    header, rows, matched = store_query(columns, filters, row_keys, args.pivot, args.metric, args.aggregate)
+    elapsed = time.perf_counter() - start
+
+    widths = [max([len(str(cell)) for cell in column]) for column in zip(header, *rows)]
+    print(' | '.join(f'{cell:>{width}}' for cell, width in zip(header, widths)))
+    print('-+-'.join('-' * width for width in widths))
+    for row in rows:
+        print(' | '.join(f'{cell:>{width}}' for cell, width in zip(row, widths)))
+    print(f'\n{len(rows)} rows from {matched} of {len(columns[args.metric])} stored results in '
+          f'{elapsed * 1000:.1f} ms')
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(header)
+            writer.writerows(rows)
+    return 0
+
+
+def io500_command(argv: list) -> int:
+    """
+    Entry point of "run_fio.py io500", which reads IO500 result directories and console logs and writes each run as
+    JSON next to it, the way io500-json.sh used to.
+
+    Args:
+        argv (list): Command line arguments after "io500".
+
+    Returns:
+        int: Exit code.
+    """
+    parser = argparse.ArgumentParser(prog=f'{os.path.basename(__file__)} io500',
+                                     description='Parse IO500 results',
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('paths', nargs='+',
+                        help='IO500 result directories holding result.txt or result_summary.txt, run-io500.sh console '
+                             'logs, or directories of either such as logs-io500')
+    parser.add_argument('--csv', default=None, help='Also write the phases of all runs to this CSV file')
+    args = parser.parse_args(argv)
+
+    # (name, [files], json output) of every run. A result directory is one run, every console log is one as well
+    runs = []
+    for path in args.paths:
+        if os.path.isfile(path):
+            runs.append((os.path.basename(path), [path], f'{path}.json'))
+            continue
+        names = sorted(os.listdir(path)) if os.path.isdir(path) else []
+        if {'result.txt', 'result_summary.txt'} & set(names):
+            runs.append((os.path.basename(os.path.abspath(path)),
+                         [os.path.join(path, name) for name in names if IO500Result.RESULT_FILE_PATTERN.match(name)],
+                         os.path.join(path, 'result.json')))
+        elif names:
+            runs.extend((name, [os.path.join(path, name)], os.path.join(path, f'{name}.json')) for name in names
+                        if os.path.isfile(os.path.join(path, name)) and not name.endswith('.json'))
+        else:
+            print(f'ERROR: "{path}" holds no IO500 results')
+
+    rows = []
+    for name, files, json_path in runs:
+        result = IO500Result(name)
+        for file_path in files:
+            with open(file_path, errors='replace') as file:
+                result.feed(file_path, file.read())
+        if not result.phases:
+            print(f'WARNING: No IO500 results found in "{name}"')
+            continue
+        with open(json_path, 'w') as file:
+            json.dump(result.to_json(), file, indent=2)
+        score = result.score
+        print(f'INFO: {name}: score {score.get("total", "n/a")}, bandwidth {score.get("bw_gibs", "n/a")} GiB/s, '
+              f'metadata {score.get("md_kiops", "n/a")} kIOPS, {len(result.phases)} phases '
+              f'({sum(not phase["valid"] for phase in result.phases.values())} invalid), written to "{json_path}"')
+        rows.extend(dict(row, run=name) for row in result.rows())
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=['run'] + ENGINE_RESULT_HEADERS)
+            writer.writeheader()
+            writer.writerows(rows)
+    return 0 if rows else 1
+
+
+def ior_scaling_curve(rows: list) -> list:
+    """
+    Reduces IOR result rows to the scaling curve of every IOR test, client count, operation and transfer size: the
+    bandwidth over the thread count, averaged over the iterations.
+
+    Args:
+        rows (list): Rows keyed by IOR_RESULT_HEADERS.
+
+    Returns:
+        list: Rows keyed by IOR_SCALING_HEADERS, in order of the thread count within every curve. speedup is relative
+            to the fewest threads of the curve.
+    """
+    points = {}
+    for row in rows:
+        key = (row['source'], row['test'], row['clients'], row['op'], row['transfer_size'])
+        points.setdefault(key, {}).setdefault(row['threads'], []).append(row)
+
+    curve = []
+    # Curves in order of the client count, so that the scaling across cluster sizes reads top to bottom
+    for (source, test, clients, op, transfer_size), by_threads in sorted(
+            points.items(), key=lambda item: mixed_sort_key((item[0][2],) + item[0])):
+        baseline = None
+        for threads in sorted(by_threads):
+            iterations = by_threads[threads]
+            bw_gibs = statistics.mean(row['bw_mib_s'] for row in iterations) / 1024
+            spreads = [row['task_spread_pct'] for row in iterations if row['task_spread_pct'] != '']
+            baseline = baseline or bw_gibs
+            curve.append({'source': source, 'test': test, 'clients': clients, 'op': op,
+                          'transfer_size': transfer_size, 'threads': threads, 'iterations': len(iterations),
+                          'bw_gibs': round(bw_gibs, 3),
+                          'ops': round(statistics.mean(row['ops'] for row in iterations), 2),
+                          'speedup': round(bw_gibs / baseline, 2) if baseline else '',
+                          'task_spread_pct': round(max(spreads), 2) if spreads else ''})
+    return curve
+
+
+def plot_ior_scaling(curve: list, path: str) -> None:
+    """
+    Draws the IOR scaling curves, one panel per client count and one line per test, operation and transfer size.
+
+    Args:
+        curve (list): Rows from ior_scaling_curve.
+        path (str): Image file to write.
+    """
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        raise ValueError(f'matplotlib is needed to draw "{path}", install it or use the scaling CSV')
+
+    panels = sorted({row['clients'] for row in curve}, key=lambda clients: mixed_sort_key((clients,)))
+    figure, axes = plt.subplots(1, len(panels), figsize=(6 * len(panels), 4.5), squeeze=False)
+    for axis, clients in zip(axes[0], panels):
+        lines = {}
+        for row in curve:
+            if row['clients'] == clients:
+                lines.setdefault((row['source'], row['test'], row['op'], row['transfer_size']), []).append(row)
+        for (source, test, op, transfer_size), points in sorted(lines.items(),
+                                                                key=lambda item: mixed_sort_key(item[0])):
+            axis.plot([row['threads'] for row in points], [row['bw_gibs'] for row in points], marker='o',
+                      label=f'{source} {test} {op} {format_size(transfer_size) if transfer_size else ""}'.strip())
+        axis.set_xscale('log', base=2)
+        axis.set_title(f'{clients} clients')
+        axis.set_xlabel('Threads')
+        axis.set_ylabel('GiB/s')
+        axis.grid(True, which='both', alpha=0.3)
+        axis.legend(fontsize='x-small')
+    figure.tight_layout()
+    figure.savefig(path)
+    plt.close(figure)
+
+
+def ior_command(argv: list) -> int:
+    """
+    Entry point of "run_fio.py ior", which reads the IOR summaryFiles the IOR scaling scripts keep in their
+    logs-IOR-*-json directories and writes the results of every point and iteration and the scaling curves.
+
+    Args:
+        argv (list): Command line arguments after "ior".
+
+    Returns:
+        int: Exit code.
+    """
+    parser = argparse.ArgumentParser(prog=f'{os.path.basename(__file__)} ior',
+                                     description='Parse IOR summaryFiles into results and scaling curves',
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('paths', nargs='+',
+                        help='Results tarballs or directories holding logs-IOR-* and logs-IOR-*-json directories')
+    parser.add_argument('--csv', default='ior_results.csv',
+                        help='CSV file for the results of every point, operation and iteration')
+    parser.add_argument('--scaling_csv', default='ior_scaling.csv', help='CSV file for the scaling curves')
+    parser.add_argument('--plot', default=None,
+                        help='Also draw the scaling curves to this image file, needs matplotlib')
+    args = parser.parse_args(argv)
+
+    rows = []
+    for path in args.paths:
+        if not os.path.exists(path):
+            print(f'ERROR: "{path}" does not exist')
+            continue
+        for source, run_name, files, _ in scan_fio_results(path):
+            if not files.get('ior_json'):
+                continue
+            document = ior_json_document(files['ior_json'])
+            if not document:
+                print(f'WARNING: "{source}/{run_name}" holds no IOR summary')
+                continue
+            test = os.path.dirname(run_name)
+            rows.extend(dict(row, source=source, test=re.sub(r'^logs-', '', test))
+                        for row in ior_result_rows(document, files.get('ior_log', ''), ior_point_clients(run_name)))
+    if not rows:
+        print('ERROR: No IOR summaryFiles found')
+        return 1
+
+    with open(args.csv, 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=IOR_RESULT_HEADERS)
+        writer.writeheader()
+        writer.writerows(rows)
+    curve = ior_scaling_curve(rows)
+    with open(args.scaling_csv, 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=IOR_SCALING_HEADERS)
+        writer.writeheader()
+        writer.writerows(curve)
+
+    previous = None
+    for row in curve:
+        key = (row['source'], row['test'], row['clients'], row['op'], row['transfer_size'])
+        if key != previous:
+            print(f'\n{row["source"]} {row["test"]}: {row["clients"]} clients, {row["op"]}, '
+                  f'{format_size(row["transfer_size"])} transfers')
+            print(f'{"Threads":>8} | {"GiB/s":>8} | {"Ops/s":>12} | {"Speedup":>7} | {"Task spread %":>13}')
+            previous = key
+        print(f'{row["threads"]:>8} | {row["bw_gibs"]:>8.3f} | {row["ops"]:>12.2f} | {row["speedup"]:>7} '
+              f'| {row["task_spread_pct"]:>13}')
+    print(f'\nINFO: {len(rows)} IOR results written to "{args.csv}", {len(curve)} scaling points to '
+          f'"{args.scaling_csv}"')
+
+    if args.plot:
+        try:
+            plot_ior_scaling(curve, args.plot)
+        except ValueError as e:
+            print(f'ERROR: {e}')
+            return 1
+        print(f'INFO: Scaling curves drawn to "{args.plot}"')
+    return 0
+
+
+def nfs_client_rtt(nfs_files: list) -> dict:
+    """
+    Works out the NFS round trip time the clients of a run saw, from the stats scan_fio_results finds with
+    client_stats. A client's nfsiostat or mountstats summary is used where there is one, its nfsiostat time series
+    otherwise, limited to the fio window when the series marks it.
+
+    Args:
+        nfs_files (list): (client, name, contents) of the NFS stats files of a run.
+
+    Returns:
+        dict: The mean RTT in milliseconds of 'read' and 'write', weighted by the operations of every client, for the
+            operations any client did.
+    """
+    by_client = {}
+    for client, name, text in nfs_files:
+        by_client.setdefault(client, {})[NFS_STATS_FILE_PATTERN.match(name).group(1)] = text
+
+    totals = {}
+    for files in by_client.values():
+        # (op, ops, RTT in ms) of every mount, interval or summary of this client
+        samples = []
+        if 'mountstats_summary' in files:
+            for row in csv.DictReader(io.StringIO(files['mountstats_summary'])):
+                if row.get('op') in ('READ', 'WRITE') and row.get('rtt_ms_mean'):
+                    samples.append((row['op'].lower(), float(row['ops'] or 0), float(row['rtt_ms_mean'])))
+        elif 'nfsio_summary' in files:
+            for row in csv.DictReader(io.StringIO(files['nfsio_summary'])):
+                for op in ('read', 'write'):
+                    if row.get(f'{op} RTT (ms) mean'):
+                        samples.append((op, float(row[f'{op} ops/s mean'] or 0), float(row[f'{op} RTT (ms) mean'])))
+        elif 'nfsio_stats' in files:
+            for row in csv.DictReader(io.StringIO(files['nfsio_stats'])):
+                if row.get('in_fio_window', '1') in ('0', 'False'):
+                    continue
+                for op in ('read', 'write'):
+                    try:
+                        samples.append((op, float(row[f'{op} ops/s']), float(row[f'{op} avg RTT (ms)'])))
+                    except (KeyError, TypeError, ValueError):
+                        continue
+        for op, ops, rtt in samples:
+            if ops > 0:
+                total = totals.setdefault(op, [0.0, 0.0])
+                total[0] += ops * rtt
+                total[1] += ops
+    return {op: weighted / ops for op, (weighted, ops) in totals.items() if ops}
+
+
+def parse_result_filters(expressions: list, columns: list) -> list:
+    """
+    Parses the -w filters of report and compare, like "engine=fio", "op=read" or "bs=1m,4k".
+
+    Args:
+        expressions (list): The filter expressions.
+        columns (list): Columns that may be filtered on.
+
+    Returns:
+        list: (column, set of accepted values) for every filter.
+
+    Raises:
+        ValueError: If a filter does not look like column=value[,value] or names an unknown column.
+    """
+    filters = []
+    for expression in expressions:
+        column, sep, values = expression.partition('=')
+        if not sep or column not in columns:
+            raise ValueError(f'Invalid filter "{expression}", use column=value[,value] with a column from '
+                             f'{", ".join(columns)}')
+        filters.append((column, set(values.split(','))))
+    return filters
+
+
+def filter_results(results: list, filters: list) -> list:
+    """
+    Keeps the results from report_results that pass every filter from parse_result_filters. Block sizes match as
+    given on the command line as well as in bytes.
+
+    Args:
+        results (list): Results from report_results.
+        filters (list): Filters from parse_result_filters.
+
+    Returns:
+        list: The results that pass.
+    """
+    return [result for result in results
+            if all(str(result[column]) in values or
+                   (column == 'bs' and result[column] != '' and format_size(result[column]) in values)
+                   for column, values in filters)]
+
+
+def report_results(path: str, client_stats: bool = False) -> list:
+    """
+    Reads the results of every fio, IOR, mdtest and IO500 run in a results tarball or directory, together with the
+    cluster it ran on. Tarballs are streamed by scan_fio_results and never extracted.
+
+    IOR runs with a stonewall are taken at the stonewall: the bytes the tasks moved before the deadline over the
+    deadline, which leaves out the wear-out phase where the furthest task waits for the stragglers to catch up.
+
+    Args:
+        path (str): A results tarball or directory.
+        client_stats (bool): Also read the NFS client stats of every run for 'nfs_rtt_ms', which opens every client
+            tarball.
+
+    Returns:
+        list: One dict per run, iteration and operation with the REPORT_CONFIG_COLUMNS and REPORT_POINT_COLUMNS of
+            REPORT_HEADERS, 'num_testfiles', 'iteration', 'bw_bytes', 'iops', 'clat_p99_us', 'nfs_rtt_ms' and the
+            environment from parse_environment_files. Metrics a run does not have are NaN.
+    """
+    results = []
+    for source, run_name, files, environment in scan_fio_results(path, client_stats):
+        nfs_rtt = nfs_client_rtt(files.get('nfs', []))
+        config = {'source': source, 'storage': environment.get('storage', ''), 'lss': environment.get('lss', ''),
+                  'client_instance': environment.get('client_instance', ''),
+                  'server_instance': environment.get('server_instance', '')}
+        if files.get('ior_json'):
+            template = re.match(r'^logs-(IOR-[A-Za-z]+)', run_name)
+            for row in ior_result_rows(ior_json_document(files['ior_json']) or {}, files.get('ior_log', ''),
+                                       ior_point_clients(run_name)):
+                if row['stonewall_bytes'] != '' and row['stonewall_s']:
+                    bw_bytes = row['stonewall_bytes'] / row['stonewall_s']
+                    iops = bw_bytes / row['transfer_size']
+                else:
+                    bw_bytes, iops = row['bw_mib_s'] * 1024 ** 2, row['ops']
+                results.append(dict(config, environment=environment, engine='ior',
+                                    template=template.group(1) if template else 'IOR', op=row['op'],
+                                    bs=row['transfer_size'], iodepth='', numjobs='', threads=row['threads'],
+                                    clients=row['clients'], num_testfiles='', iteration=row['iteration'],
+                                    bw_bytes=bw_bytes, iops=iops, clat_p99_us=math.nan, nfs_rtt_ms=math.nan))
+            continue
+        for row in fio_store_rows(run_name, files, environment) or engine_store_rows(run_name, files, environment):
+            if math.isnan(row['bw_bytes']) and math.isnan(row['iops']):
+                continue
+            point = {column: '' if isinstance(row[column], float) and math.isnan(row[column]) else row[column]
+                     for column in ('engine', 'template', 'op', 'bs', 'iodepth', 'numjobs', 'clients', 'num_testfiles',
+                                    'iteration')}
+            for column in ('bs', 'iodepth', 'numjobs', 'clients', 'num_testfiles', 'iteration'):
+                point[column] = int(point[column]) if point[column] != '' else ''
+            results.append(dict(config, **point, environment=environment, threads='',
+                                bw_bytes=row['bw_bytes'], iops=row['iops'], clat_p99_us=row['clat_p99_us'],
+                                nfs_rtt_ms=nfs_rtt.get(row['op'], math.nan)))
+    return results
+
+
+def cluster_cost(environment: dict, clients: int, lss: int, prices: dict) -> tuple:
+    """
+    Sizes a cluster from the instance data get-aws-info.sh saves in aws-info.
+
+    Args:
+        environment (dict): Cluster description from parse_environment_files.
+        clients (int): Client count of the test point.
+        lss (int): Storage server count.
+        prices (dict): Hourly price per instance type. May be empty.
+
+    Returns:
+        tuple: (vCPUs of the clients, storage servers and Anvils, hourly cost of those instances). Either is None when
+            an instance type or its vCPUs or price is unknown.
+    """
+    instances = [(environment.get('client_instance'), environment.get('client_vcpus'), clients or 0),
+                 (environment.get('server_instance'), environment.get('server_vcpus'), lss or 0),
+                 (environment.get('anvil_instance'), environment.get('anvil_vcpus'), environment.get('anvils', 0))]
+    instances = [instance for instance in instances if instance[2]]
+    vcpus = sum(count * cores for _, cores, count in instances) if all(cores for _, cores, _ in instances) else None
+    cost = (sum(count * prices[name] for name, _, count in instances)
+            if instances and all(name in prices for name, _, _ in instances) else None)
+    return vcpus, cost
+
+
+def scaling_report(results: list, baseline_by: list, prices: dict, min_efficiency: float) -> list:
+    """
+    Averages the runs of every configuration and test point and relates each one to the smallest configuration with
+    the same test point.
+
+    The ideal speedup over the smallest configuration is the smaller of the client and storage server ratios, as
+    neither can carry more than its share. A configuration scales sublinearly when its speedup falls short of that by
+    more than min_efficiency allows. Configurations no larger than the smallest one are compared but never flagged.
+
+    Args:
+        results (list): Results from report_results.
+        baseline_by (list): Columns that must match for configurations to be compared, for example storage.
+        prices (dict): Hourly price per instance type, for the cost-normalized throughput. May be empty.
+        min_efficiency (float): Scaling efficiency in percent below which a configuration is flagged.
+
+    Returns:
+        list: Rows keyed by REPORT_HEADERS, in order of test point and configuration size.
+    """
+    points = {}
+    for result in results:
+        key = tuple(result[column] for column in REPORT_CONFIG_COLUMNS + REPORT_POINT_COLUMNS)
+        entry = points.setdefault(key, {'environment': result['environment'], 'bw_bytes': [], 'iops': []})
+        for metric in ('bw_bytes', 'iops'):
+            if not math.isnan(result[metric]):
+                entry[metric].append(result[metric])
+
+    rows = []
+    for key, entry in points.items():
+        row = dict(zip(REPORT_CONFIG_COLUMNS + REPORT_POINT_COLUMNS, key))
+        bw_gibs = statistics.mean(entry['bw_bytes']) / 1024 ** 3 if entry['bw_bytes'] else math.nan
+        iops = statistics.mean(entry['iops']) if entry['iops'] else math.nan
+        vcpus, cost = cluster_cost(entry['environment'], row['clients'], row['lss'], prices)
+        row.update({
+            'runs': max(len(entry['bw_bytes']), len(entry['iops'])),
+            'bw_gibs': bw_gibs, 'iops': iops,
+            'bw_gibs_per_client': bw_gibs / row['clients'] if row['clients'] else math.nan,
+            'bw_gibs_per_lss': bw_gibs / row['lss'] if row['lss'] else math.nan,
+            'iops_per_client': iops / row['clients'] if row['clients'] else math.nan,
+            'iops_per_lss': iops / row['lss'] if row['lss'] else math.nan,
+            'vcpus': vcpus or '',
+            'mibs_per_vcpu': bw_gibs * 1024 / vcpus if vcpus else math.nan,
+            'cost_per_hour': cost if cost is not None else '',
+            'gibs_per_cost': bw_gibs / cost if cost else math.nan,
+        })
+        rows.append(row)
+
+    # The smallest configuration of every family and test point is the baseline of the others
+    families = {}
+    for row in rows:
+        family = tuple(row[column] for column in baseline_by) + tuple(row[column] for column in REPORT_POINT_COLUMNS)
+        families.setdefault(family, []).append(row)
+    for members in families.values():
+        members.sort(key=lambda row: (row['lss'] or 0, row['clients'] or 0, row['source']))
+        baseline = members[0]
+        for row in members:
+            # Bandwidth and IOPS scale alike at a fixed block size, metadata phases only have IOPS
+            metric = 'iops' if math.isnan(baseline['bw_gibs']) else 'bw_gibs'
+            ideal = min(row['clients'] / baseline['clients'] if row['clients'] and baseline['clients'] else 1,
+                        row['lss'] / baseline['lss'] if row['lss'] and baseline['lss'] else 1)
+            speedup = row[metric] / baseline[metric] if baseline[metric] else math.nan
+            efficiency = 100 * speedup / ideal if ideal else math.nan
+            row.update({'baseline': baseline['source'], 'speedup': speedup, 'ideal_speedup': ideal,
+                        'efficiency_pct': efficiency,
+                        'sublinear': 'yes' if ideal > 1 and efficiency < min_efficiency else ''})
+
+    rows.sort(key=lambda row: (mixed_sort_key(tuple(row[column] for column in baseline_by + REPORT_POINT_COLUMNS)),
+                               row['lss'] or 0, row['clients'] or 0, row['source']))
+    for row in rows:
+        for column, value in row.items():
+            if isinstance(value, float):
+                row[column] = '' if math.isnan(value) else float(f'{value:.4g}')
+    return rows
+
+
+def report_command(argv: list) -> int:
+    """
+    Entry point of "run_fio.py report", which compares the results tarballs of differently sized clusters: bandwidth
+    and IOPS per client and per storage server, scaling efficiency against the smallest configuration and throughput
+    per vCPU and per dollar.
+
+    Args:
+        argv (list): Command line arguments after "report".
+
+    Returns:
+        int: Exit code. 2 when --fail_sublinear is given and a configuration scales sublinearly.
+    """
+    parser = argparse.ArgumentParser(prog=f'{os.path.basename(__file__)} report',
+                                     description='Scaling report across results tarballs',
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('paths', nargs='+', help='Results tarballs from capture-logs.sh or results directories')
+    parser.add_argument('--baseline_by', default='storage',
+                        help='Comma separated columns configurations must share to be compared, for example '
+                             'storage,server_instance')
+    parser.add_argument('--min_efficiency', type=float, default=80.0,
+                        help='Scaling efficiency in percent below which a configuration is flagged as sublinear')
+    parser.add_argument('--prices', default=None,
+                        help='JSON file with the hourly price of every instance type, like {"c6in.8xlarge": 1.81}, '
+                             'for the throughput per dollar')
+    parser.add_argument('-w', '--where', action='append', default=[],
+                        help='Filter like "engine=fio", "op=read" or "template=JonBWRead". May be repeated')
+    parser.add_argument('--csv', default='scaling_report.csv', help='CSV file for the full report')
+    parser.add_argument('--fail_sublinear', action='store_true', default=False,
+                        help='Exit with code 2 when a configuration scales sublinearly')
+    args = parser.parse_args(argv)
+
+    baseline_by = [column for column in args.baseline_by.split(',') if column]
+    unknown = [column for column in baseline_by if column not in REPORT_CONFIG_COLUMNS[1:]]
+    if unknown:
+        parser.error(f'--baseline_by takes columns from {", ".join(REPORT_CONFIG_COLUMNS[1:])}')
+    try:
+        filters = parse_result_filters(args.where, REPORT_CONFIG_COLUMNS + REPORT_POINT_COLUMNS)
+    except ValueError as e:
+        parser.error(str(e))
+    prices = {}
+    if args.prices:
+        try:
+            with open(args.prices, 'r') as file:
+                prices = {name: float(price) for name, price in json.load(file).items()}
+        except (OSError, ValueError, AttributeError) as e:
+            parser.error(f'Cannot read the prices in "{args.prices}": {e}')
+
+    start = time.perf_counter()
+    results = []
+    for path in args.paths:
+        if not os.path.exists(path):
+            print(f'ERROR: "{path}" does not exist')
+            continue
+        found = report_results(path)
+        if not found:
+            print(f'WARNING: No results found in "{path}"')
+        results.extend(found)
+    results = filter_results(results, filters)
+    if not results:
+        print('ERROR: No results to report')
+        return 1
+    rows = scaling_report(results, baseline_by, prices, args.min_efficiency)
+    missing = sorted({result['environment'].get(column) for result in results
+                      for column in ('client_instance', 'server_instance', 'anvil_instance')
+                      if result['environment'].get(column) and result['environment'][column] not in prices})
+    if prices and missing:
+        print(f'WARNING: No price for {", ".join(missing)}, their throughput per dollar is left out')
+
+    with open(args.csv, 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=REPORT_HEADERS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    header = ['source', 'clients', 'lss', 'GiB/s', 'IOPS', 'GiB/s/client', 'GiB/s/LSS', 'MiB/s/vCPU',
+              'GiB/s/$h', 'speedup', 'ideal', 'efficiency %', 'flag']
+    point_columns = baseline_by + REPORT_POINT_COLUMNS
+    for _, table in itertools.groupby(rows, key=lambda row: tuple(row[column] for column in point_columns)):
+        table = list(table)
+        cells = [[str(cell) for cell in (row['source'], row['clients'], row['lss'], row['bw_gibs'], row['iops'],
+                                         row['bw_gibs_per_client'], row['bw_gibs_per_lss'], row['mibs_per_vcpu'],
+                                         row['gibs_per_cost'], row['speedup'], row['ideal_speedup'],
+                                         row['efficiency_pct'], 'SUBLINEAR' if row['sublinear'] else '')]
+                 for row in table]
+        widths = [max(len(cell) for cell in column) for column in zip(header, *cells)]
+        print('\n' + ', '.join(f'{column}={format_size(table[0][column]) if column == "bs" else table[0][column]}'
+                               for column in point_columns if table[0][column] != ''))
+        print(' | '.join(f'{cell:>{width}}' for cell, width in zip(header, widths)))
+        print('-+-'.join('-' * width for width in widths))
+        for line in cells:
+            print(' | '.join(f'{cell:>{width}}' for cell, width in zip(line, widths)))
+
+    sublinear = [row for row in rows if row['sublinear']]
+    print(f'\nINFO: {len(rows)} configurations and test points from {len(results)} results in '
+          f'{time.perf_counter() - start:.1f} s, written to "{args.csv}"')
+    if sublinear:
+        print(f'WARNING: {len(sublinear)} scale sublinearly, below {args.min_efficiency:g}% of the ideal speedup: '
+              f'{", ".join(sorted({row["source"] for row in sublinear}))}')
+    return 2 if sublinear and args.fail_sublinear else 0
+
+
+def regression_p_value(baseline: list, candidate: list, higher_is_better: bool, method: str, alpha: float,
+                       resamples: int = 10000, seed: int = 0) -> typing.Optional[float]:
+    """
+    One-sided p-value of the candidate iterations being worse than the baseline iterations.
+
+    mannwhitney counts the baseline and candidate pairs where the candidate is worse, ties counting half, and compares
+    that with every other way of splitting the pooled iterations into two groups of the same sizes. That is exact up
+    to COMPARE_EXACT_LIMIT splits and uses the normal approximation with tie correction beyond. bootstrap resamples
+    both groups and counts how often the candidate median comes out no worse than the baseline median.
+
+    Args:
+        baseline (list): The baseline iterations.
+        candidate (list): The candidate iterations.
+        higher_is_better (bool): Whether a higher value is better, as for bandwidth, or worse, as for latency.
+        method (str): 'mannwhitney' or 'bootstrap'.
+        alpha (float): The significance level, reached when the p-value is at most alpha. Sample sizes whose smallest
+            possible p-value is above it are not tested.
+        resamples (int): Bootstrap resamples.
+        seed (int): Seed of the bootstrap, so that reruns give the same answer.
+
+    Returns:
+        Optional[float]: The p-value, or None if there are too few iterations to test at alpha.
+    """
+    sign = 1 if higher_is_better else -1
+    if method == 'bootstrap':
+        if min(len(baseline), len(candidate)) < COMPARE_MIN_BOOTSTRAP:
+            return None
+        rng = random.Random(seed)
+        not_worse = 0
+        for _ in range(resamples):
+            drop = sign * (statistics.median(rng.choices(baseline, k=len(baseline))) -
+                           statistics.median(rng.choices(candidate, k=len(candidate))))
+            not_worse += drop <= 0
+        return (not_worse + 1) / (resamples + 1)
+
+    pooled = baseline + candidate
+    splits = math.comb(len(pooled), len(candidate))
+    if not baseline or not candidate or 1 / splits > alpha:
+        return None
+
+    def worse_pairs(group: typing.Iterable, rest: typing.Iterable) -> float:
+        rest = list(rest)
+        return sum(0.5 if value == other else float(sign * (other - value) > 0) for value in group for other in rest)
+
+    observed = worse_pairs(candidate, baseline)
+    if splits <= COMPARE_EXACT_LIMIT:
+        extreme = 0
+        for indexes in itertools.combinations(range(len(pooled)), len(candidate)):
+            chosen = set(indexes)
+            extreme += worse_pairs((pooled[i] for i in chosen),
+                                   (pooled[i] for i in range(len(pooled)) if i not in chosen)) >= observed
+        return extreme / splits
+
+    n1, n2 = len(candidate), len(baseline)
+    ties = sum(count ** 3 - count for count in collections.Counter(pooled).values())
+    sigma = math.sqrt(n1 * n2 / 12 * ((n1 + n2 + 1) - ties / ((n1 + n2) * (n1 + n2 - 1))))
+    if not sigma:
+        return 1.0
+    z = (observed - n1 * n2 / 2 - 0.5) / sigma
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def compare_results(baseline: list, candidate: list, limits: dict, method: str, alpha: float) -> list:
+    """
+    Matches the test points of two result bundles and judges every metric of every point.
+
+    A metric regresses when the candidate median is worse than the baseline median by more than its limit and the
+    iterations say so, with a p-value of at most alpha. It fails the same way when there are too few iterations to
+    test, so that single runs are still held to the limits, and only warns when the difference is not significant.
+
+    Args:
+        baseline (list): Results from report_results of the baseline bundle.
+        candidate (list): Results from report_results of the candidate bundle.
+        limits (dict): Largest change in percent every metric of COMPARE_METRICS may get worse by.
+        method (str): Significance test of regression_p_value.
+        alpha (float): Significance level.
+
+    Returns:
+        list: Rows keyed by COMPARE_HEADERS. Points only one of the bundles has get a single row with status MISSING
+            or NEW.
+    """
+    samples = ({}, {})
+    for side, results in zip(samples, (baseline, candidate)):
+        for result in results:
+            point = side.setdefault(tuple(result[column] for column in COMPARE_POINT_COLUMNS), {})
+            for metric, _ in COMPARE_METRICS:
+                value = result['bw_bytes'] / 1024 ** 3 if metric == 'bw_gibs' else result[metric]
+                if not math.isnan(value):
+                    point.setdefault(metric, []).append(value)
+
+    rows = []
+    for key in sorted(set(samples[0]) | set(samples[1]), key=mixed_sort_key):
+        point = dict(zip(COMPARE_POINT_COLUMNS, key))
+        if key not in samples[1] or key not in samples[0]:
+            rows.append(dict(point, metric='', status='MISSING' if key in samples[0] else 'NEW'))
+            continue
+        for metric, higher_is_better in COMPARE_METRICS:
+            before, after = samples[0][key].get(metric), samples[1][key].get(metric)
+            if not before or not after:
+                continue
+            base_median, candidate_median = statistics.median(before), statistics.median(after)
+            change = 100 * (candidate_median - base_median) / base_median if base_median else math.nan
+            worse = change if not higher_is_better else -change
+            p_value = regression_p_value(before, after, higher_is_better, method, alpha)
+            if worse > limits[metric]:
+                status = 'FAIL' if p_value is None or p_value <= alpha else 'WARN'
+            elif -worse > limits[metric]:
+                status = 'BETTER'
+            else:
+                status = 'PASS'
+            rows.append(dict(point, metric=metric, baseline_n=len(before), candidate_n=len(after),
+                             baseline=float(f'{base_median:.4g}'), candidate=float(f'{candidate_median:.4g}'),
+                             change_pct=round(change, 2), limit_pct=limits[metric],
+                             p_value=round(p_value, 4) if p_value is not None else '', status=status))
+    return rows
+
+
+def compare_command(argv: list) -> int:
+    """
+    Entry point of "run_fio.py compare", the regression gate between a baseline and a candidate result bundle. It
+    works offline on results tarballs or directories: the fio results, the NFS client stats in the client tarballs
+    and the IOR summaryFiles.
+
+    Args:
+        argv (list): Command line arguments after "compare".
+
+    Returns:
+        int: Exit code. 0 when everything passed, 2 on a regression, 1 when nothing could be compared.
+    """
+    parser = argparse.ArgumentParser(prog=f'{os.path.basename(__file__)} compare',
+                                     description='Compare a candidate run against a baseline',
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('baseline', help='Results tarball or directory of the baseline')
+    parser.add_argument('candidate', help='Results tarball or directory of the candidate')
+    parser.add_argument('--test', default='mannwhitney', choices=['mannwhitney', 'bootstrap'],
+                        help='Significance test over the iterations of every test point')
+    parser.add_argument('--alpha', type=float, default=0.05, help='Significance level of the test')
+    parser.add_argument('--max_bw_drop', type=float, default=5.0,
+                        help='Largest bandwidth drop in percent that still passes')
+    parser.add_argument('--max_iops_drop', type=float, default=5.0,
+                        help='Largest IOPS drop in percent that still passes')
+    parser.add_argument('--max_p99_rise', type=float, default=10.0,
+                        help='Largest rise of the p99 completion latency in percent that still passes')
+    parser.add_argument('--max_rtt_rise', type=float, default=15.0,
+                        help='Largest rise of the NFS client RTT in percent that still passes')
+    parser.add_argument('-w', '--where', action='append', default=[],
+                        help='Filter like "engine=fio", "op=read" or "template=JonBWRead". May be repeated')
+    parser.add_argument('--csv', default='compare_report.csv', help='CSV file for the full comparison')
+    parser.add_argument('--fail_missing', action='store_true', default=False,
+                        help='Also fail when a baseline test point is missing from the candidate')
+    args = parser.parse_args(argv)
+
+    if not 0 < args.alpha < 1:
+        parser.error('--alpha should be between 0 and 1')
+    try:
+        filters = parse_result_filters(args.where, COMPARE_POINT_COLUMNS)
+    except ValueError as e:
+        parser.error(str(e))
+    limits = {'bw_gibs': args.max_bw_drop, 'iops': args.max_iops_drop, 'clat_p99_us': args.max_p99_rise,
+              'nfs_rtt_ms': args.max_rtt_rise}
+
+    bundles = []
+    for path in (args.baseline, args.candidate):
+        if not os.path.exists(path):
+            print(f'ERROR: "{path}" does not exist')
+            return 1
+        bundles.append(filter_results(report_results(path, client_stats=True), filters))
+        if not bundles[-1]:
+            print(f'ERROR: No results found in "{path}"')
+            return 1
+    rows = compare_results(bundles[0], bundles[1], limits, args.test, args.alpha)
+
+    with open(args.csv, 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=COMPARE_HEADERS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    header = ['point', 'metric', 'n', 'baseline', 'candidate', 'change %', 'limit %', 'p', 'status']
+    cells = []
+    for row in rows:
+        # Labeled like the run directories of cloud_data_path_tests.sh
+        label = ' '.join(f'{prefix}{format_size(row[column]) if column == "bs" else row[column]}'
+                         for column, prefix in zip(COMPARE_POINT_COLUMNS, ['', '', '', 'b', 'qd', 'nj', 'n', 't'])
+                         if row[column] != '')
+        if row['metric']:
+            cells.append([label, row['metric'], f'{row["baseline_n"]}/{row["candidate_n"]}', row['baseline'],
+                          row['candidate'], row['change_pct'], row['limit_pct'], row['p_value'], row['status']])
+        else:
+            cells.append([label, '', '', '', '', '', '', '', row['status']])
+    cells = [[str(cell) for cell in line] for line in cells]
+    widths = [max(len(cell) for cell in column) for column in zip(header, *cells)]
+    print(' | '.join(f'{cell:>{width}}' for cell, width in zip(header, widths)))
+    print('-+-'.join('-' * width for width in widths))
+    for line in cells:
+        print(' | '.join(f'{cell:>{width}}' for cell, width in zip(line, widths)))
+
+    counts = collections.Counter(row['status'] for row in rows)
+    failed = counts['FAIL'] + (counts['MISSING'] if args.fail_missing else 0)
+    untested = sum(1 for row in rows if row['metric'] and row['p_value'] == '')
+    print(f'\n{", ".join(f"{count} {status}" for status, count in sorted(counts.items()))}, written to "{args.csv}"')
+    if untested:
+        print(f'WARNING: {untested} comparisons had too few iterations for the {args.test} test at alpha '
+              f'{args.alpha:g} and were judged on the limits alone, run more iterations with --sweep_iterations')
+    if not any(row['metric'] for row in rows):
+        print('ERROR: The baseline and candidate have no test points in common')
+        return 1
+    print(f'{"FAIL" if failed else "PASS"}: {args.candidate} against {args.baseline}')
+    return 2 if failed else 0
+
+
+# Subcommands that work on stored results and do not start a test
+OFFLINE_COMMANDS = {
+    'store': store_command,
+    'io500': io500_command,
+    'ior': ior_command,
+    'report': report_command,
+    'compare': compare_command,
+}
+
+
+# =====================================
+# Test Points and Sweeps
+# =====================================
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Builds the command line parser for test runs.
+
+    Returns:
+        argparse.ArgumentParser: The parser.
+    """
+    parser = argparse.ArgumentParser(description='Generate and run fio command',
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('-P', '--print_templates', action='store_true', default=False,
+                        help='Print templates and their settings')
+
+    # Server Mode
+    parser.add_argument('--server', action='store_true', default=False,
+                        help='Start script in server mode')
+
+    # Paths and directories
+    # TODO: Known issue with failure if test_dir is given with trailing slash.  need to add check and parse better.
+    parser.add_argument('-t', '--test_dir', default='/mnt/hs_rdma',
+                        help='Directory in which test files are stored, usually an NFS mount point')
+    parser.add_argument('-o', '--output_dir', default='./fio_results/',
+                        help='The directory to store output files. Defaults to "./fio_results/".')
+
+    # Test configuration
+    parser.add_argument('-T', '--template', help='Preset configurations to use',
+                        choices=list(TEMPLATES.keys()))
+    parser.add_argument('--engine', default='fio', choices=ENGINES,
+                        help='Benchmark to run. ior, mdtest and io500 run under mpirun with fio_numjobs processes per '
+                             'client, block_size as the transfer size, file_size per process and run_time as the '
+                             'stonewall')
+    parser.add_argument('-D', '--use_directory_mode', action='store_true',
+                        help="Use --directory instead of --filename.")
+    parser.add_argument('--nrfiles', type=int,
+                        help='When using directory mode nrfiles is used to specify how many files to generate per'
+                             'fio job/thread. (Requires -D)')
+    parser.add_argument('-N', '--test_name', default='',
+                        help='Test name used for test directory names.')
+    parser.add_argument('-s', '--file_size', default='4G',
+                        help='Test file size in "m, g, or t", total capacity used will be file_size * '
+                             'num_testfiles')
+    parser.add_argument('-l', '--loops', type=int, help='Number of times to run jobs')
+    parser.add_argument('-r', '--run_time', type=int, help='Run time in seconds')
+    parser.add_argument('--steady_state', default=None,
+                        help='Stop each client once it reaches steady state, for example "bw_slope:0.5%%" or '
+                             '"iops:2%%". Uses fio\'s steadystate option, run_time becomes the longest a point runs')
+    parser.add_argument('--ss_dur', default=60, type=int,
+                        help='Seconds of samples the steady state criterion is evaluated over')
+    parser.add_argument('--ss_ramp', default=0, type=int,
+                        help='Seconds at the start of a point that are ignored by steady state detection')
+    parser.add_argument('-n', '--num_testfiles', default=2, type=int,
+                        help='Number of test files to generate and test against. '
+                             'Total number of threads is num_testfiles * fio_numjobs')
+    parser.add_argument('-S', '--skip_creation', action='store_true', default=False,
+                        help="Skip the file creation step")
+    parser.add_argument('-F', '--file_create_threads', type=int, default=multiprocessing.cpu_count(),
+                        help='Maximum number of parallel threads to use for file creation')
+    parser.add_argument('--prefill_max_inflight', default='0',
+                        help='Cap on the total bytes in flight across all file creation workers on each client in '
+                             '"k, m or g". 0 means no cap')
+    parser.add_argument('--prefill_depth', default=1, type=int,
+                        help='Number of aligned writes each file creation worker keeps in flight per file')
+    parser.add_argument('--prefill_pattern', default='random', choices=PREFILL_PATTERNS,
+                        help='Data pattern written to test files during file creation')
+    parser.add_argument('--prefill_compress_pct', default=50, type=int,
+                        help='Percentage of each 4 KiB segment that is zero filled when --prefill_pattern is '
+                             'compressible')
+    parser.add_argument('--prefill_mode', default='write', choices=PREFILL_MODES,
+                        help='How test files are created. fallocate reserves space without writing data and '
+                             'truncate creates sparse files, both are intended for read templates where the file '
+                             'layout matters but the contents do not')
+    parser.add_argument('--prefill_rewrite', action='store_true', default=False,
+                        help='Rewrite every test file even if the prefill manifest shows it can be reused')
+    parser.add_argument('--drop_caches', action='store_true', default=False,
+                        help='Drop the caches of all clients in parallel before every test point')
+    parser.add_argument('--drop_server_caches', action='store_true', default=False,
+                        help='With --drop_caches, drop the caches of the --server_ips hosts as well. They may be '
+                             'production storage servers, so this is only done when asked for')
+    parser.add_argument('--drop_wait_dirty', action='store_true', default=False,
+                        help='Before dropping caches, wait for Dirty and Writeback pages to reach zero on every host')
+    parser.add_argument('--drop_timeout', default=120.0, type=float,
+                        help='Most seconds a host waits for its dirty pages to drain')
+    parser.add_argument('--mpirun', default='mpirun',
+                        help='mpirun used to launch ior, mdtest and io500')
+    parser.add_argument('--mpi_args', default='--allow-run-as-root --oversubscribe',
+                        help='Options added to every mpirun, such as "--mca btl_tcp_if_include ens5"')
+    parser.add_argument('--ior_path', default='/mnt/hs_test/io500/bin/ior',
+                        help='The ior binary on the clients')
+    parser.add_argument('--mdtest_path', default='/mnt/hs_test/io500/bin/mdtest',
+                        help='The mdtest binary on the clients')
+    parser.add_argument('--io500_path', default='/mnt/hs_test/io500/io500',
+                        help='The io500 binary on the clients')
+    parser.add_argument('--io500_config', default='/mnt/hs_test/io500/config-hammer-ec.ini',
+                        help='The IO500 ini file on the clients')
+    parser.add_argument('--mdtest_items', default=1000, type=int,
+                        help='Files every mdtest process creates')
+    parser.add_argument('--sync_start', default=0.0, type=float,
+                        help='Arm every client to start its jobs this many seconds after fio is launched, at the '
+                             'same moment on the controller clock. 0 lets each client start when it gets its jobs')
+    parser.add_argument('--clock_probes', default=8, type=int,
+                        help='Round trips used to measure the clock offset of every client to the controller. 0 '
+                             'skips the measurement')
+    parser.add_argument('--ips', nargs='+', type=valid_ip, required=False,
+                        help='Space separated list of IP addresses of systems to test. This script assumes '
+                             'localhost if no IPs given.')
+    parser.add_argument('--server_ips', nargs='+', type=valid_ip, default=[],
+                        help='Space separated list of storage server (LSS or EC group node) IP addresses. The agent '
+                             'is deployed to them to collect disk, CPU and NIC stats during every fio run')
+
+    # Live telemetry
+    parser.add_argument('--status_interval', default=0, type=int,
+                        help='Seconds between live fio status reports from every client. 0 disables live '
+                             'telemetry')
+    parser.add_argument('--log_avg_msec', default=0, type=int,
+                        help='Milliseconds fio averages its bandwidth, IOPS and latency logs over, such as 1000. The '
+                             'logs of all clients are merged into a cluster timeline. 0 disables the logs')
+    parser.add_argument('--straggler_fraction', default=0.5, type=float,
+                        help='Flag clients whose live bandwidth drops below this fraction of the cluster median')
+    parser.add_argument('--nfs_stats', default='mountstats', choices=['mountstats', 'nfsiostat', 'none'],
+                        help='How NFS client statistics are collected: mountstats samples /proc/self/mountstats in '
+                             'the agent, nfsiostat runs nfsiostat 1 on every client')
+    parser.add_argument('--nfs_stats_interval', default=0.25, type=float,
+                        help='Seconds between mountstats samples')
+    parser.add_argument('--host_stats_interval', default=1.0, type=float,
+                        help='Seconds between samples of client CPU, softirq, NIC, memory and pressure stats. 0 '
+                             'disables them')
+    parser.add_argument('--nic_gbps', default=0.0, type=float,
+                        help='Client NIC line rate in Gbit/s, lets the bottleneck summary recognize a saturated NIC')
+
+    # Fio configurations
+    parser.add_argument('-b', '--block_size', default='1m',
+                        help='Block size to be used with fio command in "k or m"')
+    parser.add_argument('-i', '--io_engine', default='libaio', choices=['libaio', 'posixaio'],
+                        help='IO engine used for fio commands')
+    parser.add_argument('-d', '--io_direction', default='readwrite',
+                        choices=['rw', 'readwrite', 'read', 'write', 'randrw', 'randread', 'randwrite'],
+                        help='IO direction and type used for fio commands')
+
+    parser.add_argument('-f', '--files_per_job', default='1', type=int,
+                        help='If greater than 1 a colon delimited list of files will be used per job. files_per_job'
+                             ' should divide evenly into num_testfiles')
+    parser.add_argument('-m', '--rw_mixread', default='50', type=int,
+                        help='Ratio of reads to writes in mixed workloads')
+    parser.add_argument('-j', '--fio_numjobs', default='2', type=int,
+                        help='Number of threads to run per fio job')
+    parser.add_argument('-q', '--queue_depth', default='16', type=int,
+                        help='Queue depth to be used for each job/thread')
+
+    # Sweeps
+    parser.add_argument('--sweep', default=None,
+                        help='JSON or YAML file describing a matrix of test points to run in one session. See '
+                             'load_sweep_file for the format')
+    parser.add_argument('--axis', action='append', default=[],
+                        help='Sweep axis such as "queue_depth=1,2,4" or "template=JonBWRead,JonBWWrite". May be '
+                             'repeated, the first axis is the outermost loop')
+    parser.add_argument('--sweep_iterations', default=1, type=int,
+                        help='Number of times every sweep point is run')
+    parser.add_argument('--sweep_pause', default=0.0, type=float,
+                        help='Seconds to wait between sweep points, for example to let the storage settle')
+
+    # Saturation search
+    parser.add_argument('--search', default=None,
+                        help='Comma separated parameters to search for the saturation point, from queue_depth and '
+                             'fio_numjobs. They are searched in the given order, starting from their configured '
+                             'values. Can be combined with a sweep, for example over templates')
+    parser.add_argument('--search_max', default=256, type=int,
+                        help='Largest value the search tries for a parameter')
+    parser.add_argument('--search_gain', default=5.0, type=float,
+                        help='Minimum throughput gain in percent per doubling of a parameter')
+    parser.add_argument('--search_p99_us', default=0.0, type=float,
+                        help='Completion latency p99 target in us. Points above it are rejected. 0 disables it')
+    parser.add_argument('--search_metric', default='auto', choices=['auto', 'bw', 'iops'],
+                        help='Throughput measure to maximize. auto uses bandwidth for block sizes of 64k and up and '
+                             'IOPS below that')
+    parser.add_argument('--search_bisect_steps', default=3, type=int,
+                        help='Most bisection steps per parameter once its knee has been bracketed')
+
+    return parser
+
+
+def make_test_args(parser: argparse.ArgumentParser, template: typing.Optional[str] = None,
+                   settings: typing.Optional[dict] = None, overrides: typing.Optional[dict] = None,
+                   argv: typing.Optional[list] = None) -> argparse.Namespace:
+    """
+    Parses the command line into the arguments of one test point. Values are applied in increasing precedence:
+    parser defaults, the template, sweep settings, options given on the command line and finally the point's axis
+    values.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser from build_parser.
+        template (Optional[str]): Template to apply instead of the one given with --template.
+        settings (Optional[dict]): Sweep wide settings keyed by argument name.
+        overrides (Optional[dict]): Axis values of the point keyed by argument name.
+        argv (Optional[list]): Command line to parse. Defaults to sys.argv.
+
+    Returns:
+        argparse.Namespace: The arguments of the test point.
+    """
+    # Store the command line arguments (don't parse yet, so the defaults are not filled in.)
+    args = argparse.Namespace()
+    parser.parse_args(argv, namespace=args)
+    template = template or args.template
+
+    # Apply the template values if the template arg is used
+    if template:
+        template_values = TEMPLATES[template]
+        for arg, value in template_values.items():
+            setattr(args, arg, value)  # We strip the '-' from the arg name to match the attribute name
+    for arg, value in (settings or {}).items():
+        setattr(args, arg, value)
+
+    parser.parse_args(argv, namespace=args)
+    args.template = template
+    for arg, value in (overrides or {}).items():
+        setattr(args, arg, value)
+
+    if args.use_directory_mode is None:
+        args.use_directory_mode = False
+
+    if args.nrfiles and not args.use_directory_mode:
+        parser.error("--nrfiles requires --use_directory_mode to be set")
+    if not args.nrfiles:
+        args.nrfiles = 1
+
+    return args
+
+
+def check_local_args(args: argparse.Namespace) -> bool:
+    """
+    Checks the arguments of a test point that can be verified on the controller. Problems are printed.
+
+    Args:
+        args (argparse.Namespace): The arguments of the test point.
+
+    Returns:
+        bool: True if any argument is invalid.
+    """
+    arg_error = False
+
+    # Check block_size and file_size
+    try:
+        convert_size(args.block_size)
+        convert_size(args.file_size)
+        convert_size(args.prefill_max_inflight)
+    except ValueError:
+        print("ERROR: block_size, file_size or prefill_max_inflight: Sizes should be valid size strings "
+              "(like '10m', '1g', etc.)")
+        arg_error = True
+
+    # Check rw_mixread is a percentage
+    if args.rw_mixread < 0 or args.rw_mixread > 100:
+        print('ERROR: rw_mixread: "%s" is an invalid percentage value. It should be within 0-100.', args.rw_mixread)
+        arg_error = True
+
+    # Checks that runtime is greater than 0. Argument to be had here is a minimum runtime as 1 second is silly
+    if args.run_time and args.run_time <= 0:
+        print('ERROR: run_time: "%s" is an invalid value. It should be greater than 0.', args.run_time)
+        arg_error = True
+
+    if args.steady_state:
+        if not STEADY_STATE_PATTERN.match(args.steady_state):
+            print(f'ERROR: steady_state: "{args.steady_state}" is an invalid value. Use iops, iops_slope, bw or '
+                  f'bw_slope followed by a limit, for example "bw_slope:0.5%".')
+            arg_error = True
+        if args.ss_dur <= 0 or args.ss_ramp < 0:
+            print('ERROR: ss_dur should be greater than 0 and ss_ramp should not be negative.')
+            arg_error = True
+        elif args.run_time and args.ss_dur + args.ss_ramp > args.run_time:
+            print(f'ERROR: steady_state: ss_dur plus ss_ramp ({args.ss_dur + args.ss_ramp}s) is longer than run_time '
+                  f'({args.run_time}s), so steady state could never be attained.')
+            arg_error = True
+
+    if args.drop_timeout < 0:
+        print(f'ERROR: drop_timeout: "{args.drop_timeout}" is an invalid value. It should not be negative.')
+        arg_error = True
+    if args.drop_server_caches and not (args.drop_caches and args.server_ips):
+        print('ERROR: drop_server_caches: Server caches are only dropped with drop_caches and server_ips.')
+        arg_error = True
+
+    if args.engine != 'fio':
+        if not shutil.which(args.mpirun):
+            print(f'ERROR: mpirun: "{args.mpirun}" was not found, it is needed to run {args.engine}.')
+            arg_error = True
+        if args.mdtest_items <= 0:
+            print(f'ERROR: mdtest_items: "{args.mdtest_items}" is an invalid value. It should be greater than 0.')
+            arg_error = True
+
+    if args.log_avg_msec < 0:
+        print(f'ERROR: log_avg_msec: "{args.log_avg_msec}" is an invalid value. It should not be negative.')
+        arg_error = True
+
+    if args.sync_start < 0 or args.clock_probes < 0:
+        print('ERROR: sync_start and clock_probes should not be negative.')
+        arg_error = True
+    elif args.sync_start and not args.clock_probes:
+        print('ERROR: sync_start needs the clock offsets, clock_probes should be greater than 0.')
+        arg_error = True
+
+    if args.host_stats_interval < 0 or args.nic_gbps < 0:
+        print('ERROR: host_stats_interval and nic_gbps should not be negative.')
+        arg_error = True
+    elif args.server_ips and not args.host_stats_interval:
+        print('ERROR: server_ips: storage server stats are sampled every host_stats_interval, it should be greater '
+              'than 0.')
+        arg_error = True
+
+    if args.nfs_stats_interval <= 0:
+        print(f'ERROR: nfs_stats_interval: "{args.nfs_stats_interval}" is an invalid value. It should be greater than '
+              f'0.')
+        arg_error = True
+
+    if args.status_interval < 0:
+        print(f'ERROR: status_interval: "{args.status_interval}" is an invalid value. It should be 0 or greater.')
+        arg_error = True
+
+    if not 0 < args.straggler_fraction <= 1:
+        print(f'ERROR: straggler_fraction: "{args.straggler_fraction}" is an invalid value. It should be within '
+              f'0-1.')
+        arg_error = True
+
+    # Check num_testfiles is a positive integer
+    if args.num_testfiles <= 0:
+        print("ERROR: num_testfiles: Number of test files should be a positive integer.")
+        arg_error = True
+
+    if args.files_per_job <= 0:
+        print("ERROR: files_per_job: Files per job should be a positive integer.")
+        arg_error = True
+    elif args.files_per_job != 1:
+        if args.num_testfiles % args.files_per_job != 0:
+            print("ERROR: files_per_job: Files per job should divide evenly into num_testfiles.")
+            arg_error = True
+
+    if args.prefill_compress_pct < 0 or args.prefill_compress_pct > 100:
+        print(f'ERROR: prefill_compress_pct: "{args.prefill_compress_pct}" is an invalid percentage value. It '
+              f'should be within 0-100.')
+        arg_error = True
+
+    if args.prefill_depth <= 0:
+        print("ERROR: prefill_depth: Prefill depth should be a positive integer.")
+        arg_error = True
+
+    # Check num_job is a positive integer
+    if args.fio_numjobs <= 0:
+        print("ERROR: fio_numjobs: fio number of jobs should be a positive integer.")
+        arg_error = True
+
+    return arg_error
+
+
+def convert_axis_value(parser: argparse.ArgumentParser, name: str, value):
+    """
+    Converts a sweep value to the type the matching command line option expects.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser from build_parser.
+        name (str): The argument name, for example queue_depth.
+        value: The value from the sweep file or --axis.
+
+    Returns:
+        The converted value.
+
+    Raises:
+        ValueError: If name is not an argument that can be swept or the value does not fit it.
+    """
+    actions = {action.dest: action for action in parser._actions}
+    if name in SWEEP_EXCLUDED_ARGS or name not in actions:
+        raise ValueError(f'"{name}" can not be used as a sweep axis')
+    action = actions[name]
+    if isinstance(action, (argparse._StoreTrueAction, argparse._StoreFalseAction)):
+        if isinstance(value, str):
+            value = value.strip().lower() in ('1', 'true', 'yes', 'on')
+        return bool(value)
+    if isinstance(value, str) and action.type is not None:
+        try:
+            value = action.type(value)
+        except (TypeError, ValueError, argparse.ArgumentTypeError):
+            raise ValueError(f'"{value}" is not a valid value for {name}')
+    if action.choices is not None and value not in action.choices:
+        raise ValueError(f'"{value}" is not a valid value for {name}, choose from '
+                         f'{", ".join(map(str, action.choices))}')
+    return value
+
+
+def load_sweep_file(path: str) -> dict:
+    """
+    Loads a sweep description. The file holds an object with these keys:
+
+        axes: argument name mapped to the list of values to run, in loop order with the first axis outermost
+        settings: argument name mapped to a value used for every point (optional)
+        iterations: number of times every point is run (optional)
+
+    For example {"axes": {"fio_numjobs": [1, 2], "queue_depth": [1, 2], "template": ["JonBWWrite", "JonBWRead"]},
+    "settings": {"file_size": "5G", "run_time": 30}}. YAML files need PyYAML.
+
+    Args:
+        path (str): The JSON or YAML file.
+
+    Returns:
+        dict: The sweep description.
+    """
+    with open(path, 'r') as file:
+        text = file.read()
+    if path.endswith(('.yaml', '.yml')):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError(f'PyYAML is needed to read "{path}", install it or use a JSON sweep file')
+        sweep = yaml.safe_load(text)
+    else:
+        sweep = json.loads(text)
+    if not isinstance(sweep, dict) or not isinstance(sweep.get('axes', {}), dict):
+        raise ValueError(f'"{path}" should hold an object with an "axes" object')
+    return sweep
+
+
+def build_sweep_points(parser: argparse.ArgumentParser, args: argparse.Namespace) -> list:
+    """
+    Expands --sweep and --axis into the list of test points to run. Without either, the single point described by
+    the command line is returned.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser from build_parser.
+        args (argparse.Namespace): The arguments parsed from the command line.
+
+    Returns:
+        list: (point values, iteration, point arguments) for every point in run order.
+    """
+    if not args.sweep and not args.axis:
+        return [({}, 1, args)]
+
+    axes, settings, iterations = {}, {}, args.sweep_iterations
+    try:
+        if args.sweep:
+            sweep = load_sweep_file(args.sweep)
+            axes.update({name: values if isinstance(values, list) else [values]
+                         for name, values in sweep.get('axes', {}).items()})
+            settings = sweep.get('settings', {})
+            iterations = int(sweep.get('iterations', iterations))
+        for axis in args.axis:
+            name, sep, values = axis.partition('=')
+            if not sep or not values:
+                raise ValueError(f'Invalid axis "{axis}", expected name=value[,value]')
+            axes[name.strip()] = values.split(',')
+        searched = [name for name in (args.search or '').split(',') if name in axes]
+        if searched:
+            raise ValueError(f'{", ".join(searched)} can not be both a sweep axis and searched with --search')
+
+        for name, values in axes.items():
+            if name == 'template':
+                unknown = [value for value in values if value not in TEMPLATES]
+                if unknown:
+                    raise ValueError(f'Unknown template(s) in sweep: {", ".join(unknown)}')
+            else:
+                axes[name] = [convert_axis_value(parser, name, value) for value in values]
+        settings = {name: convert_axis_value(parser, name, value) for name, value in settings.items()}
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    points = []
+    for values in itertools.product(*axes.values()):
+        point = dict(zip(axes.keys(), values))
+        template = point.pop('template', None)
+        for iteration in range(1, iterations + 1):
+            point_args = make_test_args(parser, template, settings, point)
+            points.append((dict(point, template=point_args.template), iteration, point_args))
+    return points
+
+
+def sweep_point_label(args: argparse.Namespace, iteration: int) -> str:
+    """
+    Names a sweep point the way cloud_data_path_tests.sh names its runs, so the results store can read the point back
+    from the directory name. The label follows the test name, which is expected to end in the mode such as BW.
+
+    Args:
+        args (argparse.Namespace): The arguments of the point.
+        iteration (int): The iteration of the point.
+
+    Returns:
+        str: The label, for example JonBWRead_i1_b1m_nj2_qd1_n32.
+    """
+    template = args.template or (args.engine if args.engine != 'fio' else 'custom')
+    return (f'{template}_i{iteration}_b{args.block_size}_nj{args.fio_numjobs}'
+            f'_qd{args.queue_depth}_n{args.num_testfiles}')
+
+
+def prefill_geometry(args: argparse.Namespace) -> tuple:
+    """
+    Describes the test files a point needs. Points with the same geometry can run on the files already in place.
+
+    Args:
+        args (argparse.Namespace): The arguments of the point.
+
+    Returns:
+        tuple: The settings that decide which test files exist and what they hold.
+    """
+    return (args.test_dir, args.num_testfiles, args.files_per_job, convert_size(args.file_size),
+            args.use_directory_mode, args.nrfiles, args.prefill_pattern, args.prefill_compress_pct, args.prefill_mode)
+
+
+def run_test_point(args: argparse.Namespace, output_dir: str, run_timestamp: str,
+                   prefilled: typing.Optional[tuple] = None) -> tuple:
+    """
+    Runs one test point against agents and fio servers that are already running: creates the test files, runs fio
+    with nfsiostat collection and gathers the results into output_dir. IOR, mdtest and IO500 points are run through
+    run_engine_phases instead of fio, with the same cache drops, client and server stats and file collection.
+
+    Args:
+        args (argparse.Namespace): The arguments of the point.
+        output_dir (str): Directory the results of the point are written to. It must exist.
+        run_timestamp (str): Timestamp of the point, used in file names.
+        prefilled (Optional[tuple]): prefill_geometry of the files created by the previous point. File creation is
+            skipped when it matches this point.
+
+    Returns:
+        tuple: The merged FIOResult of the point, or None if fio produced no results, and the prefill_geometry of the
+        files now in place, or None if they are unknown.
+    """
+    # Record the test point so "store ingest" does not have to rely on the directory name
+    with open(os.path.join(output_dir, 'run_info.json'), 'w') as file:
+        json.dump({'timestamp': run_timestamp, 'test_name': args.test_name, 'template': args.template,
+                   'ips': args.ips, 'args': vars(args)}, file, indent=2, default=str)
+
+    if args.engine == 'fio' and args.fio_numjobs > args.files_per_job:
+        logger.info(f'Current configuration will result in "{args.files_per_job}" files per job and '
+                    f'"{args.fio_numjobs}" threads per job. This means the threads will share files with '
+                    f'concurrent access')
+
+    if args.template:
+        logger.info(f'Loading template "{args.template}"')
+        print_arg_info(args, TEMPLATES[args.template])
+
+    # Generate test files
+    # Skip creation if args.skip_creation is True
+    geometry = prefill_geometry(args)
+    if args.skip_creation:
+        logger.info('Skipping file creation as per the arguments')
+    elif args.engine != 'fio':
+        # IOR writes its own files and mdtest and IO500 create theirs
+        logger.info(f'Skipping file creation, {args.engine} creates its own files')
+        geometry = None
+    elif geometry == prefilled and not args.prefill_rewrite:
+        logger.info('Reusing the test files of the previous point, the file layout is unchanged')
+    else:
+        logger.info('Starting file creation')
+        create_results = fan_out(args.ips, lambda ip_inner: call_agent(
+            ip_inner, 'create_test_files',
+            [args.num_testfiles, args.files_per_job, args.file_create_threads, args.test_dir, args.block_size,
+             args.file_size, ip_inner, args.use_directory_mode, args.nrfiles, args.prefill_max_inflight,
+             args.prefill_depth, args.prefill_pattern, args.prefill_compress_pct, args.prefill_mode,
+             args.prefill_rewrite]), 'File creation')
+        for ip, result in create_results.items():
+            if result.ok:
+                logger.info(result.value)
+            else:
+                logger.error(f'File creation failed on "{ip}": {result.error}')
+                geometry = None
+
+    # Files were just written, drop them from the caches so reads come from storage
+    if args.drop_caches:
+        cache_drop_barrier(args.ips + (args.server_ips if args.drop_server_caches else []), args.drop_wait_dirty,
+                           args.drop_timeout, os.path.join(output_dir, f'cache_drop_{run_timestamp}.json'))
+
+    # Start collecting NFS client stats
+    logger.debug(f'Starting collection of {args.nfs_stats} on all clients')
+    if args.nfs_stats == 'mountstats':
+        # Room for the whole run plus setup and teardown, the oldest samples are dropped beyond that
+        capacity = math.ceil(((args.run_time or 3600) + 300) / args.nfs_stats_interval)
+        nfsio_procs = fan_out(args.ips, lambda ip_inner: call_agent(
+            ip_inner, 'start_mountstats',
+            [run_timestamp, f'/tmp/{ip_inner}_{run_timestamp}', args.nfs_stats_interval, capacity], timeout=30),
+            'mountstats start')
+    elif args.nfs_stats == 'nfsiostat':
+        nfsio_procs = fan_out(args.ips, lambda ip_inner: call_agent(
+            ip_inner, 'start_nfsio_stats', [run_timestamp, f'/tmp/{ip_inner}_{run_timestamp}'], timeout=30),
+            'nfsiostat start')
+    else:
+        nfsio_procs = {}
+    for ip, result in nfsio_procs.items():
+        if not result.ok:
+            logger.warning(f'Could not start {args.nfs_stats} on "{ip}": {result.error}')
+
+    host_stats = {}
+    if args.host_stats_interval:
+        capacity = math.ceil(((args.run_time or 3600) + 300) / args.host_stats_interval)
+        # Storage servers sample their disks as well
+        host_stats = fan_out(args.ips + args.server_ips, lambda ip_inner: call_agent(
+            ip_inner, 'start_host_stats', [run_timestamp, f'/tmp/{ip_inner}_{run_timestamp}',
+                                           args.host_stats_interval, capacity, ip_inner in args.server_ips],
+            timeout=30), 'host stats start')
+        for ip, result in host_stats.items():
+            if not result.ok:
+                logger.warning(f'Could not start host stats on "{ip}": {result.error}')
+
+    if args.engine == 'fio':
+        # Measured right before the run so the offsets have not drifted by the time they are used
+        clock_offsets = measure_clock_offsets(args.ips, args.clock_probes) if args.clock_probes else {}
+        for ip, offset in sorted(clock_offsets.items()):
+            logger.debug(f'Clock of "{ip}" is {offset["offset_s"] * 1000:+.1f} ms off the controller '
+                         f'(+/- {offset["rtt_s"] * 500:.1f} ms)')
+        start_at = time.time() + args.sync_start if args.sync_start else None
+
+        logger.info('Generating fio jobfiles for each server')
+        log_prefix = f'fio_{run_timestamp}' if args.log_avg_msec else None
+        jobfiles = generate_fio_jobfiles(args, '/tmp/', start_at, clock_offsets, log_prefix)
+        logs_dir = os.path.join(output_dir, 'fio_logs')
+        if log_prefix:
+            os.makedirs(logs_dir, exist_ok=True)
+
+        # json+ adds the latency histograms that per client percentiles are merged from
+        fio_command = "fio --output-format=json+"
+        if args.status_interval:
+            fio_command += f" --status-interval={args.status_interval}"
+        for ip, jobfile in jobfiles.items():
+            fio_command += f" --client={ip} {jobfile}"
+
+        fio_json = os.path.join(output_dir, f'fio_raw_{run_timestamp}.json')
+        fio_csv = os.path.join(output_dir, f'fio_output_{run_timestamp}.csv')
+        collector = FioResultCollector()
+        monitor = None
+        if args.status_interval:
+            monitor = FioLiveMonitor(args.straggler_fraction,
+                                     os.path.join(output_dir, f'fio_live_{run_timestamp}.csv'))
+
+        def on_element(*event) -> None:
+            collector.on_element(*event)
+            if monitor:
+                monitor.on_element(*event)
+
+        def on_document(document: dict) -> None:
+            collector.on_document(document)
+            if monitor:
+                monitor.on_document(document)
+
+        logger.info(f'Running command: {fio_command}')
+        run_start = time.time()
+        fio_documents, stderr = run_fio_command(fio_command, fio_json, on_element, on_document,
+                                                logs_dir if log_prefix else None)
+        run_end = time.time()
+        if monitor:
+            monitor.close()
+    else:
+        jobfiles = {'hostfile': write_mpi_hostfile(args.ips, args.fio_numjobs,
+                                                   os.path.join('/tmp/', f'mpi_{run_timestamp}.hosts'))}
+        collector, monitor, fio_documents, fio_csv, log_prefix = FioResultCollector(), None, None, None, None
+        run_start = time.time()
+        stderr = run_engine_phases(args, output_dir, run_timestamp, jobfiles['hostfile'])
+        run_end = time.time()
+
+    # Stop collecting NFS client stats and parse the output
+    logger.debug(f'Stopping collection of {args.nfs_stats} and parsing on all clients')
+    stop_command = 'stop_mountstats' if args.nfs_stats == 'mountstats' else 'stop_and_parse_nfsio_stats'
+    nfsio_summaries = fan_out([ip for ip, result in nfsio_procs.items() if result.ok and result.value],
+                              lambda ip_inner: call_agent(ip_inner, stop_command,
+                                                          [nfsio_procs[ip_inner].value, run_start, run_end],
+                                                          timeout=120),
+                              f'{args.nfs_stats} stop')
+    for ip, result in sorted(nfsio_summaries.items()):
+        for mount in result.value or []:
+            if args.nfs_stats == 'mountstats':
+                if mount['op'] in ('READ', 'WRITE'):
+                    logger.debug(f'NFS {mount["op"]} {ip}:{mount["mount_point"]}: {mount["ops/s"]} ops/s, RTT '
+                                 f'{mount["rtt_ms_mean"]}/{mount["rtt_ms_max"]} ms mean/max, exe '
+                                 f'{mount["exe_ms_mean"]} ms, queue {mount["queue_ms_mean"]} ms, '
+                                 f'{mount["retrans"]} retrans')
+                elif mount['op'] == 'XPRT':
+                    logger.debug(f'NFS transport {ip}:{mount["mount_point"]}: backlog {mount["backlog_mean"]}/'
+                                 f'{mount["backlog_max"]} mean/max, {mount["outstanding_mean"]} requests in flight')
+                continue
+            for op in ('read', 'write'):
+                if f'{op} RTT (ms) mean' not in mount:
+                    continue
+                logger.debug(f'NFS {op} {ip}:{mount["mount_point"]}: RTT {mount[f"{op} RTT (ms) mean"]}/'
+                             f'{mount[f"{op} RTT (ms) max"]} ms mean/max, exe {mount.get(f"{op} exe (ms) mean")} ms, '
+                             f'queue {mount.get(f"{op} queue (ms) mean")} ms, {mount[f"{op} retrans"]} retrans, '
+                             f'rpc bklog {mount.get("rpc bklog mean")}/{mount.get("rpc bklog max")}')
+
+    host_summaries = fan_out([ip for ip, result in host_stats.items() if result.ok and result.value],
+                             lambda ip_inner: call_agent(ip_inner, 'stop_host_stats',
+                                                         [host_stats[ip_inner].value, run_start, run_end,
+                                                          args.nic_gbps], timeout=120),
+                             'host stats stop')
+
+    if fio_csv:
+        logger.debug('Writing out fio results to "%s"', fio_csv)
+    collector.close(fio_csv if fio_documents else None)
+    server_summaries = {ip: result.value for ip, result in host_summaries.items()
+                        if ip in args.server_ips and result.ok and result.value}
+    if server_summaries:
+        write_server_stats(os.path.join(output_dir, f'server_stats_{run_timestamp}.csv'), server_summaries)
+    if collector.total:
+        collector.total.host_stats = {ip: result.value for ip, result in host_summaries.items()
+                                      if ip not in args.server_ips and result.ok and result.value}
+        collector.total.server_stats = server_summaries
+        collector.total.timeline = client_timeline(collector.total.client_windows, clock_offsets, start_at,
+                                                   monitor.history if monitor else None)
+        if collector.total.timeline:
+            with open(os.path.join(output_dir, f'clock_sync_{run_timestamp}.json'), 'w') as file:
+                json.dump({'start_at': start_at, 'offsets': clock_offsets, 'timeline': collector.total.timeline},
+                          file, indent=2)
+            late = [host for host, client in collector.total.timeline['clients'].items()
+                    if start_at is not None and client['start'] > start_at + 1]
+            if late:
+                logger.warning(f'Clients {", ".join(sorted(late))} started more than a second after the armed start, '
+                               f'sync_start ({args.sync_start}s) is too short for fio to hand out the jobs')
+        if log_prefix:
+            columns, collector.total.timeline_summary = fio_log_timeline(logs_dir, log_prefix, clock_offsets,
+                                                                         max(1.0, args.log_avg_msec / 1000))
+            write_columnar(os.path.join(output_dir, f'fio_timeline_{run_timestamp}.col'), columns)
+            with open(os.path.join(output_dir, f'fio_timeline_summary_{run_timestamp}.csv'), 'w',
+                      newline='') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=FIO_TIMELINE_SUMMARY_HEADERS)
+                writer.writeheader()
+                writer.writerows(collector.total.timeline_summary)
+        logger.info(collector.total)
+        for host, state in sorted(collector.total.steady_states.items()):
+            if not state.get('attained'):
+                logger.warning(f'Client {host} did not attain steady state {state.get("ss", args.steady_state)} '
+                               f'within the run time, its results include the warm-up')
+
+    clients_dir = os.path.join(output_dir, 'clients')
+    # Create a subdirectory 'jobfiles' under output_dir if it doesn't exist
+    os.makedirs(clients_dir, exist_ok=True)
+
+    servers_dir = os.path.join(output_dir, 'servers')
+    if args.server_ips:
+        os.makedirs(servers_dir, exist_ok=True)
+
+    # Collect remote files
+    def collect_client_files(ip: str) -> bool:
+        user = 'root'
+        call_agent(ip, 'create_tarfile', [f'/tmp/{ip}_{run_timestamp}'], timeout=300)
+        # name of the tar file
+        tar_file = f"/tmp/{ip}_{run_timestamp}.tgz"
+        command = f'scp {user}@{ip}:{tar_file} {servers_dir if ip in args.server_ips else clients_dir}'
+        return run_command_and_wait(command)
+
+    # Servers only have files when their stats were sampled
+    collect_ips = args.ips + [ip for ip, result in host_stats.items() if ip in args.server_ips and result.ok]
+    for ip, result in fan_out(collect_ips, collect_client_files, 'Client file collection').items():
+        if not result.ok:
+            logger.warning(f'Could not collect the files of "{ip}": {result.error}')
+
+    jobfiles_dir = os.path.join(output_dir, 'jobfiles')
+    # Create a subdirectory 'jobfiles' under output_dir if it doesn't exist
+    os.makedirs(jobfiles_dir, exist_ok=True)
+    # Copy jobfiles to output/jobfiles dir
+    for _, jobfile in jobfiles.items():
+        shutil.move(jobfile, jobfiles_dir)
+
+    if fio_documents:
+        logger.debug('Raw fio output written to "%s"', fio_json)
+
+    if stderr:
+        logger.error(f'Errors:\n{stderr}')
+
+    return collector.total, geometry
+
+
+def sweep_summary_rows(point: dict, iteration: int, args: argparse.Namespace, point_dir: str,
+                       total: typing.Optional[FIOResult]) -> list:
+    """
+    Builds the sweep summary rows of one point, one per I/O direction that moved data.
+
+    Args:
+        point (dict): The axis values of the point.
+        iteration (int): The iteration of the point.
+        args (argparse.Namespace): The arguments of the point.
+        point_dir (str): Directory holding the results of the point.
+        total (Optional[FIOResult]): The merged fio results of the point.
+
+    Returns:
+        list: Rows keyed by SWEEP_SUMMARY_HEADERS and the axis names.
+    """
+    base = dict(point)
+    base.update({'point': os.path.basename(point_dir.rstrip('/')), 'iteration': iteration,
+                 'template': args.template or '', 'engine': args.engine, 'block_size': args.block_size,
+                 'fio_numjobs': args.fio_numjobs,
+                 'queue_depth': args.queue_depth, 'num_testfiles': args.num_testfiles,
+                 'steady_state': total.steady_state_summary() if total else '',
+                 'bottleneck': total.bottleneck() if total and total.host_stats else ''})
+    imbalance = server_imbalance(total.server_stats) if total else {}
+    base.update({'server_disk_imbalance': imbalance.get('disk_imbalance', ''),
+                 'hottest_volume_util': imbalance.get('hottest_volume_util', '')})
+    if total is None and args.engine != 'fio':
+        rows = []
+        for name in sorted(os.listdir(point_dir)):
+            if re.match(r'^engine_results_.*\.csv$', name):
+                with open(os.path.join(point_dir, name), newline='') as csvfile:
+                    rows.extend(parse_engine_results(csvfile.read()))
+        return [dict(base, op=row['phase'], status='ok' if row['valid'] == '1' else 'invalid',
+                     bw_gibs=round(row['bw_bytes'] / (1024 ** 3), 3) if row['bw_bytes'] != '' else '',
+                     iops=round(row['iops'], 1) if row['iops'] != '' else '') for row in rows] or \
+            [dict(base, op='', status='no results')]
+    if total is None:
+        return [dict(base, op='', status='no results')]
+
+    rows = []
+    for op, result in (('read', total.read_result), ('write', total.write_result), ('trim', total.trim_result)):
+        if not result or not result.io_bytes:
+            continue
+        p99 = result.get_percentile(99.0)
+        timeline = next((row for row in total.timeline_summary
+                         if row['op'] == op and row['metric'] == 'bw_bytes' and row['full_buckets']), None)
+        rows.append(dict(base, op=op, status='ok', bw_gibs=round(result.bw_bytes / (1024 ** 3), 3),
+                         iops=round(result.iops, 1), lat_mean_us=round(result.lat_ns.get('mean', 0) / 1000, 1),
+                         clat_p99_us=round(p99 / 1000, 1) if p99 is not None else '',
+                         timeline_min_gibs=round(timeline['cluster_min'] / (1024 ** 3), 3) if timeline else '',
+                         timeline_cov_pct=timeline['cluster_cov_pct'] if timeline else ''))
+    return rows
+
+
+def write_sweep_summary(path: str, rows: list, axes: typing.Iterable[str]) -> None:
+    """
+    Writes the summary of all sweep points to a CSV file.
+
+    Args:
+        path (str): The CSV file.
+        rows (list): Rows from sweep_summary_rows.
+        axes (Iterable[str]): Axis names, added as columns after the standard ones.
+
+    Returns:
+        None
+    """
+    header = SWEEP_SUMMARY_HEADERS + [axis for axis in axes if axis not in SWEEP_SUMMARY_HEADERS]
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=header, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def search_measurement(total: typing.Optional[FIOResult], metric: str) -> typing.Optional[tuple]:
+    """
+    Reduces the results of a search point to the values the saturation search compares.
+
+    Args:
+        total (Optional[FIOResult]): The merged fio results of the point.
+        metric (str): 'bw' to compare bandwidth, 'iops' to compare IOPS.
+
+    Returns:
+        Optional[tuple]: (throughput in bytes/s or IOPS summed over all I/O directions, worst completion latency p99 in
+        us or None), or None if the point produced no results.
+    """
+    if total is None:
+        return None
+    results = [result for result in (total.read_result, total.write_result, total.trim_result)
+               if result and result.io_bytes]
+    if not results:
+        return None
+    throughput = sum(result.bw_bytes if metric == 'bw' else result.iops for result in results)
+    p99s = [result.get_percentile(99.0) for result in results]
+    p99s = [p99 / 1000 for p99 in p99s if p99 is not None]
+    return throughput, max(p99s) if p99s else None
+
+
+def saturation_search(measure: typing.Callable[[dict], typing.Optional[tuple]], start: dict, params: list,
+                      max_value: int = 256, min_gain: float = 5.0, p99_slo_us: float = 0.0,
+                      bisect_steps: int = 3) -> tuple:
+    """
+    Finds the knee of the throughput curve over queue depth and/or numjobs without running a full grid.
+
+    The parameters are searched one after the other, each starting from the best point found so far. A parameter is
+    doubled as long as every doubling raises throughput by at least min_gain percent and p99 latency stays within
+    p99_slo_us. The range between the last accepted and the first rejected value is then bisected. A value between
+    the two must gain min_gain percent per doubling, prorated by log2 of the step, so a step of 1.5x needs about 58%
+    of min_gain. Finally the range below the accepted value is bisected for a smaller value that gives up less than
+    that prorated gain, so a plateau reached within the last doubling reports where it starts.
+
+    Args:
+        measure (Callable[[dict], Optional[tuple]]): Runs a point with the given parameter values and returns
+            (throughput, p99 in us) as from search_measurement, or None if the point failed.
+        start (dict): Starting value of every parameter in params.
+        params (list): Parameters to search in order, for example ['queue_depth', 'fio_numjobs'].
+        max_value (int): Largest value tried for any parameter.
+        min_gain (float): Minimum throughput gain in percent per doubling.
+        p99_slo_us (float): Completion latency p99 target in us. 0 disables the latency target.
+        bisect_steps (int): Most bisection steps per parameter.
+
+    Returns:
+        tuple: (best parameter values, their measurement, dict of parameter to the reason its search stopped,
+        number of points measured).
+    """
+    measured = {}
+
+    def run(values: dict) -> typing.Optional[tuple]:
+        key = tuple(sorted(values.items()))
+        if key not in measured:
+            measured[key] = measure(dict(values))
+        return measured[key]
+
+    def rejection(candidate: typing.Optional[tuple], best: typing.Optional[tuple], step: float) -> str:
+        if candidate is None:
+            return 'the point failed'
+        throughput, p99 = candidate
+        if p99_slo_us and (p99 is None or p99 > p99_slo_us):
+            return f'p99 above {p99_slo_us:g} us'
+        if best is not None and throughput < best[0] * (1 + min_gain / 100 * math.log2(step)):
+            return f'gain below {min_gain:g}% per doubling'
+        return ''
+
+    best_values = dict(start)
+    best = run(best_values)
+    reasons = {}
+    if rejection(best, None, 1):
+        reasons = {param: f'starting point rejected, {rejection(best, None, 1)}' for param in params}
+        return best_values, best, reasons, len(measured)
+
+    for param in params:
+        previous, lower, upper = None, best_values[param], None
+        while upper is None:
+            value = min(lower * 2, max_value)
+            if value <= lower:
+                reasons[param] = f'reached the limit of {max_value}'
+                break
+            candidate = run(dict(best_values, **{param: value}))
+            reason = rejection(candidate, best, value / lower)
+            if reason:
+                upper, reasons[param] = value, reason
+            else:
+                previous, lower, best_values[param], best = lower, value, value, candidate
+
+        for _ in range(bisect_steps):
+            if upper is None or upper - lower <= 1:
+                break
+            value = (lower + upper) // 2
+            candidate = run(dict(best_values, **{param: value}))
+            if rejection(candidate, best, value / lower):
+                upper = value
+            else:
+                previous, lower, best_values[param], best = lower, value, value, candidate
+
+        # Look for the start of a plateau below the accepted value
+        for _ in range(bisect_steps):
+            if previous is None or lower - previous <= 1:
+                break
+            value = (previous + lower) // 2
+            candidate = run(dict(best_values, **{param: value}))
+            if (candidate is None or (p99_slo_us and (candidate[1] is None or candidate[1] > p99_slo_us)) or
+                    candidate[0] * (1 + min_gain / 100 * math.log2(lower / value)) < best[0]):
+                previous = value
+            else:
+                lower, best_values[param], best = value, value, candidate
+
+    return best_values, best, reasons, len(measured)
+
+
+# =====================================
+# MAIN
+# =====================================
+
+
+def main():
+    if sys.argv[1:2] and sys.argv[1] in OFFLINE_COMMANDS:
+        sys.exit(OFFLINE_COMMANDS[sys.argv[1]](sys.argv[2:]))
+
+    args = None
+    try:
+        # Generate a formatted timestamp at the beginning of your script
+        run_timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+
+        parser = build_parser()
+        args = make_test_args(parser)
+
+        if args.print_templates:
+            print_templates_information()
+            sys.exit(0)
+
+        if args.server:
+            listener()
+            sys.exit(0)
+
+        points = build_sweep_points(parser, args)
+        sweep = len(points) > 1 or bool(args.sweep or args.axis or args.search)
+
+        # Argument checking
+        arg_error = False
+        # Clients and storage servers both run the agent
+        agent_ips = (args.ips or []) + args.server_ips
+
+        # Local Argument checks
+        # Check ssh access to remote servers
+        for ip, result in fan_out(agent_ips, lambda ip_inner: test_ssh_access(ip_inner, 'root'), 'SSH checks',
+                                  timeout=60).items():
+            if not result.ok:
+                # Handle the error appropriately, you could either exit the program or remove the IP from the list
                 print(f"Non-interactive SSH session failed for IP: {ip}")
                 arg_error = True
 
@@ -1508,111 +6756,95 @@ def main():
             # Ensure the output directory path ends with a trailing slash
             args.output_dir += '/'
 
-        # Check block_size and file_size
-        try:
-            convert_size(args.block_size)
-            convert_size(args.file_size)
-        except ValueError:
-            print("ERROR: block_size or file_size: Block size and file size should be valid size strings "
-                  "(like '10m', '1g', etc.)")
-            arg_error = True
+        for point, iteration, point_args in points:
+            if check_local_args(point_args):
+                if sweep:
+                    print(f'ERROR: The sweep point {point} has invalid arguments')
+                arg_error = True
 
-        # Check rw_mixread is a percentage
-        if args.rw_mixread < 0 or args.rw_mixread > 100:
-            print('ERROR: rw_mixread: "%s" is an invalid percentage value. It should be within 0-100.', args.rw_mixread)
+        if args.sweep_iterations <= 0:
+            print("ERROR: sweep_iterations: Sweep iterations should be a positive integer.")
             arg_error = True
-
-        # Checks that runtime is greater than 0. Argument to be had here is a minimum runtime as 1 second is silly
-        if args.run_time and args.run_time <= 0:
-            print('ERROR: run_time: "%s" is an invalid value. It should be greater than 0.', args.run_time)
+        if args.sweep_pause < 0:
+            print(f'ERROR: sweep_pause: "{args.sweep_pause}" is an invalid value. It should not be negative.')
             arg_error = True
 
-        # Check num_testfiles is a positive integer
-        if args.num_testfiles <= 0:
-            print("ERROR: num_testfiles: Number of test files should be a positive integer.")
+        search_params = [param for param in (args.search or '').split(',') if param]
+        if any(param not in SEARCH_PARAMS for param in search_params):
+            print(f'ERROR: search: "{args.search}" is invalid. Choose parameters from {", ".join(SEARCH_PARAMS)}.')
             arg_error = True
-
-        if args.files_per_job <= 0:
-            print("ERROR: files_per_job: Files per job should be a positive integer.")
+        if args.search and any(point_args.engine != 'fio' for _, _, point_args in points):
+            print('ERROR: search: The saturation search only varies fio parameters, it needs engine fio.')
+            arg_error = True
+        if args.search and (args.search_max <= 0 or args.search_gain < 0 or args.search_p99_us < 0 or
+                            args.search_bisect_steps < 0):
+            print('ERROR: search_max should be positive and search_gain, search_p99_us and search_bisect_steps should '
+                  'not be negative.')
             arg_error = True
-        elif args.files_per_job != 1:
-            if args.num_testfiles % args.files_per_job != 0:
-                print("ERROR: files_per_job: Files per job should divide evenly into num_testfiles.")
-                arg_error = True
 
-        # Check num_job is a positive integer
-        if args.fio_numjobs <= 0:
-            print("ERROR: fio_numjobs: fio number of jobs should be a positive integer.")
+        # A storage server that is also a client would get two agents on the same port
+        overlap = sorted(set(args.ips or []) & set(args.server_ips))
+        if overlap:
+            print(f'ERROR: server_ips: {", ".join(overlap)} are also in ips.')
             arg_error = True
 
         # Setup remote server
-        for ip in args.ips:
-            max_attempts = 3
-            user = 'root'
-            source_file = os.path.realpath(__file__)
-            destination_path = f'/tmp/{os.path.basename(__file__)}'
-            command = f'scp {source_file} {user}@{ip}:{destination_path}'
-            for attempt in range(max_attempts):
-                if run_command_and_wait(command):
-                    break
-                else:
-                    time.sleep(2 ** attempt)
-
-            server_log = f"/tmp/{os.path.splitext(os.path.basename(__file__))[0]}_output_{run_timestamp}.log"
-            command = f'ssh {user}@{ip} "nohup python3 {destination_path} --server &> {server_log} &"'
-            attempt = 0
-            for attempt in range(30):  # Try for 30 times
-                if run_command_and_go(command):
-                    port_check_attempt = 0
-                    for port_check_attempt in range(30):  # Try to check the port for 30 times
-                        if is_port_open(ip, 5000):
-                            print(f'INFO: "run_fio.py --server" successfully launched on "{ip}"')
-                            break  # Exit inner loop if port is open
-                        else:
-                            time.sleep(1)  # Wait for a second before checking again
-                    else:
-                        print(f'WARNING: Port {5000} did not become available after {port_check_attempt + 1} seconds '
-                              f'on "{ip}". Retrying to launch the server.')
-                        continue  # Continue the outer loop if port did not open within 30 seconds
-                else:
-                    print(f'ERROR: Command "{command}" failed')
-                    time.sleep(1)  # Wait for a second before trying to re-run the command
-                break  # Exit outer loop if command succeeded and port is open
-            else:
-                print(f"ERROR: `{command}` did not succeed after {attempt + 1} attempts")
+        for ip, result in fan_out(agent_ips, lambda ip_inner: deploy_agent(ip_inner, 'root', run_timestamp),
+                                  'Agent deployment').items():
+            if not result.ok:
+                print(f'ERROR: Could not start "run_fio.py --server" on "{ip}": {result.error}')
+                arg_error = True
 
-        # Check test environment on each machine
-        max_attempts = 3
-        time.sleep(5)
-        for ip in args.ips:
+        # Check test environment on each machine, once for every distinct set of checked arguments
+        remote_check_args = []
+        for _, _, point_args in points:
+            check_args = [point_args.test_dir, point_args.num_testfiles, point_args.file_create_threads,
+                          point_args.skip_creation, point_args.files_per_job, point_args.use_directory_mode,
+                          point_args.nrfiles]
+            if check_args not in remote_check_args:
+                remote_check_args.append(check_args)
+
+        def check_remote(ip: str) -> list:
+            max_attempts = 3
             print(f'INFO: Initiating remote environment checks on "{ip}"')
-            for attempt in range(max_attempts):
-                time.sleep(2 ** attempt)
-                success, response = sender(ip, 5000, f'remote_checks, {args.test_dir}, {args.num_testfiles}, '
-                                                     f'{args.file_create_threads}, {args.skip_creation}, {ip}, '
-                                                     f'{args.files_per_job}, {args.use_directory_mode}, {args.nrfiles}',
-                                           False, False)
-                if success:
-                    remote_arg_error, remote_errors = eval(response)
-                    if remote_arg_error:
-                        arg_error = True
-                        print(remote_errors)
-                    break
+            responses = []
+            for check_args in remote_check_args:
+                for attempt in range(max_attempts):
+                    try:
+                        responses.append(call_agent(ip, 'remote_checks', check_args[:4] + [ip] + check_args[4:],
+                                                    timeout=120))
+                        break
+                    except (OSError, AgentError):
+                        if attempt == max_attempts - 1:
+                            raise
+                        time.sleep(2 ** attempt)
+            return responses
+
+        for ip, result in fan_out(args.ips, check_remote, 'Remote checks').items():
+            if not result.ok:
+                print(f'ERROR: Remote checks failed on "{ip}": {result.error}')
+                arg_error = True
+                continue
+            for remote_arg_error, remote_errors in result.value:
+                if remote_arg_error:
+                    arg_error = True
+                    print(remote_errors)
 
         # Exits after all parameters are checked
         if arg_error:
             print('ERROR: Too many invalid arguments -- aborting')
-            for ip in args.ips:
-                sender(ip, 5000, f'quit', False, False)
+            fan_out(agent_ips, lambda ip_inner: sender(ip_inner, 5000, 'quit', [], False, False), 'Agent shutdown',
+                    timeout=30)
             parser.print_help()
             sys.exit(1)
 
         # Generate a formatted timestamp at the beginning of your script
         run_timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
 
-        # Create a directory for this run's output
+        # Create a directory for this run's output. A sweep gets one bundle with a directory per point
+        test_name = args.test_name if args.test_name != "" else ("sweep" if sweep else "")
         output_dir = os.path.expanduser(f'{args.output_dir}{run_timestamp}'
-                                        f'{"_" + args.test_name if args.test_name != "" else ""}/')
+                                        f'{"_" + test_name if test_name != "" else ""}/')
         os.makedirs(output_dir, exist_ok=True)
 
         # Create a logfile for this run
@@ -1641,106 +6873,116 @@ def main():
         logger.debug('Copying running script "%s" to "%s"', __file__, output_dir)
         shutil.copy2(__file__, output_dir)
 
-        if args.fio_numjobs > args.files_per_job:
-            logger.info(f'Current configuration will result in "{args.files_per_job}" files per job and '
-                        f'"{args.fio_numjobs}" threads per job. This means the threads will share files with '
-                        f'concurrent access')
-
-        if args.template:
-            logger.info(f'Loading template "{args.template}"')
-            print_arg_info(args, TEMPLATES[args.template])
-
-        # Generate test files
-        # Skip creation if args.skip_creation is True
-        if args.skip_creation:
-            logger.info('Skipping file creation as per the arguments')
-        else:
-            logger.info('Starting file creation')
-            # Parallelize calls to sender function with ThreadPoolExecutor
-            with ThreadPoolExecutor(max_workers=len(args.ips)) as executor:
-                executor.map(lambda ip_inner:
-                             sender(ip_inner, 5000,
-                                    f'create_test_files, {args.num_testfiles}, {args.files_per_job}, '
-                                    f'{args.file_create_threads}, {args.test_dir}, {args.block_size}, {args.file_size},'
-                                    f' {ip_inner}, {args.use_directory_mode}, {args.nrfiles}', True, True),
-                             args.ips)
-
-        # Launch fio servers
-        for ip in args.ips:
+        # Launch fio servers. They stay up for every point of a sweep
+        def start_fio_server(ip: str) -> bool:
             logger.debug(f'Starting fio server on {ip}')
-            command = 'fio --server &'
-            sender(ip, 5000, f'run_command_and_go, {command}', True, True)
-
-        fio_server_timeout = 30
-        for ip in args.ips:
-            for _ in range(fio_server_timeout):
-                if is_port_open(ip, 8765):
-                    logger.debug(f'Fio server came online on "{ip}"')
-                    break
-                else:
-                    time.sleep(5)
-            else:
-                logger.error(f"Fio server did not start at {ip} within timeout period")
-                sys.exit(1)
-
-        logger.info('Generating fio jobfiles for each server')
-        jobfiles = generate_fio_jobfiles(args, '/tmp/')
-
-        # Start collecting nfsiostat stats
-        nfsio_procs = {}
-        for ip in args.ips:
-            logger.debug('Starting collection of nfsiostat on "%s"', ip)
-            nfsio_procs[ip] = sender(ip, 5000,
-                                     f'start_nfsio_stats, {run_timestamp}, /tmp/{ip}_{run_timestamp}',
-                                     True, True)
-
-        fio_command = "fio --output-format=json"
-        for ip, jobfile in jobfiles.items():
-            fio_command += f" --client={ip} {jobfile}"
-
-        logger.info(f'Running command: {fio_command}')
-        stdout, stderr = run_fio_command(fio_command)
+            call_agent(ip, 'run_command_and_go', ['fio --server &'], timeout=30)
+            if wait_for_port(ip, 8765, fio_server_timeout):
+                logger.debug(f'Fio server came online on "{ip}"')
+                return True
+            return False
 
-        # Stop collecting nfsiostat stats and parse the output
-        for ip in args.ips:
-            logger.debug('Stopping collection of nfsiostat and parsing on "%s"', ip)
-            nfsio_procs[ip] = sender(ip, 5000, f'stop_and_parse_nfsio_stats, {nfsio_procs[ip][1]}',
-                                     True, True)
+        fio_server_timeout = 150
+        fio_ips = args.ips if any(point_args.engine == 'fio' for _, _, point_args in points) else []
+        for ip, result in fan_out(fio_ips, start_fio_server, 'fio server launch').items():
+            if not result.ok:
+                logger.error(f"Fio server did not start at {ip} within timeout period ({result.error})")
+                sys.exit(1)
 
-        fio_csv = os.path.join(output_dir, f'fio_output_{run_timestamp}.csv')
-        logger.debug('Writing out fio results to "%s"', fio_csv)
+        if not sweep:
+            run_test_point(args, output_dir, run_timestamp)
+            logger.info('Testing complete, please refer to "%s" for more details', output_dir)
+            sys.exit(0)
 
-        fio_results = [FIOResult(stdout, i) for i in range(len(stdout['client_stats']))]
-        total_fio = reduce(lambda a, b: a + b, fio_results)
-        logger.info(total_fio)
-        json_to_csv(stdout, fio_csv)
-
-        clients_dir = os.path.join(output_dir, 'clients')
-        # Create a subdirectory 'jobfiles' under output_dir if it doesn't exist
-        os.makedirs(clients_dir, exist_ok=True)
-        # Collect remote files
-        for ip in args.ips:
-            user = 'root'
-            sender(ip, 5000, f'create_tarfile, /tmp/{ip}_{run_timestamp}', True, True)
-            # name of the tar file
-            tar_file = f"/tmp/{ip}_{run_timestamp}.tgz"
-            command = f'scp {user}@{ip}:{tar_file} {clients_dir}'
-            run_command_and_wait(command)
-
-        jobfiles_dir = os.path.join(output_dir, 'jobfiles')
-        # Create a subdirectory 'jobfiles' under output_dir if it doesn't exist
-        os.makedirs(jobfiles_dir, exist_ok=True)
-        # Copy jobfiles to output/jobfiles dir
-        for _, jobfile in jobfiles.items():
-            shutil.move(jobfile, jobfiles_dir)
-
-        if stdout:
-            logger.debug(f'Output:\n{json.dumps(stdout, indent=4)}')
-
-        if stderr:
-            logger.error(f'Errors:\n{stderr}')
-
-        logger.info('Testing complete, please refer to "%s" for more details', output_dir)
+        with open(os.path.join(output_dir, 'sweep.json'), 'w') as file:
+            json.dump({'axes': args.axis, 'sweep_file': args.sweep, 'search': search_params, 'points': [
+                {'point': point, 'iteration': iteration} for point, iteration, _ in points]}, file, indent=2,
+                default=str)
+
+        summary_csv = os.path.join(output_dir, 'sweep_summary.csv')
+        axes = list(points[0][0].keys()) + search_params
+        summary_rows = []
+        prefilled = None
+        point_timestamp = None
+
+        def run_point(point: dict, iteration: int, point_args: argparse.Namespace, description: str) -> tuple:
+            nonlocal prefilled, point_timestamp
+            if point_timestamp is not None and args.sweep_pause:
+                logger.debug(f'Pausing {args.sweep_pause:g}s before the next point')
+                time.sleep(args.sweep_pause)
+            # Each point needs its own timestamp, it names the client side stats directories
+            while point_timestamp == datetime.now().strftime('%Y-%m-%d_%H-%M-%S'):
+                time.sleep(0.1)
+            point_timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+
+            label = sweep_point_label(point_args, iteration)
+            point_args.test_name = f'{args.test_name}_{label}' if args.test_name else f'SWEEP_{label}'
+            point_dir = os.path.join(output_dir, f'{point_timestamp}_{point_args.test_name}/')
+            os.makedirs(point_dir, exist_ok=True)
+            point_handler = logging.FileHandler(filename=os.path.join(point_dir, f'output_log_{point_timestamp}.log'),
+                                                mode='w')
+            point_handler.setLevel(logging.DEBUG)
+            point_handler.setFormatter(formatter)
+            logger.addHandler(point_handler)
+            try:
+                logger.info(f'Starting {description}: {point_args.test_name}')
+                total, prefilled = run_test_point(point_args, point_dir, point_timestamp, prefilled)
+            finally:
+                logger.removeHandler(point_handler)
+                point_handler.close()
+
+            summary_rows.extend(sweep_summary_rows(point, iteration, point_args, point_dir, total))
+            # Rewrite the summary after every point so a stopped sweep still leaves one behind
+            write_sweep_summary(summary_csv, summary_rows, axes)
+            return total
+
+        if not search_params:
+            for index, (point, iteration, point_args) in enumerate(points, 1):
+                run_point(point, iteration, point_args, f'sweep point {index} of {len(points)}')
+        else:
+            search_csv = os.path.join(output_dir, 'search_summary.csv')
+            search_rows = []
+            for index, (point, iteration, point_args) in enumerate(points, 1):
+                metric = args.search_metric
+                if metric == 'auto':
+                    metric = 'bw' if convert_size(point_args.block_size) >= 64 * 1024 else 'iops'
+
+                def measure(values: dict) -> typing.Optional[tuple]:
+                    search_args = argparse.Namespace(**vars(point_args))
+                    for param, value in values.items():
+                        setattr(search_args, param, value)
+                    total = run_point(dict(point, **values), iteration, search_args,
+                                      f'search of point {index} of {len(points)} at '
+                                      f'{", ".join(f"{param}={value}" for param, value in values.items())}')
+                    return search_measurement(total, metric)
+
+                start = {param: getattr(point_args, param) for param in search_params}
+                best_values, best, reasons, measured = saturation_search(
+                    measure, start, search_params, args.search_max, args.search_gain, args.search_p99_us,
+                    args.search_bisect_steps)
+
+                throughput, p99 = best if best else (None, None)
+                shown = ('N/A' if throughput is None else
+                         f'{throughput / (1024 ** 3):.2f} GiB/s' if metric == 'bw' else f'{throughput:.0f} IOPS')
+                logger.info(f'Saturation point of {point_args.template or "custom"} {point}: '
+                            f'{", ".join(f"{param}={value}" for param, value in best_values.items())} with {shown}, '
+                            f'p99 {"N/A" if p99 is None else f"{p99:.1f} us"} after {measured} points '
+                            f'({"; ".join(f"{param}: {reason}" for param, reason in reasons.items())})')
+                search_rows.append({
+                    'template': point_args.template or '', 'block_size': point_args.block_size,
+                    'io_direction': point_args.io_direction, 'metric': metric,
+                    'queue_depth': best_values.get('queue_depth', point_args.queue_depth),
+                    'fio_numjobs': best_values.get('fio_numjobs', point_args.fio_numjobs),
+                    'throughput': '' if throughput is None else round(throughput, 1),
+                    'clat_p99_us': '' if p99 is None else round(p99, 1), 'points_measured': measured,
+                    'stop_reasons': '; '.join(f'{param}: {reason}' for param, reason in reasons.items())})
+                with open(search_csv, 'w', newline='') as file:
+                    writer = csv.DictWriter(file, fieldnames=SEARCH_SUMMARY_HEADERS)
+                    writer.writeheader()
+                    writer.writerows(search_rows)
+
+        logger.info('%s of %d points complete, please refer to "%s" for more details',
+                    'Search' if search_params else 'Sweep', len(points), output_dir)
     except KeyboardInterrupt:
         print("Ctrl-C received, exiting...")
     except SystemExit as e:
@@ -1749,7 +6991,7 @@ def main():
         print(f"Unhandled exception: {str(e)}")
         logger.error(e, exc_info=True)
     finally:
-        if not args.print_templates:
+        if args is not None and not args.print_templates:
             cleanup(args)
 
 
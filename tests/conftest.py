@@ -0,0 +1,5 @@
+import os
+import sys
+
+# run_fio.py is a script at the top of the repository rather than an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,80 @@
+import array
+import math
+import os
+
+import pytest
+
+import run_fio
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'performance-results',
+                      'results-small-4clients-4lss-arm.tar.gz')
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'runs.col')
+    columns = {
+        'bw': array.array('d', [1.5, math.nan, math.inf, -0.25]),
+        'count': array.array('q', [0, -1, 2 ** 40, 7]),
+        'template': ['JonBWRead', 'JonBWRead', '', 'JonIOPSWrite'],
+        'host': ['10.0.1.201', 'client-ü', '10.0.1.201', '10.0.1.202'],
+    }
+    run_fio.write_columnar(path, columns)
+
+    with open(path, 'rb') as file:
+        assert file.read(len(run_fio.COLUMNAR_MAGIC)) == run_fio.COLUMNAR_MAGIC
+    assert not os.path.exists(f'{path}.tmp')
+
+    read = run_fio.read_columnar(path)
+    assert list(read) == list(columns)
+    assert read['bw'].typecode == 'd' and read['count'].typecode == 'q'
+    assert read['bw'][0] == 1.5 and math.isnan(read['bw'][1]) and read['bw'][2] == math.inf
+    assert read['count'] == columns['count']
+    assert read['template'] == columns['template']
+    assert read['host'] == columns['host']
+
+
+def test_read_selected_columns(tmp_path):
+    path = str(tmp_path / 'runs.col')
+    run_fio.write_columnar(path, {'a': array.array('d', [1.0]), 'b': ['x'], 'c': array.array('i', [3])})
+    assert run_fio.read_columnar(path, ['c', 'b', 'missing']) == {'b': ['x'], 'c': array.array('i', [3])}
+
+
+def test_empty_store(tmp_path):
+    path = str(tmp_path / 'empty.col')
+    run_fio.write_columnar(path, {'a': array.array('d'), 'b': []})
+    assert run_fio.read_columnar(path) == {'a': array.array('d'), 'b': []}
+
+
+def test_unequal_columns_are_rejected(tmp_path):
+    path = str(tmp_path / 'runs.col')
+    with pytest.raises(ValueError):
+        run_fio.write_columnar(path, {'a': array.array('d', [1.0, 2.0]), 'b': ['x']})
+    assert not os.path.exists(path)
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / 'runs.csv'
+    path.write_text('run,bw\n')
+    with pytest.raises(ValueError):
+        run_fio.read_columnar(str(path))
+
+
+@pytest.mark.skipif(not os.path.exists(SAMPLE), reason='sample results are not checked out')
+def test_ingest_and_query(tmp_path):
+    store = str(tmp_path / 'store.col')
+    assert run_fio.store_ingest([SAMPLE], store) == 32
+    columns = run_fio.read_columnar(store)
+    assert set(columns) == set(run_fio.STORE_TEXT_COLUMNS + run_fio.STORE_NUMERIC_COLUMNS)
+    assert len(columns['run']) == 32
+
+    # Ingesting the same runs again replaces them instead of adding rows
+    run_fio.store_ingest([SAMPLE], store)
+    columns = run_fio.read_columnar(store)
+    assert len(columns['run']) == 32
+
+    header, rows, matched = run_fio.store_query(columns, [run_fio.parse_store_filter('engine=ior')], ['op', 'iodepth'],
+                                                None, 'bw_gibs', 'count')
+    # IOR runs have no iodepth, the missing values share one row per direction
+    assert header == ['op', 'iodepth', 'count(bw_gibs)']
+    assert [row[:2] for row in rows] == [['read', 'N/A'], ['write', 'N/A']]
+    assert sum(int(row[2]) for row in rows) == matched
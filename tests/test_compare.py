@@ -0,0 +1,48 @@
+import pytest
+
+import run_fio
+
+
+def p_value(baseline, candidate, higher_is_better=True, method='mannwhitney', alpha=0.05):
+    return run_fio.regression_p_value(baseline, candidate, higher_is_better, method, alpha)
+
+
+@pytest.mark.parametrize('baseline, candidate, expected', [
+    # Exact one-sided Mann-Whitney tail probabilities P(U <= u), from the distribution of U for the group sizes
+    ([4, 5, 6], [1, 2, 3], 1 / 20),
+    ([3, 4, 6], [1, 2, 5], 4 / 20),
+    ([4, 6, 7, 8], [1, 2, 3, 5], 2 / 70),
+    ([6, 7, 8, 9, 10], [1, 2, 3, 4, 5], 1 / 252),
+    ([5, 6, 7, 8, 10], [1, 2, 3, 4, 9], 12 / 252),
+    # No sign of a regression
+    ([1, 2, 3], [4, 5, 6], 1.0),
+    # Ties count half: of the 20 splits only the two that pair the lowest values with either 3 are as extreme
+    ([3, 4, 5], [1, 2, 3], 2 / 20),
+])
+def test_exact_p_value(baseline, candidate, expected):
+    assert p_value(baseline, candidate) == pytest.approx(expected)
+
+
+def test_lower_is_better():
+    assert p_value([1, 2, 3], [4, 5, 6], higher_is_better=False) == pytest.approx(1 / 20)
+    assert p_value([4, 5, 6], [1, 2, 3], higher_is_better=False) == pytest.approx(1.0)
+
+
+def test_too_few_iterations():
+    # Two against two can not get below 1/6
+    assert p_value([3, 4], [1, 2]) is None
+    assert p_value([3, 4], [1, 2], alpha=0.2) == pytest.approx(1 / 6)
+    assert p_value([], [1, 2, 3]) is None
+
+
+def test_normal_approximation():
+    # C(20, 10) splits are beyond COMPARE_EXACT_LIMIT. z = (100 - 50 - 0.5) / sqrt(10 * 10 * 21 / 12)
+    assert p_value(list(range(11, 21)), list(range(1, 11))) == pytest.approx(9.13359e-05, rel=1e-5)
+    assert p_value([5.0] * 10, [5.0] * 10) == 1.0
+
+
+def test_bootstrap():
+    assert p_value([10, 11, 12, 13], [1, 2, 3, 4], method='bootstrap') == pytest.approx(1 / 10001)
+    assert p_value([10, 11, 12, 13], [1, 2, 3, 4], method='bootstrap') == \
+        p_value([10, 11, 12, 13], [1, 2, 3, 4], method='bootstrap')
+    assert p_value([10, 11], [1, 2], method='bootstrap') is None
@@ -0,0 +1,96 @@
+import json
+import os
+import tarfile
+
+import pytest
+
+import run_fio
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'performance-results',
+                      'results-small-4clients-4lss-intel.tar.gz')
+IOR_LOGS = 'results-small-intel-4clients-4lss/logs-IOR-Bandwidth-small-intel-4clients-4lss-120'
+IOR_POINT = 'scale-odirect-4-servers-64-threads-40964000m'
+
+# mdtest -P output of a 64 task run; performance-results has no mdtest runs to take it from
+MDTEST_OUTPUT = """\
+-- started at 10/23/2025 17:02:11 --
+
+mdtest-4.1.0+dev was launched with 64 total task(s) on 4 node(s)
+Command line used: mdtest -n 1000 -F -P -d /mnt/hs_test/mdtest
+Path                : /mnt/hs_test/mdtest
+FS                  : 27.9 TiB   Used FS: 0.1%   Inodes: 1000.0 Mi   Used Inodes: 0.0%
+
+64 tasks, 64000 files
+
+SUMMARY rate: (of 1 iterations)
+   Operation                     Max            Min           Mean        Std Dev
+   ---------                     ---            ---           ----        -------
+   File creation     :       54321.000      54321.000      54321.000          0.000
+   File stat         :      123456.789     123456.789     123456.789          0.000
+   File read         :       98765.432      98765.432      98765.432          0.000
+   File removal      :       45678.901      45678.901      45678.901          0.000
+   Tree creation     :         812.345        812.345        812.345          0.000
+   Tree removal      :          21.500         21.500         21.500          0.000
+
+SUMMARY time: (of 1 iterations)
+   Operation                     Max            Min           Mean        Std Dev
+   ---------                     ---            ---           ----        -------
+   File creation     :           1.178          1.178          1.178          0.000
+   File stat         :           0.518          0.518          0.518          0.000
+   File read         :           0.648          0.648          0.648          0.000
+   File removal      :           1.401          1.401          1.401          0.000
+   Tree creation     :           0.001          0.001          0.001          0.000
+   Tree removal      :           0.047          0.047          0.047          0.000
+-- finished at 10/23/2025 17:02:15 --
+"""
+
+
+def read_sample(name):
+    with tarfile.open(SAMPLE) as tar:
+        return tar.extractfile(name).read().decode()
+
+
+@pytest.mark.skipif(not os.path.exists(SAMPLE), reason='performance-results sample not available')
+@pytest.mark.parametrize('op', ['write', 'read'])
+def test_parse_ior_summary(op):
+    text = read_sample(f'{IOR_LOGS}-json/{IOR_POINT}-{op}.json')
+    summary = json.loads(text)['summary'][0]
+
+    rows = run_fio.parse_ior_output(text)
+    assert rows == [{'engine': 'ior', 'phase': op, 'op': op, 'bw_bytes': round(summary['bwMeanMIB'] * 1024 ** 2),
+                     'iops': round(summary['OPsMean'], 2), 'time_s': round(summary['MeanTime'], 3), 'tasks': 64,
+                     'clients': 4, 'bs': 1048576, 'valid': 1}]
+    assert set(rows[0]) == set(run_fio.ENGINE_RESULT_HEADERS)
+
+
+@pytest.mark.skipif(not os.path.exists(SAMPLE), reason='performance-results sample not available')
+def test_parse_ior_summary_in_console_output():
+    # The run's console log has no JSON, the summary went to a file with -O summaryFile
+    console = read_sample(f'{IOR_LOGS}/{IOR_POINT}-write')
+    assert run_fio.parse_ior_output(console) == []
+
+    rows = run_fio.parse_ior_output(console + read_sample(f'{IOR_LOGS}-json/{IOR_POINT}-write.json') + '\nFinished\n',
+                                    clients=2)
+    assert [(row['op'], row['clients'], row['bw_bytes']) for row in rows] == [('write', 2, 10083626490)]
+
+
+def test_parse_ior_without_summary():
+    assert run_fio.parse_ior_output('') == []
+    assert run_fio.parse_ior_output('ior ERROR: open64("/mnt/hs_test/file-ior", 66, 0664) failed') == []
+
+
+def test_parse_mdtest_summary():
+    rows = run_fio.parse_mdtest_output(MDTEST_OUTPUT, 64, 4)
+    assert [row['phase'] for row in rows] == ['file_creation', 'file_stat', 'file_read', 'file_removal',
+                                             'tree_creation', 'tree_removal']
+    assert rows[0] == {'engine': 'mdtest', 'phase': 'file_creation', 'op': 'meta', 'bw_bytes': '', 'iops': 54321.0,
+                       'time_s': 1.178, 'tasks': 64, 'clients': 4, 'bs': '', 'valid': 1}
+    assert rows[1]['iops'] == 123456.79
+    assert rows[-1]['time_s'] == 0.047
+
+
+def test_parse_mdtest_without_time_summary():
+    rows = run_fio.parse_mdtest_output(MDTEST_OUTPUT.split('SUMMARY time')[0], 8, 1)
+    assert [(row['phase'], row['time_s'], row['tasks']) for row in rows][:2] == [('file_creation', '', 8),
+                                                                                ('file_stat', '', 8)]
+    assert run_fio.parse_mdtest_output('mdtest: no such file or directory', 8, 1) == []
@@ -0,0 +1,99 @@
+import io
+import json
+
+import pytest
+
+import run_fio
+
+DOCUMENT = {
+    'fio version': 'fio-3.35',
+    'timestamp': 1729238400,
+    'global options': {'bs': '1m', 'directory': '/mnt/hs_test/{client}'},
+    'client_stats': [
+        {'jobname': 'job1', 'hostname': '10.0.1.201', 'read': {'bw': 1024, 'iops': 1.0},
+         'note': 'a "quoted" [bracket] {brace} and a backslash \\'},
+        {'jobname': 'job1', 'hostname': '10.0.1.202', 'read': {'bw': 2048, 'iops': 2.0}, 'empty': []},
+        {'jobname': 'All clients', 'read': {'bw': 3072, 'iops': 3.0}},
+    ],
+    'disk_util': [{'name': 'nfs', 'util': 99.5}],
+}
+
+# What fio prints ahead of the JSON when it runs against fio servers
+PREAMBLE = 'hostname=10.0.1.201, be=0, 64-bit, os=Linux, arch=x86-64, fio=fio-3.35, flags=1\n'
+
+
+def collect(chunks):
+    elements, documents = [], []
+    stream = run_fio.FioJsonStream(
+        on_element=lambda header, key, index, element: elements.append((key, index, element)),
+        on_document=documents.append)
+    for chunk in chunks:
+        stream.feed(chunk)
+    return stream, elements, documents
+
+
+def expected_elements(document=DOCUMENT):
+    return [(key, index, element) for key in ('client_stats', 'disk_util')
+            for index, element in enumerate(document[key])]
+
+
+def skeleton(document=DOCUMENT):
+    return dict(document, client_stats=[], disk_util=[])
+
+
+def test_whole_document():
+    stream, elements, documents = collect([PREAMBLE + json.dumps(DOCUMENT, indent=2) + '\n'])
+    assert elements == expected_elements()
+    assert documents == [skeleton()]
+    assert stream.documents == 1
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, 4096])
+def test_chunked_document(size):
+    text = PREAMBLE + json.dumps(DOCUMENT, indent=2) + '\n'
+    _, elements, documents = collect(text[start:start + size] for start in range(0, len(text), size))
+    assert elements == expected_elements()
+    assert documents == [skeleton()]
+
+
+def test_compact_document_split_inside_escape():
+    text = json.dumps(DOCUMENT)
+    split = text.index('\\\\') + 1
+    _, elements, documents = collect([text[:split], text[split:]])
+    assert elements == expected_elements()
+    assert documents == [skeleton()]
+
+
+def test_consecutive_documents():
+    second = dict(DOCUMENT, timestamp=DOCUMENT['timestamp'] + 1)
+    text = json.dumps(DOCUMENT, indent=2) + '\n' + json.dumps(second, indent=2) + '\n'
+    stream, elements, documents = collect(text[start:start + 5] for start in range(0, len(text), 5))
+    assert elements == expected_elements() + expected_elements(second)
+    assert documents == [skeleton(), skeleton(second)]
+    assert stream.documents == 2
+
+
+def test_truncated_document():
+    text = PREAMBLE + json.dumps(DOCUMENT, indent=2)
+    cut = text.index('"All clients"')
+    stream, elements, documents = collect([text[:cut]])
+    # Elements that closed before the cut are delivered, the document itself never completes
+    assert elements == expected_elements()[:2]
+    assert documents == []
+    assert stream.documents == 0
+
+
+def test_braces_in_preamble_are_ignored():
+    _, elements, documents = collect(['fio: pid=12, err=5/file:io_u.c:1889, func=io_u error {x}\n',
+                                      json.dumps(DOCUMENT, indent=2)])
+    assert elements == expected_elements()
+    assert documents == [skeleton()]
+
+
+def test_raw_out_holds_only_the_json():
+    raw = io.StringIO()
+    stream = run_fio.FioJsonStream(raw_out=raw)
+    text = PREAMBLE + json.dumps(DOCUMENT, indent=2) + '\n'
+    for start in range(0, len(text), 11):
+        stream.feed(text[start:start + 11])
+    assert json.loads(raw.getvalue()) == DOCUMENT